@@ -1,27 +1,90 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 import jwt
 from fastapi import HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import User
-from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.cache import create_cache
+from app.hashing import pwd_context, hash_password, verify_and_update
+from app.config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
+    PRINCIPAL_CACHE_TTL, PRINCIPAL_CACHE_SIZE
+)
 
 # OAuth2 scheme - configured to require authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=True)
 
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by route handlers, detached from any session."""
+    id: str
+    username: str
+    email: str
+    role: str
+    is_active: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+    def to_dict(self) -> dict:
+        """Serialise to JSON-safe values for shared cache backends."""
+        data = dict(self.__dict__)
+        for field in ("created_at", "updated_at"):
+            if data[field] is not None:
+                data[field] = data[field].isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Principal":
+        data = dict(data)
+        for field in ("created_at", "updated_at"):
+            if data.get(field) is not None:
+                data[field] = datetime.fromisoformat(data[field])
+        return cls(**data)
+
+@dataclass(frozen=True)
+class TokenClaims:
+    """The authenticated user as described by the access token's claims."""
+    id: str
+    email: str
+    role: str
+    is_active: bool
+    token_version: int
+
+# Authenticated principals keyed by token subject, so most requests skip the user lookup
+principal_cache = create_cache("principal", maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+# Current token version per user id, for the revocation check on claim-based auth
+token_version_cache = create_cache("token_version", maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+def invalidate_principal(email: str, user_id: Optional[str] = None):
+    """Drop a cached principal (and token version) after its user row changes."""
+    principal_cache.delete(email)
+    if user_id is not None:
+        token_version_cache.delete(user_id)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_and_update(plain_password, hashed_password)[0]
 
 def get_password_hash(password: str) -> str:
     """Generate password hash."""
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 def authenticate_user(db: Session, email_or_username: str, password: str, use_email: bool = False) -> Optional[User]:
     """Authenticate user by email or username and password."""
@@ -32,8 +95,17 @@ def authenticate_user(db: Session, email_or_username: str, password: str, use_em
     
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = verify_and_update(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Stored hash predates the current cost, upgrade it while we have the password.
+        # No response shows the hash, so this skips the flush hooks and leaves
+        # updated_at and the resource versions alone.
+        db.execute(
+            update(User).where(User.id == user.id).values(hashed_password=new_hash, updated_at=User.updated_at)
+        )
+        db.commit()
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -48,6 +120,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def token_claims(user: User) -> tuple:
+    """The user fields embedded in access tokens."""
+    return (user.email, user.role, user.is_active)
+
+def create_user_access_token(user: User, expires_delta: Optional[timedelta] = None):
+    """Create JWT access token carrying the claims needed for role checks."""
+    return create_access_token(
+        data={
+            "sub": user.email,
+            "uid": user.id,
+            "role": user.role,
+            "ver": user.token_version or 0,
+            "active": user.is_active,
+        },
+        expires_delta=expires_delta
+    )
+
 def decode_access_token(token: str) -> dict:
     """Decode JWT access token."""
     try:
@@ -56,8 +145,8 @@ def decode_access_token(token: str) -> dict:
     except jwt.InvalidTokenError:
         return None
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """Get current user from token."""
+def _token_payload(token: str) -> dict:
+    """Decode a bearer token, raising 401 when it is missing or invalid."""
     # The oauth2_scheme should automatically raise 401 if no token is provided
     # But if it doesn't, we'll handle it manually
     if not token:
@@ -68,20 +157,52 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         )
     
     payload = decode_access_token(token)
-    if payload is None:
+    if payload is None or payload.get("sub") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return payload
+
+def get_token_version(db: Session, user_id: str) -> Optional[int]:
+    """Get a user's current token version, or None if the user no longer exists."""
+    version = token_version_cache.get(user_id)
+    if version is not None:
+        return version
     
-    email: str = payload.get("sub")
-    if email is None:
+    row = db.query(User.token_version).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    version = row[0] or 0
+    token_version_cache.set(user_id, version)
+    return version
+
+def _check_token_version(db: Session, payload: dict):
+    """Reject tokens issued before the user's last role, status or email change."""
+    if get_token_version(db, payload["uid"]) != payload.get("ver"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
+            detail="Token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+def token_still_valid(db: Session, token: str) -> bool:
+    """Whether ``token`` would still authenticate an active user: unexpired and not revoked."""
+    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        return False
+    if "uid" not in payload:
+        try:
+            return _load_principal(db, payload["sub"]).is_active
+        except HTTPException:
+            return False
+    return get_token_version(db, payload["uid"]) == payload.get("ver") and payload.get("active", True)
+
+def _load_principal(db: Session, email: str) -> Principal:
+    cached = principal_cache.get(email)
+    if cached is not None:
+        return Principal.from_dict(cached)
     
     user = db.query(User).filter(User.email == email).first()
     if user is None:
@@ -90,9 +211,37 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.set(email, principal.to_dict())
+    return principal
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """Get current user from token."""
+    payload = _token_payload(token)
+    if "uid" in payload:
+        _check_token_version(db, payload)
+    return _load_principal(db, payload["sub"])
+
+def get_current_claims(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Get the current user from the token's claims, without loading the user row.
+    
+    Tokens issued before claims were added only carry the subject, so they
+    fall back to the principal lookup in get_current_user.
+    """
+    payload = _token_payload(token)
+    if "uid" not in payload:
+        return _load_principal(db, payload["sub"])
+    
+    _check_token_version(db, payload)
+    return TokenClaims(
+        id=payload["uid"],
+        email=payload["sub"],
+        role=payload["role"],
+        is_active=payload.get("active", True),
+        token_version=payload["ver"],
+    )
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Get current active user from token."""
     if not current_user.is_active:
         raise HTTPException(
@@ -104,7 +253,7 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
 # Role-based access control decorators
 def require_role(required_role: str):
     """Decorator to require a specific role."""
-    def role_checker(current_user: User = Depends(get_current_user)):
+    def role_checker(current_user: TokenClaims = Depends(get_current_claims)):
         if current_user.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -115,7 +264,7 @@ def require_role(required_role: str):
 
 def require_roles(allowed_roles: list):
     """Decorator to require one of the specified roles."""
-    def role_checker(current_user: User = Depends(get_current_user)):
+    def role_checker(current_user: TokenClaims = Depends(get_current_claims)):
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from app.config import CACHE_BACKEND, REDIS_URL
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Entries dropped to make room, for diagnostics
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        """Remove a value if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Remove every value whose key starts with ``prefix`` and return how many there were."""
+        with self._lock:
+            keys = [key for key in self._data if key.startswith(prefix)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        """Remove every value."""
+        with self._lock:
+            self._data.clear()
+
+class RedisCache:
+    """Cache shared between workers, backed by Redis. Values must be JSON serialisable."""
+
+    def __init__(self, url: str, namespace: str, ttl: float = 60):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        self._client = redis.Redis.from_url(url)
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._client.set(self._key(key), json.dumps(value), px=int((self.ttl if ttl is None else ttl) * 1000))
+
+    def delete(self, key: str):
+        self._client.delete(self._key(key))
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = list(self._client.scan_iter(match=self._key(f"{prefix}*")))
+        return self._client.delete(*keys) if keys else 0
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self._key("*")):
+            self._client.delete(key)
+
+def create_cache(namespace: str, maxsize: int = 1024, ttl: float = 60):
+    """Create a cache using the configured backend."""
+    if CACHE_BACKEND == "redis":
+        return RedisCache(REDIS_URL, namespace, ttl=ttl)
+    if CACHE_BACKEND != "memory":
+        raise ValueError(f"Unknown CACHE_BACKEND '{CACHE_BACKEND}'")
+    return LRUCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,202 @@
+"""Append-only change log behind the GET /changes feed.
+
+Every insert, update and delete of a business, metrics or financial history
+row, and every assignment added to or removed from business_accountant,
+appends a row to change_log in the transaction that makes it. Log ids only go up, so a
+client that remembers the last id it saw can ask for everything after it
+instead of reloading whole lists.
+
+ORM writes are logged from the session flush. Bulk Core statements bypass
+that and call log_changes or log_changes_from themselves. Either way the
+session remembers that its transaction logged changes, so listeners can be
+told once it commits (see app.events).
+"""
+from typing import Optional
+from sqlalchemy import event, inspect, insert, literal, null, select, text
+from app import models
+
+BUSINESSES_TABLE = "businesses"
+ASSIGNMENTS_TABLE = "business_accountant"
+FINANCIAL_METRICS_TABLE = "business_financial_metrics"
+METRICS_TABLE = "business_metrics"
+FINANCIAL_HISTORY_TABLE = "business_financial_history"
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+# Log columns filled by log_changes_from, in select order
+LOG_COLUMNS = ("table_name", "operation", "row_id", "business_id", "accountant_id")
+
+# Who could see a business when it was deleted, recorded on its delete entry
+# since there is nothing left to look them up from; never sent to clients
+AUDIENCE_COLUMNS = ("owner_id", "accountant_ids")
+
+_ROW_MODELS = {
+    BUSINESSES_TABLE: models.Business,
+    FINANCIAL_METRICS_TABLE: models.BusinessFinancialMetrics,
+    METRICS_TABLE: models.BusinessMetrics,
+    FINANCIAL_HISTORY_TABLE: models.BusinessFinancialHistory,
+}
+_TABLE_NAMES = {model: name for name, model in _ROW_MODELS.items()}
+
+# Businesses per statement when looking up who may see changes
+_AUDIENCE_BATCH_SIZE = 5000
+
+# Session.info key set while the session's transaction has logged changes
+CHANGES_LOGGED = "changes_logged"
+
+# Key of the PostgreSQL advisory lock that orders change log writers
+_LOG_LOCK_KEY = 0x6368616e6765
+
+def _table():
+    return models.ChangeLogEntry.__table__
+
+def _lock(connection):
+    """Hold the log until commit, so ids are handed out in commit order.
+
+    Otherwise a PostgreSQL transaction could commit id 10 after a reader has
+    moved past id 11. SQLite already serializes writers.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOG_LOCK_KEY})
+
+def row_change(table_name: str, operation: str, row_id: str, business_id: str) -> dict:
+    return {
+        "table_name": table_name, "operation": operation,
+        "row_id": row_id, "business_id": business_id, "accountant_id": None,
+        "owner_id": None, "accountant_ids": None,
+    }
+
+def assignment_change(operation: str, business_id: str, accountant_id: str) -> dict:
+    return {
+        "table_name": ASSIGNMENTS_TABLE, "operation": operation,
+        "row_id": None, "business_id": business_id, "accountant_id": accountant_id,
+        "owner_id": None, "accountant_ids": None,
+    }
+
+def business_delete_change(business) -> dict:
+    """Log entry for deleting ``business``, naming its owner and managing accountants (primary or assigned)."""
+    accountant_ids = {business.accountant_id} | {accountant.id for accountant in business.accountants}
+    return {
+        **row_change(BUSINESSES_TABLE, DELETE, business.id, business.id),
+        "owner_id": business.owner_id, "accountant_ids": sorted(accountant_ids - {None}),
+    }
+
+def row_changes_query(table_name: str, operation: str, row_id, business_id):
+    """Select log rows for ``table_name`` rows; add a where clause naming the changed rows."""
+    return select(literal(table_name), literal(operation), row_id, business_id, null())
+
+def assignment_changes_query(operation: str, business_id, accountant_id):
+    """Select log rows for assignments; add a where clause naming the changed pairs."""
+    return select(literal(ASSIGNMENTS_TABLE), literal(operation), null(), business_id, accountant_id)
+
+def log_changes(db, changes: list):
+    """Append ``changes``, built with row_change and assignment_change, to the log in ``db``'s transaction."""
+    if changes:
+        _lock(db.connection())
+        db.connection().execute(insert(_table()), changes)
+        db.info[CHANGES_LOGGED] = True
+
+def log_changes_from(db, query):
+    """Append the rows of ``query``, which selects LOG_COLUMNS in order, to the log in ``db``'s transaction."""
+    _lock(db.connection())
+    db.connection().execute(insert(_table()).from_select(LOG_COLUMNS, query))
+    db.info[CHANGES_LOGGED] = True
+
+def head_query():
+    """Select the newest log id, or null when nothing was logged yet."""
+    return select(_table().c.id).order_by(_table().c.id.desc()).limit(1)
+
+def changes_query(since: int, limit: int):
+    """Select up to ``limit`` log rows after ``since``, oldest first."""
+    table = _table()
+    return select(table).where(table.c.id > since).order_by(table.c.id).limit(limit)
+
+def current_rows(connection, changes) -> dict:
+    """Current values of the rows ``changes`` refer to, keyed by (table_name, row_id).
+
+    Rows deleted since are missing; a later delete in the log accounts for them.
+    """
+    wanted = {}
+    for change in changes:
+        if change["table_name"] in _ROW_MODELS and change["operation"] != DELETE:
+            wanted.setdefault(change["table_name"], set()).add(change["row_id"])
+    rows = {}
+    for table_name, row_ids in wanted.items():
+        table = _ROW_MODELS[table_name].__table__
+        for row in connection.execute(select(table).where(table.c.id.in_(sorted(row_ids)))).mappings():
+            rows[(table_name, row["id"])] = dict(row)
+    return rows
+
+def read_changes(connection, since: Optional[int], limit: int) -> dict:
+    """Log entries after the ``since`` cursor, with the current values of the rows they name.
+
+    Without ``since`` no entries are returned, only the cursor of the newest
+    one, for clients to take before loading full lists.
+    """
+    if since is None:
+        return {"changes": [], "cursor": connection.execute(head_query()).scalar() or 0, "has_more": False}
+    entries = [dict(row) for row in connection.execute(changes_query(since, limit + 1)).mappings()]
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    rows = current_rows(connection, entries)
+    return {
+        "changes": [{**entry, "data": rows.get((entry["table_name"], entry["row_id"]))} for entry in entries],
+        "cursor": entries[-1]["id"] if entries else since,
+        "has_more": has_more,
+    }
+
+def business_audiences(connection, business_ids) -> dict:
+    """Owner and managing accountants (primary or assigned) of each existing business in ``business_ids``."""
+    business_ids = sorted(set(business_ids))
+    audiences = {}
+    for start in range(0, len(business_ids), _AUDIENCE_BATCH_SIZE):
+        batch = business_ids[start:start + _AUDIENCE_BATCH_SIZE]
+        for business_id, owner_id, accountant_id in connection.execute(
+            select(models.Business.id, models.Business.owner_id, models.Business.accountant_id).where(
+                models.Business.id.in_(batch)
+            )
+        ):
+            audiences[business_id] = (owner_id, {accountant_id} - {None})
+        table = models.business_accountant
+        for business_id, accountant_id in connection.execute(
+            select(table.c.business_id, table.c.accountant_id).where(table.c.business_id.in_(batch))
+        ):
+            if business_id in audiences:
+                audiences[business_id][1].add(accountant_id)
+    return audiences
+
+def _assignment_changes(obj, seen: set) -> list:
+    """Assignments added to or removed from a business or accountant in this flush."""
+    is_business = isinstance(obj, models.Business)
+    history = inspect(obj).attrs["accountants" if is_business else "businesses"].history
+    changes = []
+    for operation, related in ((INSERT, history.added or ()), (DELETE, history.deleted or ())):
+        for other in related:
+            business, accountant = (obj, other) if is_business else (other, obj)
+            # Both sides of the relationship report the same pair
+            if (operation, business.id, accountant.id) not in seen:
+                seen.add((operation, business.id, accountant.id))
+                changes.append(assignment_change(operation, business.id, accountant.id))
+    return changes
+
+def _row_business_id(obj) -> Optional[str]:
+    return obj.id if isinstance(obj, models.Business) else obj.business_id
+
+def _after_flush(session, flush_context):
+    changes, seen = [], set()
+    for operation, objects in ((INSERT, session.new), (UPDATE, session.dirty), (DELETE, session.deleted)):
+        for obj in objects:
+            table_name = _TABLE_NAMES.get(type(obj))
+            if isinstance(obj, models.Business) and operation == DELETE:
+                changes.append(business_delete_change(obj))
+            elif table_name is not None and (operation != UPDATE or session.is_modified(obj, include_collections=False)):
+                changes.append(row_change(table_name, operation, obj.id, _row_business_id(obj)))
+            if operation != DELETE and isinstance(obj, (models.Business, models.Accountant)):
+                changes.extend(_assignment_changes(obj, seen))
+    log_changes(session, changes)
+
+def track_changes(session_class):
+    """Log business, assignment and metrics writes on every flush of sessions of ``session_class``."""
+    event.listen(session_class, "after_flush", _after_flush)
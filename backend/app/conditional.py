@@ -0,0 +1,76 @@
+"""Conditional GET: weak ETags and Last-Modified from resource versions.
+
+A list response's ETag combines the version of the collection it reads (see
+app.versions) with everything else that shapes it: the path, the query
+parameters and the caller, since accountants see different rows. A single
+resource's ETag takes the stamps of the rows it shows in place of the
+version, so writes elsewhere in the collection leave it alone. Tags are
+HMACs, so clients can only present tags the server handed out. A matching
+If-None-Match is answered with 304 after a single indexed query, before the
+route runs its own query or serializes anything.
+"""
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional
+from fastapi import Request, Response, status
+from sqlalchemy.orm import Session
+from app.config import SECRET_KEY
+from app.versions import version_query
+
+# Let browsers keep the response but revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+def _etag(version, request: Request, user_id: str) -> str:
+    params = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    message = f"{version}|{request.url.path}|{params}|{user_id}".encode()
+    digest = hmac.new(SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:24]
+    return f'W/"{version}-{digest}"'
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of ``etag`` against an If-None-Match header."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def _http_date(moment) -> str:
+    # SQLite hands back naive datetimes; versions and row stamps are always written in UTC
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return format_datetime(moment.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+def _validate(version, updated_at, request: Request, response: Response, user_id: str) -> Optional[Response]:
+    headers = {"ETag": _etag(version, request, user_id), "Cache-Control": CACHE_CONTROL}
+    if updated_at is not None:
+        headers["Last-Modified"] = _http_date(updated_at)
+    response.headers.update(headers)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
+
+def conditional_get(db: Session, resource: str, request: Request, response: Response, user_id: str) -> Optional[Response]:
+    """Set validators on ``response`` and return a 304 if the client's copy is current.
+
+    Routes return the 304 as is when one comes back, and otherwise build
+    their response as usual, carrying over the headers set on ``response``.
+    """
+    version, updated_at = db.execute(version_query(resource)).one()
+    # Response caches key entries by the version the validators describe
+    request.state.resource_version = version
+    return _validate(version, updated_at, request, response, user_id)
+
+def conditional_get_row(db: Session, query, request: Request, response: Response, user_id: str) -> Optional[Response]:
+    """Like conditional_get, for a single resource whose rows ``query`` selects.
+
+    Sets no validators when ``query`` finds nothing, leaving the route to
+    answer its 404.
+    """
+    rows = db.execute(query).all()
+    if not rows:
+        return None
+    stamp = hashlib.sha256(repr([tuple(row) for row in rows]).encode()).hexdigest()[:16]
+    modified = max((value for row in rows for value in row if isinstance(value, datetime)), default=None)
+    return _validate(stamp, modified, request, response, user_id)
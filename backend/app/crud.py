@@ -1,14 +1,53 @@
-from sqlalchemy.orm import Session, joinedload
+from datetime import date
+from typing import Optional
+from sqlalchemy import case, delete, exists, func, literal, or_, select, tuple_, union, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from app import models, schemas
-from app.auth import get_password_hash
+from app.auth import get_password_hash, invalidate_principal, token_claims
+from app.pagination import decode_cursor
+from app.search import _like_pattern, business_search_filter
+from app.portfolio import business_aggregates_query, format_aggregates
+from app.timeseries import financial_history_query, format_financial_history
+from app.exports import check_export_format, export_query, iter_export
+from app.summaries import SUMMARY_COLUMNS, refresh_accountant_summaries
+from app.hierarchy import build_subtree, descendants_query, is_ancestor_query, subtree_query
+from app.versions import BUSINESSES, bump_session_versions
+from app.changes import (
+    BUSINESSES_TABLE, DELETE, INSERT, UPDATE, assignment_change, assignment_changes_query,
+    log_changes, log_changes_from, read_changes, row_changes_query
+)
+
+def _after_cursor(dialect: str, model, after: str):
+    """Filter matching rows of ``model`` that sort after a (created_at, id) cursor."""
+    created_at, row_id = decode_cursor(after)
+    if created_at is None:
+        # Every row gets created_at on insert, and without it the cursor
+        # has no place in the order once its anchor row is deleted
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    # Compare against the stored sort key of the anchor row so the bound
+    # value matches the column's storage format exactly; the decoded
+    # timestamp is only a fallback for anchors deleted since.
+    anchor_created_at = select(model.created_at).where(model.id == row_id).scalar_subquery()
+    fallback = created_at
+    if dialect == "sqlite" and not created_at.microsecond:
+        # SQLite stores server-default timestamps as text without fractional seconds
+        fallback = literal(created_at.strftime("%Y-%m-%d %H:%M:%S"))
+    return tuple_(model.created_at, model.id) > tuple_(
+        func.coalesce(anchor_created_at, fallback), row_id
+    )
 
 # CRUD for Users
-def create_user(db: Session, user_data: dict):
-    """Create a new user with hashed password."""
+def create_user(db: Session, user_data: dict, hashed_password: Optional[str] = None):
+    """Create a new user with hashed password; pass ``hashed_password`` if the password was hashed already."""
     try:
-        hashed_password = get_password_hash(user_data["password"])
+        if hashed_password is None:
+            hashed_password = get_password_hash(user_data["password"])
         db_user = models.User(
             username=user_data["username"],
             email=user_data["email"],
@@ -40,27 +79,102 @@ def get_user_by_username(db: Session, username: str):
     """Get a user by username."""
     return db.query(models.User).filter(models.User.username == username).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    """Get a list of users with pagination."""
-    return db.query(models.User).offset(skip).limit(limit).all()
+# Roles reported by user_role_counts, even when no user holds them
+USER_ROLES = ("root_admin", "super_accountant", "accountant")
+
+def user_filters(q: Optional[str] = None, role: Optional[str] = None, is_active: Optional[bool] = None) -> list:
+    """Build the WHERE criteria for a user list query.
+
+    ``q`` matches anywhere in the username, email or accountant name.
+    """
+    criteria = []
+    if q and q.strip():
+        pattern = _like_pattern(q.strip())
+        criteria.append(or_(
+            models.User.username.ilike(pattern, escape="\\"),
+            models.User.email.ilike(pattern, escape="\\"),
+            models.User.id.in_(
+                select(models.Accountant.user_id).where(or_(
+                    models.Accountant.first_name.ilike(pattern, escape="\\"),
+                    models.Accountant.last_name.ilike(pattern, escape="\\")
+                ))
+            )
+        ))
+    if role:
+        criteria.append(models.User.role == role)
+    if is_active is not None:
+        criteria.append(models.User.is_active.is_(is_active))
+    return criteria
+
+def user_after_cursor(dialect: str, after: str):
+    """Filter matching users that sort after a keyset pagination cursor."""
+    return _after_cursor(dialect, models.User, after)
+
+def get_users(db: Session, skip: int = 0, limit: int = 100, after: Optional[str] = None, **filters):
+    """Get a page of users ordered by (created_at, id), matching ``filters`` (see user_filters).
+
+    Pass the cursor of the last row seen as ``after`` for keyset pagination;
+    ``skip`` is ignored in that mode.
+    """
+    query = db.query(models.User).filter(
+        *user_filters(**filters)
+    ).order_by(models.User.created_at, models.User.id)
+    if after:
+        query = query.filter(user_after_cursor(db.bind.dialect.name, after))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def count_users(db: Session, **filters) -> int:
+    """Count users matching ``filters`` (see user_filters)."""
+    return db.query(func.count(models.User.id)).filter(*user_filters(**filters)).scalar()
+
+def _role_counts(rows) -> dict:
+    roles = dict.fromkeys(USER_ROLES, 0)
+    active = 0
+    for role, count, active_count in rows:
+        roles[role] = count
+        active += active_count or 0
+    return {"total": sum(roles.values()), "active": active, "roles": roles}
+
+def user_role_counts_query():
+    """Per-role user and active user counts, in one GROUP BY."""
+    return select(
+        models.User.role,
+        func.count(models.User.id),
+        func.sum(case((models.User.is_active.is_(True), 1), else_=0))
+    ).group_by(models.User.role)
+
+def user_role_counts(db: Session) -> dict:
+    """Count users in total, active, and per role."""
+    return _role_counts(db.execute(user_role_counts_query()).all())
 
 def update_user(db: Session, user_id: str, user_update_data: dict):
     """Update a user."""
     db_user = get_user(db, user_id)
+    previous_email = db_user.email
+    previous_claims = token_claims(db_user)
     
     for field, value in user_update_data.items():
         if value is not None:
             setattr(db_user, field, value)
     
+    # Tokens carry these fields as claims, so changing them revokes issued tokens
+    if token_claims(db_user) != previous_claims:
+        db_user.token_version = (db_user.token_version or 0) + 1
+    
     db.commit()
+    invalidate_principal(previous_email, user_id)
     db.refresh(db_user)
     return db_user
 
 def delete_user(db: Session, user_id: str):
     """Delete a user."""
     db_user = get_user(db, user_id)
+    email = db_user.email
     db.delete(db_user)
     db.commit()
+    invalidate_principal(email, user_id)
     return db_user
 
 # CRUD for Accountants
@@ -113,9 +227,65 @@ def get_independent_accountants(db: Session, skip: int = 0, limit: int = 100):
         models.Accountant.super_accountant_id.is_(None)
     ).offset(skip).limit(limit).all()
 
+def get_accountant_descendants(db: Session, accountant_id: str, skip: int = 0, limit: int = 100):
+    """Get accountants below an accountant at any depth, nearest first."""
+    return db.execute(
+        descendants_query(accountant_id).offset(skip).limit(limit)
+    ).scalars().all()
+
+def is_accountant_ancestor(db: Session, ancestor_id: str, descendant_id: str) -> bool:
+    """Whether an accountant is above another at any depth."""
+    return db.execute(is_ancestor_query(ancestor_id, descendant_id)).scalar()
+
+def get_accountant_subtree(db: Session, accountant_id: str) -> dict:
+    """Get an accountant and everyone below them as a tree with business counts."""
+    subtree = build_subtree(db.execute(subtree_query(accountant_id)))
+    if subtree is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Accountant not found"
+        )
+    return subtree
+
+def _check_super_accountant(accountant_id: str, super_accountant_id: str, is_below: bool):
+    """Reject a super accountant that is the accountant or one of their subordinates."""
+    if super_accountant_id == accountant_id or is_below:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="An accountant cannot report to themselves or one of their subordinates"
+        )
+
+def accountant_summaries_query(super_accountant_id: Optional[str] = None, accountant_id: Optional[str] = None):
+    """Select stored portfolio summaries with accountant names, optionally narrowed."""
+    summary = models.AccountantPortfolioSummary
+    query = select(
+        summary.accountant_id,
+        models.Accountant.first_name,
+        models.Accountant.last_name,
+        models.Accountant.super_accountant_id,
+        *(getattr(summary, column) for column in SUMMARY_COLUMNS)
+    ).join(
+        models.Accountant, models.Accountant.id == summary.accountant_id
+    ).order_by(models.Accountant.last_name, models.Accountant.first_name, summary.accountant_id)
+    if super_accountant_id:
+        query = query.where(models.Accountant.super_accountant_id == super_accountant_id)
+    if accountant_id:
+        query = query.where(summary.accountant_id == accountant_id)
+    return query
+
+def get_accountant_summaries(db: Session, super_accountant_id: Optional[str] = None, accountant_id: Optional[str] = None) -> list:
+    """Get per-accountant business counts and metric totals from the summary table."""
+    rows = db.execute(accountant_summaries_query(super_accountant_id, accountant_id))
+    return [dict(row._mapping) for row in rows]
+
 def update_accountant(db: Session, accountant_id: str, accountant_update_data: dict):
     """Update an accountant."""
     db_accountant = get_accountant(db, accountant_id)
+    super_accountant_id = accountant_update_data.get("super_accountant_id")
+    if super_accountant_id:
+        _check_super_accountant(
+            accountant_id, super_accountant_id, is_accountant_ancestor(db, accountant_id, super_accountant_id)
+        )
     
     for field, value in accountant_update_data.items():
         if value is not None:
@@ -133,6 +303,37 @@ def delete_accountant(db: Session, accountant_id: str):
     return db_accountant
 
 # CRUD for Businesses
+
+# Named loading profiles for Business queries: "card" is what the dashboard
+# business card renders, "detail" the people around a business without its
+# metrics, and "full" everything. Collections are loaded with selectinload so
+# each one costs a single extra IN query rather than multiplying the joined
+# result set; many-to-one links stay joined.
+BUSINESS_VIEWS = ("card", "detail", "full")
+
+def business_loader_options(view: str = "full"):
+    """Get the loader options for a named Business loading profile."""
+    if view not in BUSINESS_VIEWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown view '{view}'. Expected one of: {', '.join(BUSINESS_VIEWS)}"
+        )
+    
+    options = [
+        selectinload(models.Business.accountants).joinedload(models.Accountant.user, innerjoin=False)
+    ]
+    if view in ("detail", "full"):
+        options += [
+            joinedload(models.Business.owner),
+            joinedload(models.Business.accountant, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
+        ]
+    if view in ("card", "full"):
+        options += [
+            selectinload(models.Business.financial_metrics),
+            selectinload(models.Business.metrics),
+        ]
+    return options
+
 def create_business(db: Session, business_data: dict):
     """Create a new business."""
     db_business = models.Business(**business_data)
@@ -144,11 +345,7 @@ def create_business(db: Session, business_data: dict):
 def get_business(db: Session, business_id: str):
     """Get a business by ID."""
     business = db.query(models.Business).options(
-        joinedload(models.Business.owner),
-        joinedload(models.Business.accountant, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.accountants, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.financial_metrics, innerjoin=False),
-        joinedload(models.Business.metrics, innerjoin=False)
+        *business_loader_options("full")
     ).filter(models.Business.id == business_id).first()
     if not business:
         raise HTTPException(
@@ -157,62 +354,215 @@ def get_business(db: Session, business_id: str):
         )
     return business
 
-def get_businesses(db: Session, skip: int = 0, limit: int = 100):
-    """Get a list of businesses with pagination."""
-    return db.query(models.Business).options(
-        joinedload(models.Business.owner),
-        joinedload(models.Business.accountant, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.accountants, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.financial_metrics, innerjoin=False),
-        joinedload(models.Business.metrics, innerjoin=False)
-    ).offset(skip).limit(limit).all()
+def get_business_row(db: Session, business_id: str):
+    """Get a business by ID without loading any of its relationships."""
+    business = db.get(models.Business, business_id)
+    if not business:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Business not found"
+        )
+    return business
+
+def _require_row(db: Session, model, row_id: str, detail: str):
+    if not db.execute(select(exists().where(model.id == row_id))).scalar():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=detail
+        )
+
+def _assignment_exists(business_id: str, **criteria):
+    """Select whether ``business_id`` is assigned to an accountant matching ``criteria``."""
+    table = models.business_accountant
+    query = exists().where(table.c.business_id == business_id)
+    if "accountant_id" in criteria:
+        query = query.where(table.c.accountant_id == criteria["accountant_id"])
+    if "user_id" in criteria:
+        query = query.where(
+            table.c.accountant_id == models.Accountant.id, models.Accountant.user_id == criteria["user_id"]
+        )
+    return select(query)
+
+def is_business_assigned_to_user(db: Session, business_id: str, user_id: str) -> bool:
+    """Whether the accountant profile of ``user_id`` is assigned to manage ``business_id``."""
+    return db.execute(_assignment_exists(business_id, user_id=user_id)).scalar()
+
+def business_after_cursor(dialect: str, after: str):
+    """Filter matching businesses that sort after a keyset pagination cursor."""
+    return _after_cursor(dialect, models.Business, after)
+
+# Sort keys accepted by business list endpoints; prefix with "-" for descending
+BUSINESS_SORTS = ("created_at", "name", "revenue", "net_profit", "documents_due")
+
+def _latest_metric(column):
+    """A business's value from its most recent metrics row, 0 when it has none."""
+    return func.coalesce(
+        select(column).where(
+            column.class_.business_id == models.Business.id
+        ).order_by(
+            column.class_.created_at.desc(), column.class_.id.desc()
+        ).limit(1).scalar_subquery(),
+        0
+    )
+
+def business_sort_order(sort: str = "created_at") -> list:
+    """Get the ORDER BY clauses for a business sort key, with id as tie-breaker."""
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in BUSINESS_SORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sort '{sort}'. Expected one of: {', '.join(BUSINESS_SORTS)}"
+        )
+    expression = {
+        "created_at": models.Business.created_at,
+        "name": models.Business.name,
+        "revenue": _latest_metric(models.BusinessFinancialMetrics.revenue),
+        "net_profit": _latest_metric(models.BusinessFinancialMetrics.net_profit),
+        "documents_due": _latest_metric(models.BusinessMetrics.documents_due),
+    }[key]
+    if descending:
+        return [expression.desc(), models.Business.id.desc()]
+    return [expression, models.Business.id]
+
+def business_filters(
+    dialect: str,
+    q: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    accountant_id: Optional[str] = None,
+    owner_id: Optional[str] = None
+) -> list:
+    """Build the WHERE criteria for a business list query."""
+    criteria = []
+    if q and q.strip():
+        criteria.append(business_search_filter(
+            dialect, q.strip(), models.Business.id, models.Business.name, models.Business.description
+        ))
+    if is_active is not None:
+        criteria.append(models.Business.is_active.is_(is_active))
+    if accountant_id:
+        criteria.append(_managed_by_accountant(accountant_id))
+    if owner_id:
+        criteria.append(models.Business.owner_id == owner_id)
+    return criteria
+
+def get_businesses(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    view: str = "full",
+    sort: str = "created_at",
+    **filters
+):
+    """Get a page of businesses matching ``filters`` (see business_filters).
+
+    Pass the cursor of the last row seen as ``after`` for keyset pagination;
+    ``skip`` is ignored in that mode, which needs the default created_at sort.
+    """
+    if after and sort != "created_at":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor pagination requires sort=created_at"
+        )
+    query = db.query(models.Business).options(
+        *business_loader_options(view)
+    ).filter(
+        *business_filters(db.bind.dialect.name, **filters)
+    ).order_by(*business_sort_order(sort))
+    if after:
+        query = query.filter(business_after_cursor(db.bind.dialect.name, after))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def count_businesses(db: Session, **filters) -> int:
+    """Count businesses matching ``filters`` (see business_filters)."""
+    return db.query(func.count(models.Business.id)).filter(
+        *business_filters(db.bind.dialect.name, **filters)
+    ).scalar()
+
+def business_aggregates(db: Session, group_by: str = "none", percentiles: bool = False, **filters) -> dict:
+    """Sum, average and percentile metrics over businesses matching ``filters``, in one query."""
+    query = business_aggregates_query(group_by, business_filters(db.bind.dialect.name, **filters), percentiles)
+    return format_aggregates(group_by, db.execute(query).all(), percentiles)
 
-def get_businesses_by_owner(db: Session, owner_id: str, skip: int = 0, limit: int = 100):
+def record_financial_history(db: Session, business_id: str, history_data: dict):
+    """Append a month of financial figures for a business; recorded months are never overwritten."""
+    _require_row(db, models.Business, business_id, "Business not found")
+    period = history_data["period"].replace(day=1)
+    db_history = models.BusinessFinancialHistory(**{**history_data, "business_id": business_id, "period": period})
+    db.add(db_history)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Figures for {period:%Y-%m} are already recorded"
+        )
+    db.refresh(db_history)
+    return db_history
+
+def get_financial_history(
+    db: Session,
+    interval: str = "month",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    business_id: Optional[str] = None,
+    **filters
+) -> dict:
+    """Financial figures of one business, or of businesses matching ``filters``, per month, quarter or year."""
+    criteria = business_filters(db.bind.dialect.name, **filters)
+    if business_id is not None:
+        criteria.append(models.Business.id == business_id)
+    query = financial_history_query(interval, start, end, criteria)
+    return format_financial_history(interval, db.execute(query).all())
+
+def export_businesses(db: Session, export_format: str = "ndjson", **filters):
+    """Stream businesses matching ``filters`` with their latest metrics as encoded chunks."""
+    check_export_format(export_format)
+    query = export_query(business_filters(db.bind.dialect.name, **filters))
+    return iter_export(db, query, export_format)
+
+def get_businesses_by_owner(db: Session, owner_id: str, skip: int = 0, limit: int = 100, view: str = "full"):
     """Get businesses owned by a specific user."""
     return db.query(models.Business).options(
-        joinedload(models.Business.owner),
-        joinedload(models.Business.accountant, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.accountants, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.financial_metrics, innerjoin=False),
-        joinedload(models.Business.metrics, innerjoin=False)
+        *business_loader_options(view)
     ).filter(
         models.Business.owner_id == owner_id
     ).offset(skip).limit(limit).all()
 
-def get_businesses_by_accountant(db: Session, accountant_id: str, skip: int = 0, limit: int = 100):
+def _managed_by_accountant(accountant_id: str):
+    """Filter matching businesses an accountant manages as primary or via the junction table."""
+    # A union of two index lookups, an OR across both would scan every business
+    managed_ids = union(
+        select(models.Business.id).where(models.Business.accountant_id == accountant_id),
+        select(models.business_accountant.c.business_id).where(
+            models.business_accountant.c.accountant_id == accountant_id
+        )
+    )
+    return models.Business.id.in_(managed_ids)
+
+def get_businesses_by_accountant(db: Session, accountant_id: str, skip: int = 0, limit: int = 100, view: str = "full"):
     """Get businesses managed by a specific accountant."""
-    # Get businesses where the accountant is the primary accountant (accountant_id)
-    primary_businesses = db.query(models.Business).options(
-        joinedload(models.Business.owner),
-        joinedload(models.Business.accountant, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.accountants, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.financial_metrics, innerjoin=False),
-        joinedload(models.Business.metrics, innerjoin=False)
-    ).filter(
-        models.Business.accountant_id == accountant_id
-    ).all()
-    
-    # Get businesses where the accountant is in the many-to-many relationship
-    many_to_many_businesses = db.query(models.Business).options(
-        joinedload(models.Business.owner),
-        joinedload(models.Business.accountant, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.accountants, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.financial_metrics, innerjoin=False),
-        joinedload(models.Business.metrics, innerjoin=False)
+    return db.query(models.Business).options(
+        *business_loader_options(view)
     ).filter(
-        models.Business.accountants.any(id=accountant_id)
-    ).all()
-    
-    # Combine both lists and remove duplicates
-    all_businesses = primary_businesses + many_to_many_businesses
-    unique_businesses = list({business.id: business for business in all_businesses}.values())
-    
-    # Apply pagination
-    return unique_businesses[skip:skip + limit]
+        _managed_by_accountant(accountant_id)
+    ).order_by(
+        models.Business.created_at, models.Business.id
+    ).offset(skip).limit(limit).all()
+
+def count_businesses_by_accountant(db: Session, accountant_id: str) -> int:
+    """Count businesses managed by a specific accountant."""
+    return db.query(func.count(models.Business.id)).filter(
+        _managed_by_accountant(accountant_id)
+    ).scalar()
 
 def update_business(db: Session, business_id: str, business_update_data: dict):
     """Update a business."""
-    db_business = get_business(db, business_id)
+    db_business = get_business_row(db, business_id)
     
     for field, value in business_update_data.items():
         if value is not None:
@@ -224,7 +574,7 @@ def update_business(db: Session, business_id: str, business_update_data: dict):
 
 def delete_business(db: Session, business_id: str):
     """Delete a business."""
-    db_business = get_business(db, business_id)
+    db_business = get_business_row(db, business_id)
     db.delete(db_business)
     db.commit()
     return db_business
@@ -238,6 +588,9 @@ def assign_super_accountant(db: Session, user_id: str, super_accountant_id: str)
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Accountant not found"
         )
+    _check_super_accountant(
+        accountant.id, super_accountant_id, is_accountant_ancestor(db, accountant.id, super_accountant_id)
+    )
     
     accountant.super_accountant_id = super_accountant_id
     db.commit()
@@ -258,64 +611,194 @@ def remove_super_accountant(db: Session, user_id: str):
     db.refresh(accountant)
     return accountant
 
+def _insert_ignoring_conflicts(db: Session, table):
+    """INSERT into ``table`` that skips rows already present instead of failing."""
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(table).on_conflict_do_nothing()
+
+def _change_assignment(db: Session, business_id: str, accountant_id: str, assign: bool) -> bool:
+    """Add or remove one junction row with narrow statements; returns whether anything changed."""
+    _require_row(db, models.Business, business_id, "Business not found")
+    _require_row(db, models.Accountant, accountant_id, "Accountant not found")
+    table = models.business_accountant
+    if assign:
+        # A pair another request assigned first counts as unchanged rather than failing
+        statement = _insert_ignoring_conflicts(db, table).values(business_id=business_id, accountant_id=accountant_id)
+    else:
+        statement = delete(table).where(table.c.business_id == business_id, table.c.accountant_id == accountant_id)
+    if db.execute(statement).rowcount == 0:
+        return False
+    # Core statements bypass the flush hooks that maintain the summaries, versions and change log
+    refresh_accountant_summaries(db.connection(), [accountant_id])
+    log_changes(db, [assignment_change(INSERT if assign else DELETE, business_id, accountant_id)])
+    bump_session_versions(db, BUSINESSES)
+    return True
+
 def assign_accountant_to_business(db: Session, business_id: str, accountant_id: str):
     """Assign an accountant to a business using the many-to-many relationship."""
-    business = get_business(db, business_id)
-    accountant = get_accountant(db, accountant_id)
-    
-    if not business:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Business not found"
-        )
-    
-    if not accountant:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Accountant not found"
-        )
-    
-    # Add accountant to the many-to-many relationship
-    if accountant not in business.accountants:
-        business.accountants.append(accountant)
+    if _change_assignment(db, business_id, accountant_id, assign=True):
         db.commit()
-        db.refresh(business)
-    
-    return business
+    return get_business_row(db, business_id)
 
 def remove_accountant_from_business(db: Session, business_id: str, accountant_id: str):
     """Remove an accountant from a business using the many-to-many relationship."""
-    business = get_business(db, business_id)
-    accountant = get_accountant(db, accountant_id)
-    
-    if not business:
+    if _change_assignment(db, business_id, accountant_id, assign=False):
+        db.commit()
+    return get_business_row(db, business_id)
+
+# Pairs per statement in bulk assignment changes, within every backend's bound parameter limit
+_ASSIGNMENT_BATCH_SIZE = 5000
+
+def _missing_ids(db: Session, model, ids) -> list:
+    ids = sorted(set(ids))
+    found = set()
+    for start in range(0, len(ids), _ASSIGNMENT_BATCH_SIZE):
+        batch = ids[start:start + _ASSIGNMENT_BATCH_SIZE]
+        found |= set(db.execute(select(model.id).where(model.id.in_(batch))).scalars())
+    return [value for value in ids if value not in found]
+
+def _check_exist(db: Session, model, ids, label: str):
+    missing = _missing_ids(db, model, ids)
+    if missing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Business not found"
+            detail=f"{label} not found: {', '.join(missing[:20])}"
         )
-    
-    if not accountant:
+
+def _pair_batches(pairs):
+    pairs = list(dict.fromkeys((pair["business_id"], pair["accountant_id"]) for pair in pairs))
+    for start in range(0, len(pairs), _ASSIGNMENT_BATCH_SIZE):
+        yield pairs[start:start + _ASSIGNMENT_BATCH_SIZE]
+
+def _assign_pairs(db: Session, pairs) -> int:
+    table = models.business_accountant
+    pair_key = tuple_(table.c.business_id, table.c.accountant_id)
+    # Pairs another request assigned first are skipped rather than failing the whole batch
+    statement = _insert_ignoring_conflicts(db, table)
+    assigned = 0
+    for batch in _pair_batches(pairs):
+        rows = [{"business_id": business_id, "accountant_id": accountant_id} for business_id, accountant_id in batch]
+        if db.bind.dialect.name == "postgresql":
+            new = [dict(row) for row in db.execute(
+                statement.values(rows).returning(table.c.business_id, table.c.accountant_id)
+            ).mappings()]
+            assigned += len(new)
+        else:
+            # SQLite has no RETURNING in this SQLAlchemy release. A pair committed
+            # elsewhere between this select and the insert is skipped and not
+            # counted, only logged twice
+            existing = set(db.execute(select(table.c.business_id, table.c.accountant_id).where(pair_key.in_(batch))).all())
+            new = [row for row in rows if (row["business_id"], row["accountant_id"]) not in existing]
+            if new:
+                assigned += db.execute(statement, new).rowcount
+        log_changes(db, [assignment_change(INSERT, **pair) for pair in new])
+    return assigned
+
+def _remove_pairs(db: Session, pairs) -> int:
+    table = models.business_accountant
+    pair_key = tuple_(table.c.business_id, table.c.accountant_id)
+    removed = 0
+    for batch in _pair_batches(pairs):
+        log_changes_from(db, assignment_changes_query(
+            DELETE, table.c.business_id, table.c.accountant_id
+        ).where(pair_key.in_(batch)))
+        removed += db.execute(delete(table).where(pair_key.in_(batch))).rowcount
+    return removed
+
+def _move_accountant_businesses(db: Session, from_accountant_id: str, to_accountant_id: str) -> dict:
+    """Hand every business of one accountant, as primary or assigned accountant, to another."""
+    table = models.business_accountant
+    current = table.alias("current")
+    # Log each step before it runs, while its rows still match the same criteria
+    not_yet_assigned = (
+        table.c.accountant_id == from_accountant_id,
+        ~exists().where(current.c.business_id == table.c.business_id, current.c.accountant_id == to_accountant_id)
+    )
+    log_changes_from(db, assignment_changes_query(
+        INSERT, table.c.business_id, literal(to_accountant_id)
+    ).where(*not_yet_assigned))
+    # Pairs another request assigned since the log query are skipped rather than failing the move
+    assigned = db.execute(_insert_ignoring_conflicts(db, table).from_select(
+        ("business_id", "accountant_id"),
+        select(table.c.business_id, literal(to_accountant_id)).where(*not_yet_assigned)
+    )).rowcount
+    log_changes_from(db, assignment_changes_query(
+        DELETE, table.c.business_id, table.c.accountant_id
+    ).where(table.c.accountant_id == from_accountant_id))
+    removed = db.execute(delete(table).where(table.c.accountant_id == from_accountant_id)).rowcount
+    log_changes_from(db, row_changes_query(
+        BUSINESSES_TABLE, UPDATE, models.Business.id, models.Business.id
+    ).where(models.Business.accountant_id == from_accountant_id))
+    reassigned = db.execute(
+        update(models.Business).where(
+            models.Business.accountant_id == from_accountant_id
+        ).values(accountant_id=to_accountant_id).execution_options(synchronize_session=False)
+    ).rowcount
+    return {"assigned": assigned, "removed": removed, "reassigned": reassigned}
+
+def apply_assignment_changes(
+    db: Session,
+    assign: Optional[list] = None,
+    remove: Optional[list] = None,
+    from_accountant_id: Optional[str] = None,
+    to_accountant_id: Optional[str] = None
+) -> dict:
+    """Apply bulk assignment changes without committing; returns how many rows each step changed.
+
+    Removals run before assignments, and the move last. Works on the sync
+    Session behind an AsyncSession too, through ``run_sync``.
+    """
+    assign, remove = assign or [], remove or []
+    if (from_accountant_id is None) != (to_accountant_id is None):
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Accountant not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give both from_accountant_id and to_accountant_id to move businesses"
         )
-    
-    # Remove accountant from the many-to-many relationship
-    if accountant in business.accountants:
-        business.accountants.remove(accountant)
+    if from_accountant_id is not None and from_accountant_id == to_accountant_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot move businesses to the same accountant"
+        )
+    accountant_ids = {pair["accountant_id"] for pair in assign + remove} | {from_accountant_id, to_accountant_id}
+    accountant_ids.discard(None)
+    _check_exist(db, models.Business, {pair["business_id"] for pair in assign + remove}, "Business")
+    _check_exist(db, models.Accountant, accountant_ids, "Accountant")
+
+    counts = {"assigned": 0, "removed": 0, "reassigned": 0}
+    counts["removed"] += _remove_pairs(db, remove)
+    counts["assigned"] += _assign_pairs(db, assign)
+    if from_accountant_id is not None:
+        for key, count in _move_accountant_businesses(db, from_accountant_id, to_accountant_id).items():
+            counts[key] += count
+    # Core statements bypass the flush hooks that maintain the summaries and versions
+    refresh_accountant_summaries(db.connection(), accountant_ids)
+    if any(counts.values()):
+        bump_session_versions(db, BUSINESSES)
+    return counts
+
+def bulk_update_assignments(db: Session, **changes) -> dict:
+    """Assign, unassign and move accountants across many businesses in one transaction."""
+    try:
+        counts = apply_assignment_changes(db, **changes)
         db.commit()
-        db.refresh(business)
-    
-    return business
+    except Exception:
+        db.rollback()
+        raise
+    return counts
 
-def get_user_businesses(db: Session, owner_id: str, skip: int = 0, limit: int = 100):
+def get_user_businesses(db: Session, owner_id: str, skip: int = 0, limit: int = 100, view: str = "full"):
     """Get businesses owned by a specific user."""
     return db.query(models.Business).options(
-        joinedload(models.Business.owner),
-        joinedload(models.Business.accountant, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.accountants, innerjoin=False).joinedload(models.Accountant.user, innerjoin=False),
-        joinedload(models.Business.financial_metrics, innerjoin=False),
-        joinedload(models.Business.metrics, innerjoin=False)
+        *business_loader_options(view)
     ).filter(
         models.Business.owner_id == owner_id
-    ).offset(skip).limit(limit).all()
\ No newline at end of file
+    ).offset(skip).limit(limit).all()
+
+# Change feed
+def get_changes(db: Session, since: Optional[int] = None, limit: int = 500) -> dict:
+    """Change log entries after the ``since`` cursor, with the current values of the rows they name.
+
+    Without ``since`` no entries are returned, only the cursor of the newest
+    one, for clients to take before loading full lists.
+    """
+    return read_changes(db.connection(), since, limit)
@@ -0,0 +1,80 @@
+"""Async versions of the functions in app.crud, for use with AsyncSession.
+
+Each function runs its app.crud counterpart on the AsyncSession's sync
+session through AsyncSession.run_sync, so queries and writes are written
+once, in app.crud. Statements still go out through the async driver, and
+the event loop serves other requests while they wait. Password hashing
+holds the CPU, so it runs in the thread pool before the session is used.
+
+Nothing is lazy loaded under asyncio: read only the attributes app.crud
+loads on the objects it returns.
+"""
+import functools
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app import crud
+from app.auth import get_password_hash
+
+def _run_sync(function):
+    """Async version of ``function``, which takes a Session first."""
+    @functools.wraps(function)
+    async def run(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(function, *args, **kwargs)
+    return run
+
+# CRUD for Users
+async def create_user(db: AsyncSession, user_data: dict):
+    """Create a new user with hashed password."""
+    hashed_password = await run_in_threadpool(get_password_hash, user_data["password"])
+    return await db.run_sync(crud.create_user, user_data, hashed_password=hashed_password)
+
+get_user = _run_sync(crud.get_user)
+get_user_by_username = _run_sync(crud.get_user_by_username)
+get_users = _run_sync(crud.get_users)
+count_users = _run_sync(crud.count_users)
+user_role_counts = _run_sync(crud.user_role_counts)
+update_user = _run_sync(crud.update_user)
+delete_user = _run_sync(crud.delete_user)
+
+# CRUD for Accountants
+create_accountant = _run_sync(crud.create_accountant)
+get_accountant = _run_sync(crud.get_accountant)
+get_accountant_by_user_id = _run_sync(crud.get_accountant_by_user_id)
+get_accountants = _run_sync(crud.get_accountants)
+get_accountants_by_super = _run_sync(crud.get_accountants_by_super)
+get_independent_accountants = _run_sync(crud.get_independent_accountants)
+get_accountant_descendants = _run_sync(crud.get_accountant_descendants)
+is_accountant_ancestor = _run_sync(crud.is_accountant_ancestor)
+get_accountant_subtree = _run_sync(crud.get_accountant_subtree)
+get_accountant_summaries = _run_sync(crud.get_accountant_summaries)
+update_accountant = _run_sync(crud.update_accountant)
+delete_accountant = _run_sync(crud.delete_accountant)
+
+# CRUD for Businesses
+create_business = _run_sync(crud.create_business)
+get_business = _run_sync(crud.get_business)
+get_business_row = _run_sync(crud.get_business_row)
+is_business_assigned_to_user = _run_sync(crud.is_business_assigned_to_user)
+get_businesses = _run_sync(crud.get_businesses)
+count_businesses = _run_sync(crud.count_businesses)
+business_aggregates = _run_sync(crud.business_aggregates)
+record_financial_history = _run_sync(crud.record_financial_history)
+get_financial_history = _run_sync(crud.get_financial_history)
+get_businesses_by_owner = _run_sync(crud.get_businesses_by_owner)
+get_businesses_by_accountant = _run_sync(crud.get_businesses_by_accountant)
+count_businesses_by_accountant = _run_sync(crud.count_businesses_by_accountant)
+update_business = _run_sync(crud.update_business)
+delete_business = _run_sync(crud.delete_business)
+get_user_businesses = _run_sync(crud.get_user_businesses)
+
+# Role management
+assign_super_accountant = _run_sync(crud.assign_super_accountant)
+remove_super_accountant = _run_sync(crud.remove_super_accountant)
+
+# Accountant assignments
+assign_accountant_to_business = _run_sync(crud.assign_accountant_to_business)
+remove_accountant_from_business = _run_sync(crud.remove_accountant_from_business)
+bulk_update_assignments = _run_sync(crud.bulk_update_assignments)
+
+# Change feed
+get_changes = _run_sync(crud.get_changes)
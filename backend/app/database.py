@@ -1,14 +1,114 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.config import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS, SQLITE_WAL, SQLITE_BUSY_TIMEOUT_MS
+)
 
-# SQLite database for development (can be changed to PostgreSQL/MySQL for production)
-SQLALCHEMY_DATABASE_URL = "sqlite:///./apex_am.db"
+# Defaults to SQLite for development; set DATABASE_URL for PostgreSQL in production
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Async drivers used for each sync URL scheme
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto the matching async driver."""
+    scheme, sep, rest = url.partition("://")
+    backend = scheme.split("+", 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database URL scheme '{scheme}'")
+    return f"{ASYNC_DRIVERS[backend]}{sep}{rest}"
+
+def _is_sqlite_memory(url) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Build create_engine keyword arguments tuned for the URL's backend."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    pool_options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+    if backend == "sqlite":
+        if _is_sqlite_memory(url):
+            # In-memory databases live and die with their connection, keep the dialect's pool
+            return {"connect_args": {"check_same_thread": False}}
+        return {
+            **pool_options,
+            "poolclass": AsyncAdaptedQueuePool if is_async else QueuePool,
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+            },
+        }
+
+    options = {**pool_options, "pool_recycle": DB_POOL_RECYCLE}
+    if backend == "postgresql":
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply per-connection SQLite pragmas."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    if SQLITE_WAL:
+        # WAL lets readers proceed while a writer holds the database
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL):
+    """Create the sync engine for a database URL."""
+    db_engine = create_engine(url, **engine_options(url))
+    if db_engine.dialect.name == "sqlite" and not _is_sqlite_memory(db_engine.url):
+        event.listen(db_engine, "connect", _set_sqlite_pragmas)
+    return db_engine
+
+def create_async_db_engine(url: str = SQLALCHEMY_DATABASE_URL):
+    """Create the async engine for a (sync) database URL."""
+    async_url = to_async_url(url)
+    db_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+    if db_engine.dialect.name == "sqlite" and not _is_sqlite_memory(db_engine.url):
+        event.listen(db_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return db_engine
+
+def pool_status(db_engine) -> dict:
+    """Summarise connection pool usage for diagnostics."""
+    pool = db_engine.pool
+    stats = {
+        "backend": db_engine.dialect.name,
+        "pool_class": type(pool).__name__,
+        "status": pool.status(),
+    }
+    # Only queue-style pools track these counters
+    for counter in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, counter):
+            stats[counter] = getattr(pool, counter)()
+    return stats
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for async def handlers; the sync engine stays for scripts and tests
+async_engine = create_async_db_engine()
+AsyncSessionLocal = sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 # Dependency to get database session
@@ -18,3 +118,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
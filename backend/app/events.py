@@ -0,0 +1,277 @@
+"""Server-sent change events for dashboards, fed by the change log.
+
+Commits that log changes (see app.changes) notify a broker: in-process by
+default, or Redis pub/sub with EVENT_BROKER=redis so every worker hears
+about every worker's commits. Each worker runs one dispatcher that, when
+notified, reads the new log entries once and offers them to its connected
+clients through bounded queues. It also reads every EVENTS_POLL_INTERVAL
+seconds, so commits made where no broker reaches still arrive.
+
+Event ids are change log cursors. A client that falls EVENTS_QUEUE_SIZE
+events behind is disconnected and catches up from the log when it
+reconnects with Last-Event-ID, so slow clients cost bounded memory and
+miss nothing.
+"""
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Callable, Optional
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.changes import (
+    ASSIGNMENTS_TABLE, AUDIENCE_COLUMNS, BUSINESSES_TABLE, CHANGES_LOGGED, DELETE, business_audiences, read_changes
+)
+from app.config import (
+    EVENT_BROKER, EVENTS_HEARTBEAT_INTERVAL, EVENTS_POLL_INTERVAL, EVENTS_QUEUE_SIZE, REDIS_URL
+)
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Roles that see every business, as on GET /businesses/
+FULL_VIEW_ROLES = ("root_admin", "super_accountant")
+
+# Log entries read per query
+EVENTS_PAGE_SIZE = 500
+
+class LocalBroker:
+    """Notifies listeners in this process."""
+
+    def __init__(self):
+        self._listeners = []
+
+    def publish(self):
+        for listener in list(self._listeners):
+            listener()
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+class RedisBroker:
+    """Notifies listeners in every process subscribed to a Redis channel."""
+
+    def __init__(self, url: str, channel: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("EVENT_BROKER=redis requires the 'redis' package")
+        self._client = redis.Redis.from_url(url)
+        self._errors = redis.RedisError
+        self.channel = channel
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def publish(self):
+        try:
+            self._client.publish(self.channel, b"")
+        except self._errors:
+            # The write has committed either way; dispatchers find it on their next poll
+            pass
+
+    def subscribe(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+            if self._thread is None:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self.channel: self._notify})
+                self._thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def _notify(self, message):
+        for listener in list(self._listeners):
+            listener()
+
+def create_broker():
+    """Create a broker using the configured backend."""
+    if EVENT_BROKER == "redis":
+        return RedisBroker(REDIS_URL, "changes")
+    if EVENT_BROKER != "memory":
+        raise ValueError(f"Unknown EVENT_BROKER '{EVENT_BROKER}'")
+    return LocalBroker()
+
+class Subscriber:
+    """One connected client: who it is and the events waiting to be sent to it."""
+
+    def __init__(self, user_id: str, role: str, accountant_id: Optional[str] = None, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.user_id = user_id
+        self.sees_all = role in FULL_VIEW_ROLES
+        self.accountant_id = accountant_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def can_see(self, change: dict, audiences: dict) -> bool:
+        """Whether the client may see ``change``, given the audiences of the businesses it touches."""
+        if self.sees_all:
+            return True
+        # The business is gone, so check who could see it when it was deleted
+        if change["table_name"] == BUSINESSES_TABLE and change["operation"] == DELETE:
+            return change["owner_id"] == self.user_id or self.accountant_id in (change["accountant_ids"] or ())
+        # Accountants hear about their own assignments, including the ones taken away
+        if change["table_name"] == ASSIGNMENTS_TABLE and change["accountant_id"] == self.accountant_id:
+            return True
+        owner_id, accountant_ids = audiences.get(change["business_id"], (None, ()))
+        return owner_id == self.user_id or self.accountant_id in accountant_ids
+
+    def offer(self, change: dict):
+        """Queue ``change`` unless the client has fallen too far behind."""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+class ChangeStream:
+    """Per-worker dispatcher from the change log to connected subscribers."""
+
+    def __init__(self, broker, session_factory=SessionLocal, poll_interval: float = EVENTS_POLL_INTERVAL):
+        self.broker = broker
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.subscribers = set()
+        self.cursor = None
+        self._loop = None
+        self._wake = None
+        self._task = None
+        self._listening = False
+        self._start_lock = None
+
+    def notify(self):
+        """Wake the dispatcher; safe to call from any thread."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None:
+            loop.call_soon_threadsafe(wake.set)
+
+    def read(self, since: Optional[int], audiences: bool = True):
+        """Read a page of log entries after ``since`` and, if asked, the audiences of their businesses."""
+        db = self.session_factory()
+        try:
+            connection = db.connection()
+            feed = read_changes(connection, since, EVENTS_PAGE_SIZE)
+            if not audiences:
+                return feed, {}
+            return feed, business_audiences(connection, [change["business_id"] for change in feed["changes"]])
+        finally:
+            db.close()
+
+    def check(self, condition: Callable[[Session], bool]) -> bool:
+        """Evaluate ``condition`` against a fresh session."""
+        db = self.session_factory()
+        try:
+            return condition(db)
+        finally:
+            db.close()
+
+    async def subscribe(self, subscriber: Subscriber):
+        """Start delivering new events to ``subscriber``, starting the dispatcher if it is idle."""
+        # Created here rather than in __init__ so it belongs to the running loop
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._task is None:
+                self._loop = asyncio.get_running_loop()
+                self._wake = asyncio.Event()
+                if not self._listening:
+                    self.broker.subscribe(self.notify)
+                    self._listening = True
+                # Entries logged before now reach subscribers only through their own catch-up reads
+                feed, _ = await run_in_threadpool(self.read, None, False)
+                self.cursor = feed["cursor"]
+                self._task = asyncio.create_task(self._run())
+            self.subscribers.add(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """Stop delivering to ``subscriber``, and stop the dispatcher when nobody is left."""
+        self.subscribers.discard(subscriber)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = self._loop = self._wake = None
+
+    async def dispatch(self):
+        """Offer every log entry after the cursor to the subscribers that may see it."""
+        while True:
+            needs_audiences = any(not subscriber.sees_all for subscriber in self.subscribers)
+            feed, audiences = await run_in_threadpool(self.read, self.cursor, needs_audiences)
+            for change in feed["changes"]:
+                for subscriber in list(self.subscribers):
+                    if subscriber.can_see(change, audiences):
+                        subscriber.offer(change)
+            self.cursor = feed["cursor"]
+            if not feed["has_more"]:
+                return
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.dispatch()
+            except Exception:
+                # The cursor only moves past entries already offered, so the next read retries the rest
+                logger.exception("Change stream dispatch failed")
+                await asyncio.sleep(self.poll_interval)
+
+def format_event(change: dict) -> bytes:
+    """Encode a log entry as a server-sent event named after its table."""
+    data = {key: value for key, value in change.items() if key not in AUDIENCE_COLUMNS}
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (change["id"], change["table_name"].encode(), orjson.dumps(data))
+
+async def event_stream(
+    stream: ChangeStream,
+    subscriber: Subscriber,
+    since: Optional[int] = None,
+    heartbeat_interval: float = EVENTS_HEARTBEAT_INTERVAL,
+    still_authorized: Optional[Callable[[Session], bool]] = None
+) -> AsyncIterator[bytes]:
+    """Yield the events ``subscriber`` may see, after ``since`` if given, until it overflows.
+
+    ``still_authorized`` is checked at every heartbeat, and the stream ends
+    once it fails, so a revoked or expired token stops receiving events.
+
+    Subscribing comes first, so entries the dispatcher sends while older
+    ones are read from the log are queued rather than missed; anything
+    already sent from the log is skipped by id.
+    """
+    await stream.subscribe(subscriber)
+    try:
+        yield b"retry: %d\n\n" % int(heartbeat_interval * 1000)
+        last = since
+        while since is not None:
+            feed, audiences = await run_in_threadpool(stream.read, last, not subscriber.sees_all)
+            for change in feed["changes"]:
+                if subscriber.can_see(change, audiences):
+                    yield format_event(change)
+            last = feed["cursor"]
+            if not feed["has_more"]:
+                break
+        while not subscriber.overflowed:
+            try:
+                change = await asyncio.wait_for(subscriber.queue.get(), heartbeat_interval)
+            except asyncio.TimeoutError:
+                if still_authorized is not None and not await run_in_threadpool(stream.check, still_authorized):
+                    break
+                yield b": keep-alive\n\n"
+                continue
+            if last is None or change["id"] > last:
+                yield format_event(change)
+    finally:
+        stream.unsubscribe(subscriber)
+
+change_stream = ChangeStream(create_broker())
+
+def _after_commit(session):
+    if session.info.pop(CHANGES_LOGGED, False):
+        change_stream.broker.publish()
+
+def _after_rollback(session):
+    session.info.pop(CHANGES_LOGGED, None)
+
+def track_change_events(session_class):
+    """Notify the broker when sessions of ``session_class`` commit logged changes."""
+    event.listen(session_class, "after_commit", _after_commit)
+    event.listen(session_class, "after_rollback", _after_rollback)
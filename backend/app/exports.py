@@ -0,0 +1,99 @@
+"""Streaming export of businesses with their latest metrics.
+
+Rows are read with a Core select, so no ORM entities or relationship
+graphs are built, and pulled from the cursor a partition at a time. Output
+is written in chunks of roughly EXPORT_CHUNK_SIZE bytes, so memory stays
+constant however many businesses are exported.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session, aliased
+from app import models
+from app.portfolio import _is_latest
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Rows fetched from the cursor at a time, and bytes written per chunk
+EXPORT_PARTITION_SIZE = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+BUSINESS_COLUMNS = ("id", "name", "description", "owner_id", "accountant_id", "is_active", "created_at")
+FINANCIAL_COLUMNS = (
+    "revenue", "gross_profit", "net_profit", "total_costs",
+    "percentage_change_revenue", "percentage_change_gross_profit",
+    "percentage_change_net_profit", "percentage_change_total_costs",
+)
+WORKLOAD_COLUMNS = ("documents_due", "outstanding_invoices", "pending_approvals", "accounting_year_end")
+EXPORT_COLUMNS = BUSINESS_COLUMNS + FINANCIAL_COLUMNS + WORKLOAD_COLUMNS
+
+def check_export_format(export_format: str):
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown format '{export_format}'. Expected one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+def export_query(criteria: Optional[list] = None):
+    """Select businesses matching ``criteria`` with their latest metrics, in (created_at, id) order.
+
+    Businesses without metrics get nulls in the metrics columns.
+    """
+    financial = aliased(models.BusinessFinancialMetrics)
+    workload = aliased(models.BusinessMetrics)
+    return select(
+        *(getattr(models.Business, column) for column in BUSINESS_COLUMNS),
+        *(getattr(financial, column) for column in FINANCIAL_COLUMNS),
+        *(getattr(workload, column) for column in WORKLOAD_COLUMNS),
+    ).select_from(models.Business).outerjoin(
+        financial,
+        and_(financial.business_id == models.Business.id, _is_latest(models.BusinessFinancialMetrics, financial))
+    ).outerjoin(
+        workload,
+        and_(workload.business_id == models.Business.id, _is_latest(models.BusinessMetrics, workload))
+    ).where(
+        *(criteria or [])
+    ).order_by(models.Business.created_at, models.Business.id)
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _csv_lines(rows) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(_value(value) for value in row)
+        yield buffer.getvalue()
+
+def _ndjson_lines(rows) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, map(_value, row)))) + "\n"
+
+def iter_export(db: Session, query, export_format: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Run ``query`` and yield the rows encoded as ``export_format``, a chunk at a time."""
+    result = db.execute(
+        query, execution_options={"stream_results": True, "yield_per": EXPORT_PARTITION_SIZE}
+    )
+    rows = (row for partition in result.partitions() for row in partition)
+    lines = _csv_lines(rows) if export_format == "csv" else _ndjson_lines(rows)
+    chunk, size = [], 0
+    try:
+        for line in lines:
+            chunk.append(line)
+            size += len(line)
+            if size >= chunk_size:
+                yield "".join(chunk).encode()
+                chunk, size = [], 0
+        if chunk:
+            yield "".join(chunk).encode()
+    finally:
+        result.close()
@@ -0,0 +1,144 @@
+"""Password hashing off the request thread.
+
+bcrypt is CPU bound and holds the GIL while it runs, so hashes are computed in
+a small pool of worker processes. The pool admits a bounded number of jobs;
+once it is full, callers get a 429 instead of queueing without limit.
+"""
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from app.config import BCRYPT_ROUNDS, HASH_WORKERS, HASH_QUEUE_SIZE, HASH_RETRY_AFTER
+
+@lru_cache(maxsize=None)
+def build_context(rounds: int) -> CryptContext:
+    """A bcrypt context that hashes at the given cost and flags hashes at any other cost for upgrade."""
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+pwd_context = build_context(BCRYPT_ROUNDS)
+
+# Worker entry points, module level so they can be pickled into the pool
+def _hash(password: str, rounds: int) -> str:
+    return build_context(rounds).hash(password)
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return build_context(rounds).verify_and_update(password, hashed_password)
+
+class HashMetrics:
+    """Latency of hashing operations over a window of recent samples."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._rejected = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(operation, deque(maxlen=self.window)).append(seconds)
+            self._counts[operation] = self._counts.get(operation, 0) + 1
+
+    def reject(self, operation: str):
+        with self._lock:
+            self._rejected[operation] = self._rejected.get(operation, 0) + 1
+
+    def snapshot(self) -> dict:
+        """Counts and latency percentiles in milliseconds, per operation."""
+        with self._lock:
+            operations = set(self._counts) | set(self._rejected)
+            stats = {}
+            for operation in sorted(operations):
+                ordered = sorted(self._samples.get(operation, ()))
+                stats[operation] = {
+                    "count": self._counts.get(operation, 0),
+                    "rejected": self._rejected.get(operation, 0),
+                }
+                if ordered:
+                    for name, pct in (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99)):
+                        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+                        stats[operation][name] = round(ordered[index] * 1000, 2)
+                    stats[operation]["max_ms"] = round(ordered[-1] * 1000, 2)
+            return stats
+
+class HashingPool:
+    """Bounded process pool for password hashing."""
+
+    def __init__(self, workers: int, queue_size: int, retry_after: int = 1):
+        self.workers = workers
+        # Jobs running on a worker plus jobs waiting for one
+        self.capacity = max(1, workers) + queue_size
+        self.retry_after = retry_after
+        self.metrics = HashMetrics()
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._in_flight = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, since forking a process that runs a thread pool can deadlock
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def run(self, operation: str, fn, *args):
+        """Run fn(*args) on a worker and wait for it, or raise 429 when the pool is full."""
+        if not self._slots.acquire(blocking=False):
+            self.metrics.reject(operation)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many password operations in progress, please retry",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        with self._lock:
+            self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            if self.workers == 0:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self.metrics.record(operation, time.perf_counter() - start)
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def status(self) -> dict:
+        """Pool occupancy and hashing latency for diagnostics."""
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self._in_flight,
+            "operations": self.metrics.snapshot(),
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+hashing_pool = HashingPool(HASH_WORKERS, HASH_QUEUE_SIZE, HASH_RETRY_AFTER)
+
+def hash_password(password: str) -> str:
+    """Hash a password at the configured cost."""
+    return hashing_pool.run("hash", _hash, password, BCRYPT_ROUNDS)
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password, returning a replacement hash when the stored one uses old parameters."""
+    return hashing_pool.run("verify", _verify_and_update, password, hashed_password, BCRYPT_ROUNDS)
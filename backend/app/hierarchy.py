@@ -0,0 +1,216 @@
+"""Closure table over the super accountant hierarchy.
+
+accountant_hierarchy holds a row (ancestor_id, descendant_id, depth) for
+every accountant and each of its ancestors, plus a depth 0 row pairing
+every accountant with itself. "All descendants of X" is then a primary key
+range scan and "is X an ancestor of Y" a single primary key lookup, at any
+depth.
+
+Rows are maintained from the same ORM flush that adds, deletes or moves an
+accountant, so assign_super_accountant, remove_super_accountant and
+update_accountant all keep it current. An accountant whose
+super_accountant_id names no accountant is treated as a root.
+
+Check and rebuild with: python -m app.maintenance hierarchy check|rebuild
+"""
+from sqlalchemy import and_, delete, event, exists, func, insert, inspect, literal, select, true
+from app import models
+
+# Guards rebuilds against a cycle already present in super_accountant_id
+MAX_DEPTH = 64
+
+def _closure():
+    return models.AccountantHierarchy.__table__
+
+def descendants_query(accountant_id: str):
+    """Select every accountant below ``accountant_id``, nearest first."""
+    closure = _closure()
+    return select(models.Accountant).join(
+        closure, closure.c.descendant_id == models.Accountant.id
+    ).where(
+        closure.c.ancestor_id == accountant_id, closure.c.depth > 0
+    ).order_by(closure.c.depth, models.Accountant.id)
+
+def is_ancestor_query(ancestor_id: str, descendant_id: str):
+    """Select whether ``ancestor_id`` is above ``descendant_id`` at any depth."""
+    closure = _closure()
+    return select(exists().where(
+        closure.c.ancestor_id == ancestor_id,
+        closure.c.descendant_id == descendant_id,
+        closure.c.depth > 0
+    ))
+
+def subtree_query(accountant_id: str):
+    """Select ``accountant_id`` and everyone below it, with their business counts."""
+    closure = _closure()
+    summary = models.AccountantPortfolioSummary
+    return select(
+        models.Accountant.id,
+        models.Accountant.first_name,
+        models.Accountant.last_name,
+        models.Accountant.super_accountant_id,
+        models.Accountant.is_super_accountant,
+        closure.c.depth,
+        func.coalesce(summary.business_count, 0).label("business_count"),
+    ).join(
+        closure, closure.c.descendant_id == models.Accountant.id
+    ).outerjoin(
+        summary, summary.accountant_id == models.Accountant.id
+    ).where(
+        closure.c.ancestor_id == accountant_id
+    ).order_by(closure.c.depth, models.Accountant.last_name, models.Accountant.first_name, models.Accountant.id)
+
+def build_subtree(rows) -> dict:
+    """Nest subtree_query rows under their super accountants and total each branch.
+
+    Every node carries its own ``business_count``, its direct
+    ``subordinate_count``, and ``descendant_count``/``team_business_count``
+    over the whole branch below it.
+    """
+    nodes = {}
+    root = None
+    for row in rows:
+        row = row._mapping
+        node = {
+            "id": row["id"],
+            "first_name": row["first_name"],
+            "last_name": row["last_name"],
+            "is_super_accountant": bool(row["is_super_accountant"]),
+            "depth": row["depth"],
+            "business_count": row["business_count"],
+            "subordinates": [],
+        }
+        nodes[node["id"]] = node
+        if row["depth"] == 0:
+            root = node
+        else:
+            # Rows come nearest first, so a node's super accountant is already placed
+            nodes[row["super_accountant_id"]]["subordinates"].append(node)
+
+    def total(node):
+        node["subordinate_count"] = len(node["subordinates"])
+        node["descendant_count"] = 0
+        node["team_business_count"] = node["business_count"]
+        for child in node["subordinates"]:
+            total(child)
+            node["descendant_count"] += 1 + child["descendant_count"]
+            node["team_business_count"] += child["team_business_count"]
+
+    if root is not None:
+        total(root)
+    return root
+
+def _insert_self(connection, accountant_ids):
+    if accountant_ids:
+        connection.execute(insert(_closure()), [
+            {"ancestor_id": accountant_id, "descendant_id": accountant_id, "depth": 0}
+            for accountant_id in accountant_ids
+        ])
+
+def _attach(connection, accountant_id: str, super_accountant_id: str):
+    """Link ``accountant_id``'s subtree below ``super_accountant_id`` and all its ancestors."""
+    closure = _closure()
+    subtree = closure.alias("subtree")
+    ancestors = closure.alias("ancestors")
+    cycle = connection.execute(select(exists().where(
+        closure.c.ancestor_id == accountant_id, closure.c.descendant_id == super_accountant_id
+    ))).scalar()
+    if cycle:
+        raise ValueError(f"Accountant {super_accountant_id} is already below accountant {accountant_id}")
+    connection.execute(insert(closure).from_select(
+        ("ancestor_id", "descendant_id", "depth"),
+        select(
+            ancestors.c.ancestor_id, subtree.c.descendant_id, ancestors.c.depth + subtree.c.depth + 1
+        ).select_from(ancestors.join(subtree, true())).where(
+            ancestors.c.descendant_id == super_accountant_id,
+            subtree.c.ancestor_id == accountant_id
+        )
+    ))
+
+def _detach(connection, accountant_id: str):
+    """Unlink ``accountant_id``'s subtree from everything above it."""
+    closure = _closure()
+    subtree = select(closure.c.descendant_id).where(closure.c.ancestor_id == accountant_id).scalar_subquery()
+    connection.execute(delete(closure).where(
+        closure.c.descendant_id.in_(subtree),
+        closure.c.ancestor_id.not_in(subtree)
+    ))
+
+def hierarchy_query():
+    """Compute the closure from super_accountant_id with a recursive CTE."""
+    accountant = models.Accountant.__table__
+    tree = select(
+        accountant.c.id.label("ancestor_id"),
+        accountant.c.id.label("descendant_id"),
+        literal(0).label("depth")
+    ).cte("tree", recursive=True)
+    child = accountant.alias("child")
+    tree = tree.union_all(
+        select(tree.c.ancestor_id, child.c.id, tree.c.depth + 1).where(
+            and_(child.c.super_accountant_id == tree.c.descendant_id, tree.c.depth < MAX_DEPTH)
+        )
+    )
+    return select(tree.c.ancestor_id, tree.c.descendant_id, tree.c.depth)
+
+def rebuild_accountant_hierarchy(connection) -> int:
+    """Recompute the closure table from scratch; returns how many rows were written."""
+    closure = _closure()
+    connection.execute(delete(closure))
+    result = connection.execute(
+        insert(closure).from_select(("ancestor_id", "descendant_id", "depth"), hierarchy_query())
+    )
+    return result.rowcount
+
+def check_accountant_hierarchy(connection) -> dict:
+    """Compare the closure table with one computed from super_accountant_id.
+
+    Returns the ``missing`` and ``extra`` (ancestor_id, descendant_id, depth)
+    rows; both are empty when the table is in step.
+    """
+    closure = _closure()
+    expected = {tuple(row) for row in connection.execute(hierarchy_query())}
+    stored = {
+        tuple(row)
+        for row in connection.execute(select(closure.c.ancestor_id, closure.c.descendant_id, closure.c.depth))
+    }
+    return {"missing": sorted(expected - stored), "extra": sorted(stored - expected)}
+
+def _moved(session) -> list:
+    moved = []
+    for obj in session.dirty:
+        if isinstance(obj, models.Accountant) and inspect(obj).attrs.super_accountant_id.history.has_changes():
+            moved.append(obj)
+    return moved
+
+def _before_flush(session, flush_context, instances):
+    removed = [obj.id for obj in session.deleted if isinstance(obj, models.Accountant)]
+    if not removed:
+        return
+    connection = session.connection()
+    closure = _closure()
+    # Subordinates of a removed accountant become roots of their own subtrees
+    for accountant_id in removed:
+        _detach(connection, accountant_id)
+    connection.execute(delete(closure).where(
+        closure.c.ancestor_id.in_(removed) | closure.c.descendant_id.in_(removed)
+    ))
+
+def _after_flush(session, flush_context):
+    added = [obj for obj in session.new if isinstance(obj, models.Accountant)]
+    moved = _moved(session)
+    if not (added or moved):
+        return
+    connection = session.connection()
+    _insert_self(connection, [accountant.id for accountant in added])
+    for accountant in added:
+        if accountant.super_accountant_id:
+            _attach(connection, accountant.id, accountant.super_accountant_id)
+    for accountant in moved:
+        _detach(connection, accountant.id)
+        if accountant.super_accountant_id:
+            _attach(connection, accountant.id, accountant.super_accountant_id)
+
+def track_accountant_hierarchy(session_class):
+    """Maintain the closure table on every flush of sessions of ``session_class``."""
+    event.listen(session_class, "before_flush", _before_flush)
+    event.listen(session_class, "after_flush", _after_flush)
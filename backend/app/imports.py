@@ -0,0 +1,250 @@
+"""Streaming bulk import of businesses and their metrics.
+
+The request body is read chunk by chunk and split into records on the event
+loop; parsing, validation and inserts happen a batch at a time in the
+threadpool. Each batch is inserted with one executemany per table and
+committed on its own, so memory stays flat however large the upload is and
+rows from earlier batches stay imported if a later one fails. Rows that
+fail validation are skipped and reported by number.
+"""
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app import models
+from app.config import IMPORT_BATCH_SIZE
+from app.schemas import BusinessImportRow
+from app.summaries import SUMMARY_COLUMNS, SUMMARY_FIELDS, add_to_accountant_summaries
+from app.versions import BUSINESSES, bump_session_versions
+from app.changes import BUSINESSES_TABLE, FINANCIAL_METRICS_TABLE, INSERT, METRICS_TABLE, log_changes, row_change
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Content types accepted for each format when no format is given explicitly
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+# Error details kept for the response; later failures are only counted
+MAX_REPORTED_ERRORS = 1000
+
+FINANCIAL_FIELDS = (
+    "revenue", "gross_profit", "net_profit", "total_costs",
+    "percentage_change_revenue", "percentage_change_gross_profit",
+    "percentage_change_net_profit", "percentage_change_total_costs",
+)
+WORKLOAD_FIELDS = ("documents_due", "outstanding_invoices", "pending_approvals", "accounting_year_end")
+_WORKLOAD_DEFAULTS = {"documents_due": 0, "outstanding_invoices": 0, "pending_approvals": 0, "accounting_year_end": "31/12/2024"}
+
+def import_format(content_type: Optional[str], requested: Optional[str] = None) -> str:
+    """Pick the import format from an explicit choice or the request's content type."""
+    if requested:
+        if requested not in IMPORT_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown format '{requested}'. Expected one of: {', '.join(IMPORT_FORMATS)}"
+            )
+        return requested
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if media_type not in _CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson"
+        )
+    return _CONTENT_TYPES[media_type]
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a UTF-8 byte stream into lines without holding more than one partial line."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+async def iter_records(lines: AsyncIterator[str], import_format: str) -> AsyncIterator[str]:
+    """Group lines into records, skipping blank lines.
+
+    A CSV record continues onto the next line while it has an unclosed
+    quote; quotes inside fields are doubled, so an odd count means open.
+    """
+    record, quotes = [], 0
+    async for line in lines:
+        if not record and not line.strip():
+            continue
+        if import_format == "ndjson":
+            yield line
+            continue
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield "\n".join(record)
+            record, quotes = [], 0
+    if record:
+        yield "\n".join(record)
+
+def parse_csv_record(record: str) -> list:
+    return next(csv.reader([record]))
+
+class BusinessImporter:
+    """Validate and insert batches of import records, accumulating the report."""
+
+    def __init__(self, db: Session, owner_id: str, import_format: str):
+        self.db = db
+        self.owner_id = owner_id
+        self.import_format = import_format
+        self.header: Optional[list] = None
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        # Accountant ids already looked up, and whether they exist
+        self._accountants = {}
+
+    def set_header(self, record: str):
+        self.header = [column.strip() for column in parse_csv_record(record)]
+
+    def _fail(self, row: int, errors: list):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    def _parse(self, record: str) -> dict:
+        if self.import_format == "ndjson":
+            value = json.loads(record)
+            if not isinstance(value, dict):
+                raise ValueError("Expected a JSON object")
+            return value
+        values = parse_csv_record(record)
+        if len(values) != len(self.header):
+            raise ValueError(f"Expected {len(self.header)} columns, got {len(values)}")
+        # Empty CSV cells mean "not given"
+        return {column: value for column, value in zip(self.header, values) if value != ""}
+
+    def _known_accountants(self, accountant_ids: set) -> set:
+        unknown = accountant_ids - self._accountants.keys()
+        if unknown:
+            found = set(self.db.execute(
+                select(models.Accountant.id).where(models.Accountant.id.in_(unknown))
+            ).scalars())
+            self._accountants.update({accountant_id: accountant_id in found for accountant_id in unknown})
+        return {accountant_id for accountant_id in accountant_ids if self._accountants[accountant_id]}
+
+    def import_batch(self, records: list):
+        """Validate ``records`` and insert the valid ones in a single transaction."""
+        valid = []
+        for record in records:
+            self.rows += 1
+            try:
+                row = BusinessImportRow(**self._parse(record))
+            except ValidationError as exc:
+                self._fail(self.rows, [
+                    {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+                    for error in exc.errors()
+                ])
+                continue
+            except (ValueError, csv.Error) as exc:
+                self._fail(self.rows, [{"field": None, "message": str(exc)}])
+                continue
+            valid.append((self.rows, row))
+
+        known = self._known_accountants({row.accountant_id for _, row in valid if row.accountant_id})
+        businesses, financial, workload = [], [], []
+        deltas = {}
+        for number, row in valid:
+            if row.accountant_id and row.accountant_id not in known:
+                self._fail(number, [{"field": "accountant_id", "message": "Accountant not found"}])
+                continue
+            business_id = models.generate_uuid()
+            businesses.append({
+                "id": business_id,
+                "name": row.name,
+                "description": row.description,
+                "owner_id": self.owner_id,
+                "accountant_id": row.accountant_id,
+                "is_active": row.is_active,
+            })
+            if row.accountant_id:
+                delta = deltas.setdefault(row.accountant_id, dict.fromkeys(SUMMARY_COLUMNS, 0))
+                delta["business_count"] += 1
+                for column in SUMMARY_FIELDS:
+                    delta[column] += getattr(row, column) or 0
+            values = row.dict(include=set(FINANCIAL_FIELDS))
+            if any(value is not None for value in values.values()):
+                financial.append({
+                    "id": models.generate_uuid(),
+                    "business_id": business_id,
+                    **{field: value or 0 for field, value in values.items()},
+                })
+            values = row.dict(include=set(WORKLOAD_FIELDS))
+            if any(value is not None for value in values.values()):
+                workload.append({
+                    "id": models.generate_uuid(),
+                    "business_id": business_id,
+                    **{field: _WORKLOAD_DEFAULTS[field] if value is None else value for field, value in values.items()},
+                })
+
+        if not businesses:
+            return
+        try:
+            self.db.execute(insert(models.Business), businesses)
+            if financial:
+                self.db.execute(insert(models.BusinessFinancialMetrics), financial)
+            if workload:
+                self.db.execute(insert(models.BusinessMetrics), workload)
+            # Core inserts bypass the flush hooks that maintain the summaries, versions and change log
+            add_to_accountant_summaries(self.db.connection(), deltas)
+            log_changes(self.db, [
+                row_change(table_name, INSERT, row["id"], row.get("business_id", row["id"]))
+                for table_name, rows in (
+                    (BUSINESSES_TABLE, businesses), (FINANCIAL_METRICS_TABLE, financial), (METRICS_TABLE, workload)
+                )
+                for row in rows
+            ])
+            bump_session_versions(self.db, BUSINESSES)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self.inserted += len(businesses)
+
+    def report(self) -> dict:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+async def run_import(importer: BusinessImporter, chunks: AsyncIterator[bytes], batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """Stream records from ``chunks`` into ``importer`` a batch at a time and return the report.
+
+    The next batch is only read once the previous one is committed, so a
+    slow database pushes back on the upload instead of buffering it.
+    """
+    batch = []
+    async for record in iter_records(iter_lines(chunks), importer.import_format):
+        if importer.import_format == "csv" and importer.header is None:
+            importer.set_header(record)
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            await run_in_threadpool(importer.import_batch, batch)
+            batch = []
+    if batch:
+        await run_in_threadpool(importer.import_batch, batch)
+    return importer.report()
@@ -2,17 +2,22 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.openapi.utils import get_openapi
-from app.routers import users, businesses, accountants, auth
+from anyio import to_thread
+from app.routers import users, businesses, accountants, auth, changes, diagnostics
 from app.database import engine
+from app.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
 from app.models import Base
+from app.migrations import run_migrations
+from app.hashing import hashing_pool
 from app.config import (
     API_TITLE, API_DESCRIPTION, API_VERSION, CORS_ORIGINS,
-    API_CONTACT, API_LICENSE
+    API_CONTACT, API_LICENSE, THREADPOOL_SIZE
 )
 from datetime import datetime
 
-# Create database tables
+# Create database tables and bring older schemas up to date
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 # Create FastAPI app with enhanced OpenAPI configuration
 app = FastAPI(
@@ -49,6 +54,14 @@ app = FastAPI(
             "name": "Businesses",
             "description": "Business management operations including creation, updates, and financial metrics tracking.",
         },
+        {
+            "name": "Changes",
+            "description": "Incremental feed of business, assignment and metrics changes for syncing clients.",
+        },
+        {
+            "name": "Diagnostics",
+            "description": "Operational diagnostics such as database connection pool and password hashing statistics. Root admin only.",
+        },
     ]
 )
 
@@ -59,13 +72,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, "ETag", "Last-Modified"],
 )
 
+# Route handlers are sync and run on the worker thread pool, size it from config
+@app.on_event("startup")
+async def configure_threadpool():
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+@app.on_event("shutdown")
+def shutdown_hashing_pool():
+    hashing_pool.shutdown()
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(accountants.router, prefix="/accountants", tags=["Accountants"])
 app.include_router(businesses.router, prefix="/businesses", tags=["Businesses"])
+app.include_router(changes.router, prefix="/changes", tags=["Changes"])
+app.include_router(diagnostics.router, prefix="/diagnostics", tags=["Diagnostics"])
 
 def custom_openapi():
     """Custom OpenAPI schema with enhanced documentation."""
@@ -126,7 +151,8 @@ async def root():
             "authentication": "/auth",
             "users": "/users",
             "accountants": "/accountants",
-            "businesses": "/businesses"
+            "businesses": "/businesses",
+            "diagnostics": "/diagnostics"
         }
     }
 
@@ -180,7 +206,8 @@ async def http_exception_handler(request, exc):
             "error_code": exc.status_code,
             "timestamp": datetime.now().isoformat(),
             "path": request.url.path
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,56 @@
+"""Check and rebuild the tables maintained from ORM flushes.
+
+Writes made with bulk SQL bypass the flush hooks that keep the accountant
+summaries (app.summaries) and the accountant hierarchy (app.hierarchy) in
+step. ``check`` lists what is out of step and exits 1 if anything is;
+``rebuild`` recomputes the table from its sources.
+
+Run with: python -m app.maintenance summaries|hierarchy check|rebuild
+"""
+import argparse
+import sys
+from app.database import engine
+from app.hierarchy import check_accountant_hierarchy, rebuild_accountant_hierarchy
+from app.summaries import check_accountant_summaries, rebuild_accountant_summaries
+
+def rebuild_summaries():
+    with engine.begin() as connection:
+        print(f"Rebuilt {rebuild_accountant_summaries(connection)} accountant summaries.")
+    return 0
+
+def check_summaries():
+    with engine.connect() as connection:
+        mismatches = check_accountant_summaries(connection)
+    for mismatch in mismatches:
+        print(f"{mismatch['accountant_id']}: stored {mismatch['stored']}, expected {mismatch['expected']}")
+    print(f"{len(mismatches)} accountant summaries out of step.")
+    return 1 if mismatches else 0
+
+def rebuild_hierarchy():
+    with engine.begin() as connection:
+        print(f"Rebuilt the accountant hierarchy with {rebuild_accountant_hierarchy(connection)} rows.")
+    return 0
+
+def check_hierarchy():
+    with engine.connect() as connection:
+        differences = check_accountant_hierarchy(connection)
+    for label in ("missing", "extra"):
+        for ancestor_id, descendant_id, depth in differences[label]:
+            print(f"{label}: {ancestor_id} -> {descendant_id} at depth {depth}")
+    out_of_step = len(differences["missing"]) + len(differences["extra"])
+    print(f"{out_of_step} accountant hierarchy rows out of step.")
+    return 1 if out_of_step else 0
+
+COMMANDS = {
+    ("summaries", "rebuild"): rebuild_summaries,
+    ("summaries", "check"): check_summaries,
+    ("hierarchy", "rebuild"): rebuild_hierarchy,
+    ("hierarchy", "check"): check_hierarchy,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and rebuild accountant summaries and the accountant hierarchy")
+    parser.add_argument("table", choices=("summaries", "hierarchy"))
+    parser.add_argument("command", choices=("rebuild", "check"))
+    args = parser.parse_args()
+    sys.exit(COMMANDS[(args.table, args.command)]())
@@ -0,0 +1,177 @@
+"""Schema migrations for existing databases.
+
+New databases get the full schema from Base.metadata.create_all. Databases
+created by an older release are brought up to date by the steps below, each
+applied once and recorded in the schema_migrations table. Steps must be
+idempotent, since create_all may already have created what they add.
+
+Run with: python -m app.migrations
+"""
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, text
+from sqlalchemy.sql import func
+from app.models import (
+    AccountantHierarchy, AccountantPortfolioSummary, Base, BusinessFinancialHistory, ChangeLogEntry, ResourceVersion
+)
+from app.hierarchy import rebuild_accountant_hierarchy
+from app.search import install_business_search
+from app.summaries import rebuild_accountant_summaries
+from app.versions import seed_versions
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", String, primary_key=True),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# Indexes on foreign keys and the lookup columns used by app.crud
+LOOKUP_INDEXES = (
+    "ix_accountants_user_id",
+    "ix_accountants_super_accountant_id",
+    "ix_businesses_owner_id",
+    "ix_businesses_accountant_id",
+    "ix_businesses_created_at_id",
+    "ix_business_accountant_accountant_id_business_id",
+    "ix_business_financial_metrics_business_id",
+    "ix_business_metrics_business_id",
+)
+
+# Indexes behind the user list's ordering, role filter and per-role counts
+USER_LISTING_INDEXES = (
+    "ix_users_created_at_id",
+    "ix_users_role",
+)
+
+def _model_index(name: str):
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(f"No index named '{name}' in the models")
+
+def add_user_token_version(connection):
+    """Add users.token_version, used to revoke issued access tokens."""
+    columns = {column["name"] for column in inspect(connection).get_columns("users")}
+    if "token_version" not in columns:
+        connection.execute(text("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+
+def _create_model_indexes(connection, names):
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    for name in names:
+        index = _model_index(name)
+        if index.table.name not in tables:
+            continue
+        # Tables predating a column can't be indexed on it
+        columns = {column["name"] for column in inspector.get_columns(index.table.name)}
+        if {column.name for column in index.columns} <= columns:
+            index.create(connection, checkfirst=True)
+
+def create_lookup_indexes(connection):
+    """Index foreign keys and lookup columns so crud queries stop scanning tables."""
+    _create_model_indexes(connection, LOOKUP_INDEXES)
+
+def create_user_listing_indexes(connection):
+    """Index users for keyset pagination by (created_at, id) and the role filter."""
+    _create_model_indexes(connection, USER_LISTING_INDEXES)
+
+def create_business_search(connection):
+    """Index business names for sorting and add the backend's full-text search index."""
+    tables = set(inspect(connection).get_table_names())
+    if "businesses" not in tables:
+        return
+    _model_index("ix_businesses_name_id").create(connection, checkfirst=True)
+    install_business_search(connection)
+
+def create_accountant_summaries(connection):
+    """Add the accountant portfolio summary table and fill it from existing rows."""
+    tables = set(inspect(connection).get_table_names())
+    if not {"accountants", "businesses", "business_accountant"} <= tables:
+        return
+    AccountantPortfolioSummary.__table__.create(connection, checkfirst=True)
+    rebuild_accountant_summaries(connection)
+
+def create_accountant_hierarchy(connection):
+    """Add the accountant hierarchy closure table and fill it from super_accountant_id."""
+    if "accountants" not in inspect(connection).get_table_names():
+        return
+    AccountantHierarchy.__table__.create(connection, checkfirst=True)
+    rebuild_accountant_hierarchy(connection)
+
+def create_resource_versions(connection):
+    """Add the per-collection change counters behind conditional GETs."""
+    ResourceVersion.__table__.create(connection, checkfirst=True)
+
+def create_change_log(connection):
+    """Add the append-only log behind the change feed; earlier writes are not in it."""
+    ChangeLogEntry.__table__.create(connection, checkfirst=True)
+
+def create_financial_history(connection):
+    """Add the monthly financial history table; existing metrics snapshots have no period to move into it."""
+    BusinessFinancialHistory.__table__.create(connection, checkfirst=True)
+
+def seed_resource_versions(connection):
+    """Add any missing resource_versions rows, so bumping a version never has to insert one."""
+    if "resource_versions" in inspect(connection).get_table_names():
+        seed_versions(connection)
+
+def create_change_log_business_index(connection):
+    """Index the change log by business, for the latest entry behind a business's ETag."""
+    if "change_log" in inspect(connection).get_table_names():
+        _model_index("ix_change_log_business_id_id").create(connection, checkfirst=True)
+
+def add_change_log_delete_audience(connection):
+    """Add change_log.owner_id and accountant_ids; business deletes logged earlier reach full-view roles only."""
+    if "change_log" not in inspect(connection).get_table_names():
+        return
+    columns = {column["name"] for column in inspect(connection).get_columns("change_log")}
+    if "owner_id" not in columns:
+        connection.execute(text("ALTER TABLE change_log ADD COLUMN owner_id VARCHAR"))
+    if "accountant_ids" not in columns:
+        connection.execute(text("ALTER TABLE change_log ADD COLUMN accountant_ids JSON"))
+
+# Ordered list of (version, step); append new steps, never reorder or rename
+MIGRATIONS = [
+    ("0001_user_token_version", add_user_token_version),
+    ("0002_lookup_indexes", create_lookup_indexes),
+    ("0003_business_search", create_business_search),
+    ("0004_user_listing_indexes", create_user_listing_indexes),
+    ("0005_accountant_summaries", create_accountant_summaries),
+    ("0006_accountant_hierarchy", create_accountant_hierarchy),
+    ("0007_resource_versions", create_resource_versions),
+    ("0008_change_log", create_change_log),
+    ("0009_financial_history", create_financial_history),
+    ("0010_seed_resource_versions", seed_resource_versions),
+    ("0011_change_log_business_index", create_change_log_business_index),
+    ("0012_change_log_delete_audience", add_change_log_delete_audience),
+]
+
+def applied_migrations(connection) -> set:
+    """Versions already recorded in schema_migrations."""
+    return {row.version for row in connection.execute(schema_migrations.select())}
+
+def run_migrations(db_engine) -> list:
+    """Apply pending migrations in order and return the versions applied."""
+    applied = []
+    with db_engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        done = applied_migrations(connection)
+        for version, step in MIGRATIONS:
+            if version in done:
+                continue
+            step(connection)
+            connection.execute(schema_migrations.insert().values(version=version))
+            applied.append(version)
+    return applied
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    Base.metadata.create_all(bind=engine)
+    versions = run_migrations(engine)
+    if versions:
+        print("Applied migrations: " + ", ".join(versions))
+    else:
+        print("Database schema is up to date.")
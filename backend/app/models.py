@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, JSON, Text, Table, Index, event
+from sqlalchemy.orm import Session, relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.search import install_business_search, drop_business_search
 import uuid
 
 def generate_uuid():
@@ -13,7 +14,9 @@ business_accountant = Table(
     Base.metadata,
     Column('business_id', String, ForeignKey('businesses.id'), primary_key=True),
     Column('accountant_id', String, ForeignKey('accountants.id'), primary_key=True),
-    Column('created_at', DateTime(timezone=True), server_default=func.now())
+    Column('created_at', DateTime(timezone=True), server_default=func.now()),
+    # The primary key covers business -> accountants, this covers accountant -> businesses
+    Index('ix_business_accountant_accountant_id_business_id', 'accountant_id', 'business_id')
 )
 
 class User(Base):
@@ -25,15 +28,24 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     role = Column(String, nullable=False, default="accountant")
     is_active = Column(Boolean, default=True)
+    # Bumped when role, status or email change, revoking previously issued tokens
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Supports keyset pagination ordered by (created_at, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Supports the role filter and per-role counts
+        Index("ix_users_role", "role"),
+    )
+
 class Accountant(Base):
     __tablename__ = "accountants"
     
     id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    super_accountant_id = Column(String, ForeignKey("accountants.id"), nullable=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    super_accountant_id = Column(String, ForeignKey("accountants.id"), nullable=True, index=True)
     is_super_accountant = Column(Boolean, default=False)
     first_name = Column(String, nullable=True)
     last_name = Column(String, nullable=True)
@@ -51,9 +63,9 @@ class Business(Base):
     id = Column(String, primary_key=True, default=generate_uuid)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    owner_id = Column(String, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     # Keep the primary accountant for backward compatibility
-    accountant_id = Column(String, ForeignKey("accountants.id"), nullable=True)
+    accountant_id = Column(String, ForeignKey("accountants.id"), nullable=True, index=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -64,11 +76,27 @@ class Business(Base):
     # Multiple accountants through junction table
     accountants = relationship("Accountant", secondary=business_accountant, back_populates="businesses")
 
+    __table_args__ = (
+        # Supports keyset pagination ordered by (created_at, id)
+        Index("ix_businesses_created_at_id", "created_at", "id"),
+        # Supports sort=name
+        Index("ix_businesses_name_id", "name", "id"),
+    )
+
+# The search index is backend specific DDL, kept in step with the businesses table
+@event.listens_for(Business.__table__, "after_create")
+def _create_business_search(target, connection, **kw):
+    install_business_search(connection)
+
+@event.listens_for(Business.__table__, "after_drop")
+def _drop_business_search(target, connection, **kw):
+    drop_business_search(connection)
+
 class BusinessFinancialMetrics(Base):
     __tablename__ = "business_financial_metrics"
     
     id = Column(String, primary_key=True, default=generate_uuid)
-    business_id = Column(String, ForeignKey("businesses.id"), nullable=False)
+    business_id = Column(String, ForeignKey("businesses.id"), nullable=False, index=True)
     revenue = Column(Integer, default=0)
     gross_profit = Column(Integer, default=0)
     net_profit = Column(Integer, default=0)
@@ -86,7 +114,7 @@ class BusinessMetrics(Base):
     __tablename__ = "business_metrics"
     
     id = Column(String, primary_key=True, default=generate_uuid)
-    business_id = Column(String, ForeignKey("businesses.id"), nullable=False)
+    business_id = Column(String, ForeignKey("businesses.id"), nullable=False, index=True)
     documents_due = Column(Integer, default=0)
     outstanding_invoices = Column(Integer, default=0)
     pending_approvals = Column(Integer, default=0)
@@ -94,4 +122,92 @@ class BusinessMetrics(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    business = relationship("Business", backref="metrics")
\ No newline at end of file
+    business = relationship("Business", backref="metrics")
+
+class BusinessFinancialHistory(Base):
+    """Append-only monthly financial figures per business, queried by app.timeseries."""
+    __tablename__ = "business_financial_history"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    business_id = Column(String, ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False)
+    # First day of the month the figures cover
+    period = Column(Date, nullable=False)
+    revenue = Column(Integer, nullable=False, default=0)
+    gross_profit = Column(Integer, nullable=False, default=0)
+    net_profit = Column(Integer, nullable=False, default=0)
+    total_costs = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # One row per business and month; serves range queries over a business's periods
+        Index("ix_business_financial_history_business_id_period", "business_id", "period", unique=True),
+    )
+
+class AccountantPortfolioSummary(Base):
+    """Per-accountant totals over the businesses they manage, maintained by app.summaries."""
+    __tablename__ = "accountant_portfolio_summaries"
+
+    accountant_id = Column(String, ForeignKey("accountants.id"), primary_key=True)
+    business_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Integer, nullable=False, default=0)
+    documents_due = Column(Integer, nullable=False, default=0)
+    pending_approvals = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime(timezone=True), default=func.now())
+
+class AccountantHierarchy(Base):
+    """Closure table over super_accountant_id, maintained by app.hierarchy."""
+    __tablename__ = "accountant_hierarchy"
+
+    ancestor_id = Column(String, ForeignKey("accountants.id"), primary_key=True)
+    descendant_id = Column(String, ForeignKey("accountants.id"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # The primary key answers "below X", this answers "above Y"
+        Index("ix_accountant_hierarchy_descendant_id_ancestor_id", "descendant_id", "ancestor_id"),
+    )
+
+class ResourceVersion(Base):
+    """Change counter per resource collection, maintained by app.versions."""
+    __tablename__ = "resource_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+class ChangeLogEntry(Base):
+    """Append-only record of writes to businesses, their assignments and metrics, maintained by app.changes."""
+    __tablename__ = "change_log"
+    __table_args__ = (
+        # Supports finding a business's latest entry for its conditional GET
+        Index("ix_change_log_business_id_id", "business_id", "id"),
+        # AUTOINCREMENT keeps SQLite from reusing ids, which serve as the feed cursor
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String, nullable=False)
+    operation = Column(String, nullable=False)
+    # The changed row; assignments are identified by business_id and accountant_id instead
+    row_id = Column(String, nullable=True)
+    business_id = Column(String, nullable=False)
+    accountant_id = Column(String, nullable=True)
+    # Business deletes only: who could see the business, as it is gone once the entry is read
+    owner_id = Column(String, nullable=True)
+    accountant_ids = Column(JSON, nullable=True)
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+# Summaries, the hierarchy, resource versions and the change log are maintained in the flush that
+# changes their sources; cached responses are dropped and change listeners notified when it commits
+from app.summaries import track_accountant_summaries  # noqa: E402
+from app.hierarchy import track_accountant_hierarchy  # noqa: E402
+from app.versions import track_resource_versions  # noqa: E402
+from app.response_cache import track_response_cache  # noqa: E402
+from app.changes import track_changes  # noqa: E402
+from app.events import track_change_events  # noqa: E402
+track_accountant_summaries(Session)
+track_accountant_hierarchy(Session)
+track_resource_versions(Session)
+track_response_cache(Session)
+track_changes(Session)
+track_change_events(Session)
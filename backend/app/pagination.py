@@ -0,0 +1,29 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+
+# Response header carrying the cursor for the next page in keyset mode
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Response header carrying the exact number of rows across all pages
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+def encode_cursor(created_at: Optional[datetime], row_id: str) -> str:
+    """Encode a (created_at, id) sort key as an opaque URL-safe cursor."""
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    """Decode a cursor produced by encode_cursor back into its sort key."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(row_id, str):
+            raise ValueError("cursor id must be a string")
+        return (datetime.fromisoformat(created_at) if created_at else None), row_id
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
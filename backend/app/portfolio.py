@@ -0,0 +1,124 @@
+"""Portfolio-level figures over businesses and their latest metrics.
+
+Everything here is computed in SQL, in a single statement, so totals over
+tens of thousands of businesses never hydrate ORM objects.
+"""
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import and_, case, exists, func, null, or_, select
+from sqlalchemy.orm import aliased
+from app import models
+
+# Ways a portfolio can be broken down; "none" returns a single total
+AGGREGATE_GROUPS = ("none", "accountant", "super_accountant", "status")
+
+# Financial figures summarised with a sum and average
+FINANCIAL_FIELDS = ("revenue", "gross_profit", "net_profit", "total_costs")
+# Workload figures summarised with a sum
+WORKLOAD_FIELDS = ("documents_due", "outstanding_invoices", "pending_approvals")
+# Figures that report nearest-rank percentiles when asked for, and which
+PERCENTILE_FIELDS = ("revenue", "net_profit")
+PERCENTILES = (50, 90)
+
+def _is_latest(model, row):
+    """Match ``row`` only if no later row of ``model`` exists for the same business."""
+    newer = aliased(model)
+    return ~exists().where(
+        newer.business_id == row.business_id,
+        or_(
+            newer.created_at > row.created_at,
+            and_(newer.created_at == row.created_at, newer.id > row.id)
+        )
+    )
+
+def business_aggregates_query(group_by: str = "none", criteria: Optional[list] = None, percentiles: bool = False):
+    """Build the aggregate statement over businesses matching ``criteria``.
+
+    Only each business's latest metrics rows count, and businesses without
+    metrics count as zeros. Grouping by accountant uses the primary
+    accountant, so each business lands in exactly one group. Percentiles
+    need a sort per figure, so they are only computed when asked for.
+    """
+    if group_by not in AGGREGATE_GROUPS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown group_by '{group_by}'. Expected one of: {', '.join(AGGREGATE_GROUPS)}"
+        )
+
+    financial = aliased(models.BusinessFinancialMetrics)
+    workload = aliased(models.BusinessMetrics)
+    key = {
+        "none": null(),
+        "accountant": models.Business.accountant_id,
+        "super_accountant": models.Accountant.super_accountant_id,
+        "status": models.Business.is_active,
+    }[group_by]
+    partition = None if group_by == "none" else key
+
+    values = [func.coalesce(getattr(financial, field), 0).label(field) for field in FINANCIAL_FIELDS]
+    values += [func.coalesce(getattr(workload, field), 0).label(field) for field in WORKLOAD_FIELDS]
+    if percentiles:
+        # Rank within the group per figure, for percentiles without percentile_cont
+        values += [
+            func.row_number().over(
+                partition_by=partition, order_by=func.coalesce(getattr(financial, field), 0)
+            ).label(f"{field}_rank")
+            for field in PERCENTILE_FIELDS
+        ]
+        values.append(func.count().over(partition_by=partition).label("group_size"))
+
+    rows = select(key.label("group_key"), *values).select_from(models.Business).outerjoin(
+        financial,
+        and_(financial.business_id == models.Business.id, _is_latest(models.BusinessFinancialMetrics, financial))
+    ).outerjoin(
+        workload,
+        and_(workload.business_id == models.Business.id, _is_latest(models.BusinessMetrics, workload))
+    )
+    if group_by == "super_accountant":
+        rows = rows.outerjoin(models.Accountant, models.Accountant.id == models.Business.accountant_id)
+    rows = rows.where(*(criteria or [])).subquery()
+
+    # A single total has no group to select the key from
+    group_key = null().label("group_key") if group_by == "none" else rows.c.group_key
+    columns = [group_key, func.count().label("business_count")]
+    for field in FINANCIAL_FIELDS:
+        columns += [func.sum(rows.c[field]).label(f"{field}_sum"), func.avg(rows.c[field]).label(f"{field}_avg")]
+    columns += [func.sum(rows.c[field]).label(f"{field}_sum") for field in WORKLOAD_FIELDS]
+    if percentiles:
+        for field in PERCENTILE_FIELDS:
+            value, rank = rows.c[field], rows.c[f"{field}_rank"]
+            # The value is non-decreasing in rank, so the smallest value at or
+            # past rank ceil(p% of n) is the nearest-rank percentile
+            columns += [
+                func.min(case((rank * 100 >= pct * rows.c.group_size, value))).label(f"{field}_p{pct}")
+                for pct in PERCENTILES
+            ]
+
+    query = select(*columns)
+    if group_by != "none":
+        query = query.group_by(rows.c.group_key).order_by(rows.c.group_key)
+    return query
+
+def _number(value):
+    return int(value) if value is not None else 0
+
+def format_aggregates(group_by: str, result_rows, percentiles: bool = False) -> dict:
+    """Shape aggregate rows into the response body."""
+    groups = []
+    for row in result_rows:
+        row = row._mapping
+        key = row["group_key"]
+        if group_by == "status" and key is not None:
+            key = bool(key)
+        group = {"key": key, "business_count": row["business_count"]}
+        for field in FINANCIAL_FIELDS:
+            group[field] = {
+                "sum": _number(row[f"{field}_sum"]),
+                "avg": round(float(row[f"{field}_avg"] or 0), 2),
+            }
+            if percentiles and field in PERCENTILE_FIELDS:
+                group[field].update({f"p{pct}": _number(row[f"{field}_p{pct}"]) for pct in PERCENTILES})
+        for field in WORKLOAD_FIELDS:
+            group[field] = _number(row[f"{field}_sum"])
+        groups.append(group)
+    return {"group_by": group_by, "groups": groups}
@@ -0,0 +1,87 @@
+"""Cache of rendered list responses, dropped when their collection is written.
+
+Entries are keyed by collection, collection version, path, the caller's
+scope and the query parameters. The version is the one conditional_get read
+for the request (see app.conditional), so a cached body always matches the
+ETag sent with it, and an entry written before a change is never served
+after it, even by workers whose cache the writer cannot reach.
+
+When a session commits a transaction that wrote a collection, the local
+entries for that collection are deleted straight away rather than left to
+expire, and counted as invalidated. Entries of other collections stay
+cached.
+"""
+import threading
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import event
+from app.cache import create_cache
+from app.config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+from app.versions import WRITTEN_RESOURCES
+
+# Headers that describe the request rather than the cached body
+_UNCACHED_HEADERS = {"content-length", "etag", "last-modified", "cache-control"}
+
+class ResponseCache:
+    """Rendered response bodies and headers in a cache from app.cache, with hit counters."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def key(self, request: Request, resource: str, scope: str) -> str:
+        """Key of the response to ``request`` for callers in ``scope``; call after conditional_get."""
+        params = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+        return f"{resource}:{request.state.resource_version}:{request.url.path}:{scope}:{params}"
+
+    def get(self, key: str, response: Response) -> Optional[Response]:
+        """The cached response for ``key`` with the headers set on ``response``, or None."""
+        entry = self.store.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return Response(entry["body"], media_type=entry["media_type"], headers={**entry["headers"], **response.headers})
+
+    def put(self, key: str, response: Response) -> Response:
+        """Cache a rendered 200 response under ``key`` and return it."""
+        if response.status_code == 200:
+            headers = {name: value for name, value in response.headers.items() if name not in _UNCACHED_HEADERS}
+            self.store.set(key, {"body": response.body.decode(), "media_type": response.media_type, "headers": headers})
+        return response
+
+    def invalidate(self, *resources: str) -> int:
+        """Drop the entries of ``resources`` and return how many there were."""
+        dropped = sum(self.store.delete_prefix(f"{resource}:") for resource in resources)
+        with self._lock:
+            self.invalidated += dropped
+        return dropped
+
+    def status(self) -> dict:
+        """Hit, miss and eviction counts for diagnostics."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            # Only the in-process store drops entries to make room; a shared store does its own eviction
+            "evicted": getattr(self.store, "evictions", None),
+        }
+
+response_cache = ResponseCache(create_cache("responses", maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL))
+
+def _after_commit(session):
+    written = session.info.pop(WRITTEN_RESOURCES, None)
+    if written:
+        response_cache.invalidate(*written)
+
+def _after_rollback(session):
+    session.info.pop(WRITTEN_RESOURCES, None)
+
+def track_response_cache(session_class):
+    """Invalidate cached responses when sessions of ``session_class`` commit writes to their collections."""
+    event.listen(session_class, "after_commit", _after_commit)
+    event.listen(session_class, "after_rollback", _after_rollback)
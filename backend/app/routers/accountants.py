@@ -1,19 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.auth import get_current_user, require_super_accountant_or_root
-from app import crud, schemas
+from app.database import get_async_db, get_db
+from app.auth import get_current_claims, require_super_accountant_or_root
+from app import crud, crud_async, schemas
 from app.models import User, Accountant
+from app.serializers import orm_response
+from app.conditional import conditional_get, conditional_get_row
+from app.response_cache import response_cache
+from app.versions import ACCOUNTANTS, accountant_stamp_query
 
 router = APIRouter()
 
-@router.get("/")
-async def get_accountants(
+def _manages(db: Session, current_user, accountant_id: str) -> bool:
+    """Whether the current user's accountant profile is above ``accountant_id`` at any depth."""
+    own = crud.get_accountant_by_user_id(db, current_user.id)
+    return own is not None and crud.is_accountant_ancestor(db, own.id, accountant_id)
+
+@router.get("/", response_model=List[schemas.Accountant])
+def get_accountants(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
+    not_modified = conditional_get(db, ACCOUNTANTS, request, response, current_user.id)
+    if not_modified:
+        return not_modified
+    # Root admins all see the same page; everyone else sees their own part of the hierarchy
+    cache_key = response_cache.key(request, ACCOUNTANTS, "all" if current_user.role == "root_admin" else current_user.id)
+    cached = response_cache.get(cache_key, response)
+    if cached:
+        return cached
     if current_user.role == "root_admin":
         accountants = crud.get_accountants(db, skip=skip, limit=limit)
     elif current_user.role == "super_accountant":
@@ -21,8 +42,8 @@ async def get_accountants(
         # They can see accountants they manage plus independent accountants
         accountant = crud.get_accountant_by_user_id(db, current_user.id)
         if accountant:
-            # Get accountants they manage
-            managed_accountants = crud.get_accountants_by_super(db, accountant.id, skip=skip, limit=limit)
+            # Get accountants they manage, at any depth
+            managed_accountants = crud.get_accountant_descendants(db, accountant.id, skip=skip, limit=limit)
             # Get independent accountants (not assigned to any super accountant)
             independent_accountants = crud.get_independent_accountants(db, skip=skip, limit=limit)
             # Combine both lists, avoiding duplicates
@@ -42,35 +63,76 @@ async def get_accountants(
         accountant = crud.get_accountant_by_user_id(db, current_user.id)
         accountants = [accountant] if accountant else []
     
-    return accountants
+    return response_cache.put(cache_key, orm_response(schemas.Accountant, accountants, response))
+
+@router.get("/summaries")
+async def get_accountant_summaries(
+    super_accountant_id: Optional[str] = None,
+    current_user: User = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get business counts and latest metric totals per accountant.
 
-@router.get("/{accountant_id}")
-async def get_accountant(
+    Root admins see every accountant, or those under ``super_accountant_id``;
+    super accountants see their subordinates and accountants only themselves.
+    """
+    if current_user.role == "root_admin":
+        return await crud_async.get_accountant_summaries(db, super_accountant_id=super_accountant_id)
+
+    accountant = await crud_async.get_accountant_by_user_id(db, current_user.id)
+    if not accountant:
+        return []
+    if current_user.role == "super_accountant":
+        return await crud_async.get_accountant_summaries(db, super_accountant_id=accountant.id)
+    return await crud_async.get_accountant_summaries(db, accountant_id=accountant.id)
+
+@router.get("/{accountant_id}", response_model=schemas.Accountant)
+def get_accountant(
     accountant_id: str,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
     accountant = crud.get_accountant(db, accountant_id)
     if not accountant:
         raise HTTPException(status_code=404, detail="Accountant not found")
     
-    # Check permissions
+    # Check permissions before a 304 can confirm what the caller may not see
     if current_user.role == "accountant" and accountant.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    return accountant
+    not_modified = conditional_get_row(db, accountant_stamp_query(accountant_id), request, response, current_user.id)
+    if not_modified:
+        return not_modified
+    return orm_response(schemas.Accountant, accountant, response)
 
-@router.post("/")
-async def create_accountant(
+@router.get("/{accountant_id}/subtree")
+async def get_accountant_subtree(
+    accountant_id: str,
+    current_user: User = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get an accountant and all accountants below them, with business and team counts."""
+    if current_user.role != "root_admin":
+        own = await crud_async.get_accountant_by_user_id(db, current_user.id)
+        if own is None or (
+            own.id != accountant_id and not await crud_async.is_accountant_ancestor(db, own.id, accountant_id)
+        ):
+            raise HTTPException(status_code=403, detail="Access denied")
+    return await crud_async.get_accountant_subtree(db, accountant_id)
+
+@router.post("/", response_model=schemas.Accountant)
+def create_accountant(
     accountant_data: schemas.AccountantCreate,
     current_user: User = Depends(require_super_accountant_or_root()),
     db: Session = Depends(get_db)
 ):
     accountant = crud.create_accountant(db, accountant_data.dict())
-    return accountant
+    return orm_response(schemas.Accountant, accountant)
 
-@router.put("/{accountant_id}")
-async def update_accountant(
+@router.put("/{accountant_id}", response_model=schemas.Accountant)
+def update_accountant(
     accountant_id: str,
     accountant_data: schemas.AccountantCreate,
     current_user: User = Depends(require_super_accountant_or_root()),
@@ -81,19 +143,18 @@ async def update_accountant(
         raise HTTPException(status_code=404, detail="Accountant not found")
     
     # Check permissions
-    if current_user.role == "super_accountant":
-        if accountant.super_accountant_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Access denied")
+    if current_user.role == "super_accountant" and not _manages(db, current_user, accountant.id):
+        raise HTTPException(status_code=403, detail="Access denied")
     
     updated_accountant = crud.update_accountant(db, accountant_id, accountant_data.dict())
     
     if not updated_accountant:
         raise HTTPException(status_code=500, detail="Failed to update accountant")
     
-    return updated_accountant
+    return orm_response(schemas.Accountant, updated_accountant)
 
 @router.delete("/{accountant_id}")
-async def delete_accountant(
+def delete_accountant(
     accountant_id: str,
     current_user: User = Depends(require_super_accountant_or_root()),
     db: Session = Depends(get_db)
@@ -103,9 +164,8 @@ async def delete_accountant(
         raise HTTPException(status_code=404, detail="Accountant not found")
     
     # Check permissions
-    if current_user.role == "super_accountant":
-        if accountant.super_accountant_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Access denied")
+    if current_user.role == "super_accountant" and not _manages(db, current_user, accountant.id):
+        raise HTTPException(status_code=403, detail="Access denied")
     
     success = crud.delete_accountant(db, accountant_id)
     if not success:
@@ -114,10 +174,10 @@ async def delete_accountant(
     return {"message": "Accountant deleted successfully"}
 
 @router.post("/{accountant_id}/assign-super")
-async def assign_super_accountant(
+def assign_super_accountant(
     accountant_id: str,
     request: dict,
-    current_user: User = Depends(require_super_accountant_or_root),
+    current_user: User = Depends(require_super_accountant_or_root()),
     db: Session = Depends(get_db)
 ):
     accountant = crud.get_accountant(db, accountant_id)
@@ -138,9 +198,9 @@ async def assign_super_accountant(
     return {"message": "Super accountant assigned successfully"}
 
 @router.post("/{accountant_id}/remove-super")
-async def remove_super_accountant(
+def remove_super_accountant(
     accountant_id: str,
-    current_user: User = Depends(require_super_accountant_or_root),
+    current_user: User = Depends(require_super_accountant_or_root()),
     db: Session = Depends(get_db)
 ):
     accountant = crud.get_accountant(db, accountant_id)
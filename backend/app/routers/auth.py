@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.auth import authenticate_user, create_access_token
+from app.auth import authenticate_user, create_user_access_token
 from app.schemas import Token, LoginRequest
 
 router = APIRouter()
@@ -60,7 +61,7 @@ router = APIRouter()
     },
     tags=["Authentication"]
 )
-async def login_for_access_token(
+def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -90,7 +91,7 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_user_access_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login-json",
@@ -193,7 +194,8 @@ async def login_with_json(
                 detail="Email and password are required"
             )
         
-        user = authenticate_user(db, email, password, use_email=True)
+        # bcrypt verification and the user lookup block, keep them off the event loop
+        user = await run_in_threadpool(authenticate_user, db, email, password, use_email=True)
         
         if not user:
             raise HTTPException(
@@ -202,7 +204,7 @@ async def login_with_json(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        access_token = create_access_token(data={"sub": user.email})
+        access_token = create_user_access_token(user)
         return {"access_token": access_token, "token_type": "bearer"}
         
     except HTTPException:
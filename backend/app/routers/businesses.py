@@ -1,54 +1,175 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.auth import get_current_user, require_super_accountant_or_root
-from app import crud, schemas
+from app.database import get_async_db, get_db
+from app.auth import get_current_claims, require_super_accountant_or_root
+from app import crud, crud_async, schemas
 from app.models import User, Business
+from app.exports import EXPORT_MEDIA_TYPES
+from app.imports import BusinessImporter, import_format, run_import
+from app.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, encode_cursor
+from app.serializers import orm_response
+from app.conditional import conditional_get, conditional_get_row
+from app.response_cache import response_cache
+from app.versions import BUSINESSES, business_stamp_query
 
 router = APIRouter()
 
-@router.get("/")
-async def get_businesses(
+@router.get("/", response_model=List[schemas.Business])
+def get_businesses(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_user),
+    after: Optional[str] = None,
+    view: str = "full",
+    q: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    accountant_id: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    sort: str = "created_at",
+    current_user: User = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    if current_user.role == "root_admin":
-        businesses = crud.get_businesses(db, skip=skip, limit=limit)
-    elif current_user.role == "super_accountant":
-        businesses = crud.get_businesses(db, skip=skip, limit=limit)
-    else:
-        businesses = crud.get_user_businesses(db, current_user.id)
+    not_modified = conditional_get(db, BUSINESSES, request, response, current_user.id)
+    if not_modified:
+        return not_modified
+    # Accountants only ever see the businesses they own
+    scope = "all"
+    if current_user.role not in ["root_admin", "super_accountant"]:
+        owner_id = scope = current_user.id
+    cache_key = response_cache.key(request, BUSINESSES, scope)
+    cached = response_cache.get(cache_key, response)
+    if cached:
+        return cached
+    filters = {"q": q, "is_active": is_active, "accountant_id": accountant_id, "owner_id": owner_id}
+    
+    businesses = crud.get_businesses(db, skip=skip, limit=limit, after=after, view=view, sort=sort, **filters)
+    response.headers[TOTAL_COUNT_HEADER] = str(crud.count_businesses(db, **filters))
+    # A full page may have more rows behind it; hand out the keyset cursor
+    if sort == "created_at" and businesses and len(businesses) == limit:
+        last = businesses[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
     
-    return businesses
+    return response_cache.put(cache_key, orm_response(schemas.Business, businesses, response))
+
+@router.get("/aggregates")
+async def get_business_aggregates(
+    group_by: str = "none",
+    percentiles: bool = False,
+    q: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    accountant_id: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    current_user: User = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get portfolio totals, averages and percentiles, optionally grouped."""
+    # Same scope as the business list
+    if current_user.role not in ["root_admin", "super_accountant"]:
+        owner_id = current_user.id
+    return await crud_async.business_aggregates(
+        db, group_by=group_by, percentiles=percentiles, q=q, is_active=is_active, accountant_id=accountant_id, owner_id=owner_id
+    )
 
-@router.get("/{business_id}")
-async def get_business(
+@router.get("/metrics/history", response_model=schemas.FinancialHistory)
+async def get_portfolio_financial_history(
+    interval: str = "month",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    q: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    accountant_id: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    current_user: User = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get financial figures summed over the portfolio per month, quarter or year."""
+    # Same scope as the business list
+    if current_user.role not in ["root_admin", "super_accountant"]:
+        owner_id = current_user.id
+    return await crud_async.get_financial_history(
+        db, interval=interval, start=start, end=end, q=q, is_active=is_active, accountant_id=accountant_id, owner_id=owner_id
+    )
+
+@router.get("/export")
+def export_businesses(
+    format: str = "ndjson",
+    q: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    accountant_id: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    current_user: User = Depends(get_current_claims),
+    db: Session = Depends(get_db)
+):
+    """Stream every matching business with its latest metrics as NDJSON or CSV."""
+    # Same scope as the business list
+    if current_user.role not in ["root_admin", "super_accountant"]:
+        owner_id = current_user.id
+    chunks = crud.export_businesses(
+        db, export_format=format, q=q, is_active=is_active, accountant_id=accountant_id, owner_id=owner_id
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="businesses.{format}"'}
+    )
+
+def _check_business_access(db: Session, business: Business, current_user: User):
+    # Accountants can reach businesses they own OR businesses they're assigned to manage
+    if current_user.role == "accountant":
+        if business.owner_id != current_user.id and not crud.is_business_assigned_to_user(db, business.id, current_user.id):
+            raise HTTPException(status_code=403, detail="Access denied")
+
+@router.get("/{business_id}", response_model=schemas.Business)
+def get_business(
     business_id: str,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
+    # Check permissions before a 304 can confirm what the caller may not see
+    _check_business_access(db, crud.get_business_row(db, business_id), current_user)
+    not_modified = conditional_get_row(db, business_stamp_query(business_id), request, response, current_user.id)
+    if not_modified:
+        return not_modified
     business = crud.get_business(db, business_id)
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
-    
-    # Check permissions
-    if current_user.role == "accountant":
-        # Accountants can view businesses they own OR businesses they're assigned to manage
-        if business.owner_id != current_user.id:
-            # Check if they're assigned to manage this business
-            from app.models import Accountant
-            accountant = db.query(Accountant).filter(Accountant.user_id == current_user.id).first()
-            if not accountant or accountant not in business.accountants:
-                raise HTTPException(status_code=403, detail="Access denied")
-    
-    return business
+    return orm_response(schemas.Business, business, response)
 
-@router.post("/")
-async def create_business(
+@router.get("/{business_id}/metrics/history", response_model=schemas.FinancialHistory)
+async def get_business_financial_history(
+    business_id: str,
+    interval: str = "month",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: User = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a business's financial figures per month, quarter or year, with changes from the period before."""
+    business = await crud_async.get_business_row(db, business_id)
+    await db.run_sync(_check_business_access, business, current_user)
+    return await crud_async.get_financial_history(db, interval=interval, start=start, end=end, business_id=business_id)
+
+@router.post("/{business_id}/metrics/history", response_model=schemas.BusinessFinancialHistory)
+def record_business_financial_history(
+    business_id: str,
+    history_data: schemas.BusinessFinancialHistoryCreate,
+    current_user: User = Depends(get_current_claims),
+    db: Session = Depends(get_db)
+):
+    """Record a business's financial figures for a month."""
+    _check_business_access(db, crud.get_business_row(db, business_id), current_user)
+    history = crud.record_financial_history(db, business_id, history_data.dict())
+    return orm_response(schemas.BusinessFinancialHistory, history)
+
+@router.post("/", response_model=schemas.Business)
+def create_business(
     business_data: schemas.BusinessCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
     if current_user.role not in ["root_admin", "super_accountant"]:
@@ -58,28 +179,35 @@ async def create_business(
     business_data_dict["owner_id"] = current_user.id
     
     business = crud.create_business(db, business_data_dict)
-    return business
+    return orm_response(schemas.Business, business)
+
+@router.post("/bulk")
+async def import_businesses(
+    request: Request,
+    format: Optional[str] = None,
+    current_user: User = Depends(get_current_claims),
+    db: Session = Depends(get_db)
+):
+    """Import businesses and their metrics from a streamed CSV or NDJSON body.
 
-@router.put("/{business_id}")
-async def update_business(
+    The format comes from ``format`` or the Content-Type header. Valid rows
+    are inserted in batches owned by the caller; invalid rows are skipped
+    and listed in the report.
+    """
+    if current_user.role not in ["root_admin", "super_accountant"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+    importer = BusinessImporter(db, current_user.id, import_format(request.headers.get("content-type"), format))
+    return await run_import(importer, request.stream())
+
+@router.put("/{business_id}", response_model=schemas.Business)
+def update_business(
     business_id: str,
     business_data: schemas.BusinessCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    business = crud.get_business(db, business_id)
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
-    
-    # Check permissions
-    if current_user.role == "accountant":
-        # Accountants can update businesses they own OR businesses they're assigned to manage
-        if business.owner_id != current_user.id:
-            # Check if they're assigned to manage this business
-            from app.models import Accountant
-            accountant = db.query(Accountant).filter(Accountant.user_id == current_user.id).first()
-            if not accountant or accountant not in business.accountants:
-                raise HTTPException(status_code=403, detail="Access denied")
+    # Only the row is needed here; crud.update_business reuses it from the session
+    _check_business_access(db, crud.get_business_row(db, business_id), current_user)
     
     business_data_dict = business_data.dict()
     updated_business = crud.update_business(db, business_id, business_data_dict)
@@ -87,18 +215,14 @@ async def update_business(
     if not updated_business:
         raise HTTPException(status_code=500, detail="Failed to update business")
     
-    return updated_business
+    return orm_response(schemas.Business, updated_business)
 
 @router.delete("/{business_id}")
-async def delete_business(
+def delete_business(
     business_id: str,
     current_user: User = Depends(require_super_accountant_or_root()),
     db: Session = Depends(get_db)
 ):
-    business = crud.get_business(db, business_id)
-    if not business:
-        raise HTTPException(status_code=404, detail="Business not found")
-    
     success = crud.delete_business(db, business_id)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to delete business")
@@ -106,21 +230,30 @@ async def delete_business(
     return {"message": "Business deleted successfully"}
 
 @router.post("/{business_id}/assign-accountant")
-async def assign_accountant_to_business(
+def assign_accountant_to_business(
     business_id: str,
     request: schemas.AssignAccountantRequest,
-    current_user: User = Depends(require_super_accountant_or_root),
+    current_user: User = Depends(require_super_accountant_or_root()),
     db: Session = Depends(get_db)
 ):
     updated_business = crud.assign_accountant_to_business(db, business_id, request.accountant_id)
     return {"message": "Accountant assigned successfully"}
 
 @router.post("/{business_id}/remove-accountant")
-async def remove_accountant_from_business(
+def remove_accountant_from_business(
     business_id: str,
     request: schemas.AssignAccountantRequest,
-    current_user: User = Depends(require_super_accountant_or_root),
+    current_user: User = Depends(require_super_accountant_or_root()),
     db: Session = Depends(get_db)
 ):
     updated_business = crud.remove_accountant_from_business(db, business_id, request.accountant_id)
-    return {"message": "Accountant removed successfully"}
\ No newline at end of file
+    return {"message": "Accountant removed successfully"}
+
+@router.post("/assignments")
+def bulk_update_assignments(
+    request: schemas.BulkAssignmentRequest,
+    current_user: User = Depends(require_super_accountant_or_root()),
+    db: Session = Depends(get_db)
+):
+    """Assign and unassign many (business, accountant) pairs, or move every business of one accountant to another."""
+    return crud.bulk_update_assignments(db, **request.dict())
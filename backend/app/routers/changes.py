@@ -0,0 +1,53 @@
+from functools import partial
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import get_async_db, get_db
+from app.auth import get_current_claims, oauth2_scheme, require_super_accountant_or_root, token_still_valid
+from app import crud, crud_async, schemas
+from app.events import FULL_VIEW_ROLES, Subscriber, change_stream, event_stream
+from app.models import User
+
+router = APIRouter()
+
+@router.get("", response_model=schemas.ChangeFeed)
+async def get_changes(
+    since: Optional[int] = Query(None, ge=0, description="Cursor from a previous response; omit to get the current cursor"),
+    limit: int = Query(500, ge=1, le=5000),
+    current_user: User = Depends(require_super_accountant_or_root()),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get business, assignment and metrics changes after a cursor (Super Accountant or Root Admin only)."""
+    return await crud_async.get_changes(db, since=since, limit=limit)
+
+@router.get("/stream")
+async def stream_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="Cursor to replay changes after; Last-Event-ID takes precedence"),
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_claims),
+    db: Session = Depends(get_db)
+):
+    """Stream the business, assignment and metrics changes the caller may see as server-sent events.
+
+    The token is checked again at every heartbeat, and the stream ends once
+    it has expired or been revoked or the user deactivated.
+    """
+    accountant = None
+    if current_user.role not in FULL_VIEW_ROLES:
+        accountant = await run_in_threadpool(crud.get_accountant_by_user_id, db, current_user.id)
+    # The stream may stay open for hours; don't hold a pooled connection for it
+    await run_in_threadpool(db.close)
+    # Browsers resume a dropped stream from the id of the last event they received
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+    subscriber = Subscriber(current_user.id, current_user.role, accountant.id if accountant else None)
+    return StreamingResponse(
+        event_stream(change_stream, subscriber, since, still_authorized=partial(token_still_valid, token=token)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
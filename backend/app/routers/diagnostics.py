@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from app.database import engine, async_engine, pool_status
+from app.auth import require_root_admin
+from app.hashing import hashing_pool
+from app.models import User
+from app.response_cache import response_cache
+
+router = APIRouter()
+
+@router.get("/db")
+def get_database_diagnostics(current_user: User = Depends(require_root_admin())):
+    """Get connection pool statistics for the sync and async engines (Root Admin only)."""
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine.sync_engine),
+    }
+
+@router.get("/hashing")
+def get_hashing_diagnostics(current_user: User = Depends(require_root_admin())):
+    """Get password hashing pool occupancy and latency (Root Admin only)."""
+    return hashing_pool.status()
+
+@router.get("/cache")
+def get_cache_diagnostics(current_user: User = Depends(require_root_admin())):
+    """Get response cache hit, miss and eviction counts (Root Admin only)."""
+    return response_cache.status()
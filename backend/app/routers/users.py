@@ -1,19 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from typing import List, Optional
+from app.database import get_async_db, get_db
 from app.auth import (
-    get_current_user, require_root_admin, require_super_accountant_or_root,
+    get_current_user, get_current_claims, require_root_admin, require_super_accountant_or_root,
     require_accountant_or_higher
 )
 from app.models import User, Accountant
-from app.schemas import UserCreate, User, UserUpdate, UserResponse, RoleAssignment
-from app import crud
+from app.schemas import UserCreate, User, UserUpdate, UserResponse, RoleAssignment, Business
+from app import crud, crud_async
+from app.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, encode_cursor
+from app.serializers import orm_response
+from app.conditional import conditional_get, conditional_get_row
+from app.versions import USERS, user_stamp_query
 
 router = APIRouter()
 
 @router.post("/", response_model=UserResponse)
-async def create_user(
+def create_user(
     user_data: UserCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_root_admin())
@@ -25,27 +30,53 @@ async def create_user(
         created_user = crud.create_user(db=db, user_data=user_data_dict)
         # Convert SQLAlchemy model to Pydantic schema to exclude sensitive fields
         return UserResponse.from_orm(created_user)
+    except HTTPException:
+        # Keeps the hashing pool's 429 and its Retry-After header
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid data: {str(e)}"
         )
 
-@router.get("/")
-async def get_users(
+@router.get("/", response_model=List[UserResponse])
+def get_users(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100),
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = None,
+    q: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_super_accountant_or_root())
 ):
-    """Get list of users (Super Accountant or Root Admin only)."""
-    users = crud.get_users(db=db, skip=skip, limit=limit)
-    return users
+    """Get a page of users, optionally searched and filtered (Super Accountant or Root Admin only)."""
+    not_modified = conditional_get(db, USERS, request, response, current_user.id)
+    if not_modified:
+        return not_modified
+    filters = {"q": q, "role": role, "is_active": is_active}
+    users = crud.get_users(db=db, skip=skip, limit=limit, after=after, **filters)
+    response.headers[TOTAL_COUNT_HEADER] = str(crud.count_users(db=db, **filters))
+    # A full page may have more rows behind it; hand out the keyset cursor
+    if users and len(users) == limit:
+        last = users[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return orm_response(UserResponse, users, response)
+
+@router.get("/stats")
+async def get_user_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_super_accountant_or_root())
+):
+    """Get user counts in total, active and per role (Super Accountant or Root Admin only)."""
+    return await crud_async.user_role_counts(db)
 
-@router.get("/me")
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+@router.get("/me", response_model=UserResponse)
+def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information."""
-    return current_user
+    return orm_response(UserResponse, current_user)
 
 
 
@@ -53,7 +84,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 # This prevents FastAPI from matching DELETE /{user_id} to GET /{user_id}
 
 @router.post("/{user_id}/assign-role")
-async def assign_role(
+def assign_role(
     user_id: str,
     role_data: RoleAssignment,
     db: Session = Depends(get_db),
@@ -111,13 +142,18 @@ async def assign_role(
             detail=f"Error updating user role: {str(e)}"
         )
 
-@router.get("/{user_id}/businesses")
-async def get_user_businesses(
+@router.get("/{user_id}/businesses", response_model=List[Business])
+def get_user_businesses(
     user_id: str,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    view: str = "full",
+    q: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    sort: str = "created_at",
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_claims)
 ):
     """Get businesses for a specific user."""
     try:
@@ -142,12 +178,16 @@ async def get_user_businesses(
             if not accountant:
                 return []
             
-            businesses = crud.get_businesses_by_accountant(db=db, accountant_id=accountant.id, skip=skip, limit=limit)
+            filters = {"q": q, "is_active": is_active, "accountant_id": accountant.id}
         else:
             # For root admin and super accountants, get businesses owned by the user
-            businesses = crud.get_businesses_by_owner(db=db, owner_id=user_id, skip=skip, limit=limit)
+            filters = {"q": q, "is_active": is_active, "owner_id": user_id}
         
-        return businesses
+        businesses = crud.get_businesses(db=db, skip=skip, limit=limit, view=view, sort=sort, **filters)
+        response.headers[TOTAL_COUNT_HEADER] = str(crud.count_businesses(db=db, **filters))
+        return orm_response(Business, businesses, response)
+    except HTTPException:
+        raise
     except Exception as e:
         # Log error for monitoring (remove in production if not needed)
         raise HTTPException(
@@ -157,17 +197,22 @@ async def get_user_businesses(
 
 # Generic /{user_id} routes come AFTER more specific routes
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(
+def get_user(
     user_id: str,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_super_accountant_or_root())
 ):
     """Get a specific user (Super Accountant or Root Admin only)."""
+    not_modified = conditional_get_row(db, user_stamp_query(user_id), request, response, current_user.id)
+    if not_modified:
+        return not_modified
     user = crud.get_user(db=db, user_id=user_id)
     return UserResponse.from_orm(user)
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(
+def update_user(
     user_id: str,
     user_update_data: UserUpdate,
     db: Session = Depends(get_db),
@@ -179,6 +224,9 @@ async def update_user(
         user_update_dict = user_update_data.dict()
         updated_user = crud.update_user(db=db, user_id=user_id, user_update_data=user_update_dict)
         return UserResponse.from_orm(updated_user)
+    except HTTPException:
+        # Keeps the hashing pool's 429 and its Retry-After header
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -186,7 +234,7 @@ async def update_user(
         )
 
 @router.delete("/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_root_admin())
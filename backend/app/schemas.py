@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, Extra, Field
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
 
 # Base schemas
 class UserBase(BaseModel):
@@ -25,6 +25,7 @@ class User(UserBase):
     updated_at: Optional[datetime] = Field(None, description="Timestamp when user was last updated")
 
     class Config:
+        orm_mode = True
         schema_extra = {
             "example": {
                 "id": "user_12345",
@@ -62,6 +63,7 @@ class Accountant(AccountantBase):
     user: Optional[User] = Field(None, description="Associated user account information")
 
     class Config:
+        orm_mode = True
         schema_extra = {
             "example": {
                 "id": "acc_12345",
@@ -92,6 +94,28 @@ class BusinessBase(BaseModel):
 class BusinessCreate(BusinessBase):
     pass
 
+class BusinessImportRow(BaseModel):
+    """One row of a bulk business import: the business and, optionally, its first metrics."""
+    name: str = Field(..., description="Business name", min_length=1)
+    description: Optional[str] = Field(None, description="Business description")
+    accountant_id: Optional[str] = Field(None, description="ID of the primary accountant")
+    is_active: bool = Field(True, description="Whether the business is active")
+    revenue: Optional[int] = Field(None, description="Total revenue in cents", ge=0)
+    gross_profit: Optional[int] = Field(None, description="Gross profit in cents", ge=0)
+    net_profit: Optional[int] = Field(None, description="Net profit in cents", ge=0)
+    total_costs: Optional[int] = Field(None, description="Total costs in cents", ge=0)
+    percentage_change_revenue: Optional[int] = Field(None, description="Percentage change in revenue")
+    percentage_change_gross_profit: Optional[int] = Field(None, description="Percentage change in gross profit")
+    percentage_change_net_profit: Optional[int] = Field(None, description="Percentage change in net profit")
+    percentage_change_total_costs: Optional[int] = Field(None, description="Percentage change in total costs")
+    documents_due: Optional[int] = Field(None, description="Number of documents due", ge=0)
+    outstanding_invoices: Optional[int] = Field(None, description="Number of outstanding invoices", ge=0)
+    pending_approvals: Optional[int] = Field(None, description="Number of pending approvals", ge=0)
+    accounting_year_end: Optional[str] = Field(None, description="Accounting year end date", example="31/12/2024")
+
+    class Config:
+        extra = Extra.forbid
+
 class Business(BusinessBase):
     id: str = Field(..., description="Unique identifier for the business", example="business_12345")
     created_at: Optional[datetime] = Field(None, description="Timestamp when business was created")
@@ -99,8 +123,11 @@ class Business(BusinessBase):
     owner: Optional[User] = Field(None, description="Business owner information")
     accountant: Optional[Accountant] = Field(None, description="Assigned accountant information")
     accountants: Optional[List[Accountant]] = Field(None, description="List of all accountants associated with this business")
+    financial_metrics: Optional[List["BusinessFinancialMetrics"]] = Field(None, description="Financial metrics history")
+    metrics: Optional[List["BusinessMetrics"]] = Field(None, description="Workload metrics history")
 
     class Config:
+        orm_mode = True
         schema_extra = {
             "example": {
                 "id": "business_12345",
@@ -134,6 +161,7 @@ class BusinessFinancialMetrics(BusinessFinancialMetricsBase):
     updated_at: Optional[datetime] = Field(None, description="Timestamp when metrics were last updated")
 
     class Config:
+        orm_mode = True
         schema_extra = {
             "example": {
                 "id": "metrics_12345",
@@ -164,6 +192,42 @@ class BusinessMetrics(BusinessMetricsBase):
     created_at: Optional[datetime] = Field(None, description="Timestamp when metrics were created")
     updated_at: Optional[datetime] = Field(None, description="Timestamp when metrics were last updated")
 
+    class Config:
+        orm_mode = True
+
+class BusinessFinancialHistoryCreate(BaseModel):
+    period: date = Field(..., description="Month the figures cover; any day of it, stored as the first", example="2024-03-01")
+    revenue: int = Field(0, description="Revenue for the month in cents", example=1000000, ge=0)
+    gross_profit: int = Field(0, description="Gross profit for the month in cents", example=600000)
+    net_profit: int = Field(0, description="Net profit for the month in cents; negative for a loss", example=400000)
+    total_costs: int = Field(0, description="Total costs for the month in cents", example=600000, ge=0)
+
+class BusinessFinancialHistory(BusinessFinancialHistoryCreate):
+    id: str = Field(..., description="Unique identifier for the history row", example="history_12345")
+    business_id: str = Field(..., description="ID of the business the figures belong to", example="business_12345")
+    created_at: Optional[datetime] = Field(None, description="Timestamp when the figures were recorded")
+
+    class Config:
+        orm_mode = True
+
+class FinancialHistoryPoint(BaseModel):
+    period: date = Field(..., description="First day of the month, quarter or year", example="2024-01-01")
+    months: int = Field(..., description="Months in the period with recorded figures", example=3)
+    revenue: int = Field(..., description="Revenue over the period in cents", example=3000000)
+    gross_profit: int = Field(..., description="Gross profit over the period in cents", example=1800000)
+    net_profit: int = Field(..., description="Net profit over the period in cents", example=1200000)
+    total_costs: int = Field(..., description="Total costs over the period in cents", example=1800000)
+    percentage_change_revenue: Optional[float] = Field(None, description="Change in revenue from the previous period, null without one", example=15.5)
+    percentage_change_gross_profit: Optional[float] = Field(None, description="Change in gross profit from the previous period", example=12.8)
+    percentage_change_net_profit: Optional[float] = Field(None, description="Change in net profit from the previous period", example=18.2)
+    percentage_change_total_costs: Optional[float] = Field(None, description="Change in total costs from the previous period", example=-8.5)
+
+class FinancialHistory(BaseModel):
+    interval: str = Field(..., description="Bucket size: month, quarter or year", example="quarter")
+    points: List[FinancialHistoryPoint] = Field(..., description="Buckets with recorded figures, oldest first")
+
+Business.update_forward_refs(BusinessFinancialMetrics=BusinessFinancialMetrics, BusinessMetrics=BusinessMetrics)
+
 # Authentication schemas
 class Token(BaseModel):
     access_token: str = Field(..., description="JWT access token", example="eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...")
@@ -197,6 +261,32 @@ class LoginRequest(BaseModel):
 class AssignAccountantRequest(BaseModel):
     accountant_id: str = Field(..., description="ID of the accountant to assign", example="acc_12345")
 
+class AccountantAssignment(BaseModel):
+    business_id: str = Field(..., description="ID of the business", example="biz_12345")
+    accountant_id: str = Field(..., description="ID of the accountant", example="acc_12345")
+
+class BulkAssignmentRequest(BaseModel):
+    assign: List[AccountantAssignment] = Field([], description="Pairs to assign; pairs already assigned are skipped")
+    remove: List[AccountantAssignment] = Field([], description="Pairs to unassign; pairs not assigned are skipped")
+    from_accountant_id: Optional[str] = Field(None, description="Move every business of this accountant...", example="acc_12345")
+    to_accountant_id: Optional[str] = Field(None, description="...to this accountant", example="acc_67890")
+
+# Change feed schemas
+class ChangeEntry(BaseModel):
+    id: int = Field(..., description="Cursor of this change", example=1042)
+    table_name: str = Field(..., description="Changed table: businesses, business_accountant, business_financial_metrics or business_metrics", example="businesses")
+    operation: str = Field(..., description="insert, update or delete", example="update")
+    row_id: Optional[str] = Field(None, description="ID of the changed row; null for assignments", example="biz_12345")
+    business_id: str = Field(..., description="ID of the business the change belongs to", example="biz_12345")
+    accountant_id: Optional[str] = Field(None, description="ID of the accountant, for assignments", example=None)
+    changed_at: datetime = Field(..., description="When the change was made")
+    data: Optional[Dict[str, Any]] = Field(None, description="Current values of the row; null for deletes, assignments and rows deleted since")
+
+class ChangeFeed(BaseModel):
+    changes: List[ChangeEntry] = Field(..., description="Changes after the requested cursor, oldest first")
+    cursor: int = Field(..., description="Pass as since to get the changes after these", example=1042)
+    has_more: bool = Field(..., description="Whether more changes are waiting after cursor")
+
 # Role assignment schema
 class RoleAssignment(BaseModel):
     new_role: str = Field(..., description="New role to assign to the user", example="super_accountant")
@@ -0,0 +1,83 @@
+"""Indexed name and description search over businesses.
+
+Each backend gets the index that suits it: SQLite keeps an FTS5 table in
+step with businesses through triggers, PostgreSQL uses pg_trgm GIN indexes
+so ILIKE '%term%' is answered from the index, and anything else falls back
+to an unindexed LIKE. Search on SQLite matches word prefixes ("acc" finds
+"Acme Accounting"); on PostgreSQL it matches any substring.
+"""
+import re
+from sqlalchemy import or_, text
+
+FTS_TABLE = "businesses_fts"
+
+_SQLITE_SEARCH_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(business_id UNINDEXED, name, description, tokenize='unicode61 remove_diacritics 2')",
+    f"""CREATE TRIGGER IF NOT EXISTS businesses_fts_insert AFTER INSERT ON businesses BEGIN
+        INSERT INTO {FTS_TABLE} (business_id, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS businesses_fts_update AFTER UPDATE OF id, name, description ON businesses BEGIN
+        DELETE FROM {FTS_TABLE} WHERE business_id = old.id;
+        INSERT INTO {FTS_TABLE} (business_id, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS businesses_fts_delete AFTER DELETE ON businesses BEGIN
+        DELETE FROM {FTS_TABLE} WHERE business_id = old.id;
+    END""",
+)
+
+_POSTGRES_SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_businesses_name_trgm ON businesses USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_businesses_description_trgm ON businesses USING gin (description gin_trgm_ops)",
+)
+
+def install_business_search(connection):
+    """Create the search index for the connection's backend.
+
+    The SQLite FTS table is refilled from businesses, so this also indexes
+    rows written before the triggers existed.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        for statement in _SQLITE_SEARCH_DDL:
+            connection.execute(text(statement))
+        connection.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        connection.execute(text(
+            f"INSERT INTO {FTS_TABLE} (business_id, name, description) "
+            "SELECT id, name, description FROM businesses"
+        ))
+    elif dialect == "postgresql":
+        for statement in _POSTGRES_SEARCH_DDL:
+            connection.execute(text(statement))
+
+def drop_business_search(connection):
+    """Drop the SQLite FTS table; the triggers and indexes go with businesses."""
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+def fts_query(q: str) -> str:
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", q))
+
+def _like_pattern(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def business_search_filter(dialect: str, q: str, id_column, name_column, description_column):
+    """Filter matching businesses whose name or description contains the search text."""
+    if dialect == "sqlite":
+        query = fts_query(q)
+        if not query:
+            # Nothing FTS can tokenize, e.g. only punctuation
+            return name_column.contains(q, autoescape=True)
+        return id_column.in_(
+            text(f"SELECT business_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_query")
+            .bindparams(fts_query=query)
+            .columns(business_id=id_column.type)
+        )
+    pattern = _like_pattern(q)
+    return or_(
+        name_column.ilike(pattern, escape="\\"),
+        description_column.ilike(pattern, escape="\\"),
+    )
@@ -0,0 +1,66 @@
+"""Fast JSON responses for ORM objects, shaped by the response schemas.
+
+Returning ORM objects from a route makes FastAPI validate every row
+against ``response_model`` and then walk the result again with
+``jsonable_encoder``, and without a response model it serializes whatever
+attributes happen to be loaded, including ``hashed_password`` on nested
+users. These helpers copy exactly the fields a schema declares, straight
+from the ORM objects, and hand the result to orjson. Relationships that
+were not loaded come out empty, null or an empty list, instead of being
+lazy loaded per row.
+"""
+from functools import lru_cache
+from typing import Optional
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON
+from sqlalchemy import inspect
+
+@lru_cache(maxsize=None)
+def _fields(schema) -> tuple:
+    """(name, nested schema or None, is_list) for every field of ``schema``."""
+    fields = []
+    for name, field in schema.__fields__.items():
+        nested = field.type_ if isinstance(field.type_, type) and issubclass(field.type_, BaseModel) else None
+        fields.append((name, nested, field.shape != SHAPE_SINGLETON))
+    return tuple(fields)
+
+def to_dict(schema, obj) -> Optional[dict]:
+    """Copy the fields ``schema`` declares from the ORM object, or plain object, ``obj``."""
+    if obj is None:
+        return None
+    state = inspect(obj, raiseerr=False)
+    # Loaded attributes live in the instance dict; anything else is expired or unloaded.
+    # Plain objects, such as the auth Principal, hold every field they have in theirs
+    loaded = state.dict if state is not None else vars(obj)
+    data = {}
+    for name, nested, many in _fields(schema):
+        if name in loaded:
+            value = loaded[name]
+        elif nested is None:
+            # Expired columns reload with a single refresh of the row
+            value = getattr(obj, name)
+        else:
+            # Lists stay lists, so clients iterating them need no null check
+            data[name] = [] if many else None
+            continue
+        if nested is None:
+            data[name] = value
+        elif many:
+            data[name] = [to_dict(nested, item) for item in value]
+        else:
+            data[name] = to_dict(nested, value)
+    return data
+
+def orm_response(schema, content, response: Optional[Response] = None) -> ORJSONResponse:
+    """Serialize an ORM object, or a list of them, as ``schema``.
+
+    Routes that take a ``response`` parameter to set headers pass it on,
+    since FastAPI only merges those headers into responses it builds itself.
+    """
+    if isinstance(content, list):
+        content = [to_dict(schema, obj) for obj in content]
+    else:
+        content = to_dict(schema, content)
+    return ORJSONResponse(content, headers=response.headers if response is not None else None)
@@ -0,0 +1,236 @@
+"""Per-accountant portfolio summaries, kept in step with the rows they total.
+
+accountant_portfolio_summaries holds one row per accountant with the number
+of businesses they manage (as primary or assigned accountant) and totals of
+those businesses' latest metrics, so a super accountant's per-subordinate
+figures are one indexed lookup instead of a query per accountant.
+
+Rows are refreshed in the same transaction as the ORM flush that changes
+them: a flush touching businesses, their accountant assignments or their
+metrics recomputes only the summaries of the accountants involved, before
+and after the change. Bulk Core statements bypass the session and need a
+rebuild.
+
+Check and rebuild with: python -m app.maintenance summaries check|rebuild
+"""
+from sqlalchemy import and_, bindparam, delete, event, func, insert, inspect, select, union, update
+from sqlalchemy.orm import aliased
+from app import models
+from app.portfolio import _is_latest
+
+# Summary column -> (metrics model, column) totalled over latest metrics rows
+SUMMARY_FIELDS = {
+    "revenue": (models.BusinessFinancialMetrics, "revenue"),
+    "documents_due": (models.BusinessMetrics, "documents_due"),
+    "pending_approvals": (models.BusinessMetrics, "pending_approvals"),
+}
+SUMMARY_COLUMNS = ("business_count",) + tuple(SUMMARY_FIELDS)
+
+# Keeps IN lists well under backend parameter limits
+_REFRESH_BATCH_SIZE = 500
+
+def _managed_pairs(accountant_ids=None):
+    """Distinct (accountant_id, business_id) pairs, primary or assigned."""
+    primary = select(
+        models.Business.accountant_id.label("accountant_id"), models.Business.id.label("business_id")
+    ).where(models.Business.accountant_id.isnot(None))
+    assigned = select(models.business_accountant.c.accountant_id, models.business_accountant.c.business_id)
+    if accountant_ids is not None:
+        primary = primary.where(models.Business.accountant_id.in_(accountant_ids))
+        assigned = assigned.where(models.business_accountant.c.accountant_id.in_(accountant_ids))
+    return union(primary, assigned).subquery()
+
+def accountant_summary_query(accountant_ids=None):
+    """Compute summary rows from the source tables, for every accountant or only ``accountant_ids``."""
+    managed = _managed_pairs(accountant_ids)
+    latest = {
+        model: aliased(model)
+        for model in (models.BusinessFinancialMetrics, models.BusinessMetrics)
+    }
+    totals = select(
+        managed.c.accountant_id,
+        func.count().label("business_count"),
+        *(
+            func.sum(getattr(latest[model], column)).label(field)
+            for field, (model, column) in SUMMARY_FIELDS.items()
+        )
+    ).select_from(managed)
+    for model, row in latest.items():
+        totals = totals.outerjoin(row, and_(row.business_id == managed.c.business_id, _is_latest(model, row)))
+    totals = totals.group_by(managed.c.accountant_id).subquery()
+
+    query = select(
+        models.Accountant.id.label("accountant_id"),
+        *(func.coalesce(totals.c[field], 0).label(field) for field in SUMMARY_COLUMNS)
+    ).select_from(models.Accountant).outerjoin(totals, totals.c.accountant_id == models.Accountant.id)
+    if accountant_ids is not None:
+        query = query.where(models.Accountant.id.in_(accountant_ids))
+    return query
+
+def _summary_table():
+    return models.AccountantPortfolioSummary.__table__
+
+def refresh_accountant_summaries(connection, accountant_ids) -> int:
+    """Recompute the summaries of ``accountant_ids``; returns how many were written."""
+    table = _summary_table()
+    accountant_ids = sorted(set(accountant_ids) - {None})
+    written = 0
+    for start in range(0, len(accountant_ids), _REFRESH_BATCH_SIZE):
+        batch = accountant_ids[start:start + _REFRESH_BATCH_SIZE]
+        connection.execute(delete(table).where(table.c.accountant_id.in_(batch)))
+        result = connection.execute(
+            insert(table).from_select(("accountant_id",) + SUMMARY_COLUMNS, accountant_summary_query(batch))
+        )
+        written += result.rowcount
+    return written
+
+def add_to_accountant_summaries(connection, deltas: dict):
+    """Add the figures of newly inserted businesses to their accountants' summaries.
+
+    ``deltas`` maps accountant ids to amounts for each summary column. Only
+    exact for businesses that did not exist before, whose metrics are then
+    their latest; other changes need refresh_accountant_summaries. Missing
+    rows are recomputed instead.
+    """
+    if not deltas:
+        return
+    table = _summary_table()
+    result = connection.execute(
+        update(table).where(table.c.accountant_id == bindparam("target_id")).values({
+            column: table.c[column] + bindparam(f"delta_{column}") for column in SUMMARY_COLUMNS
+        }),
+        [
+            {"target_id": accountant_id, **{f"delta_{column}": delta.get(column, 0) for column in SUMMARY_COLUMNS}}
+            for accountant_id, delta in deltas.items()
+        ]
+    )
+    if result.rowcount != len(deltas):
+        refresh_accountant_summaries(connection, deltas.keys())
+
+def rebuild_accountant_summaries(connection) -> int:
+    """Recompute every summary from scratch; returns how many were written."""
+    table = _summary_table()
+    connection.execute(delete(table))
+    result = connection.execute(
+        insert(table).from_select(("accountant_id",) + SUMMARY_COLUMNS, accountant_summary_query())
+    )
+    return result.rowcount
+
+def check_accountant_summaries(connection) -> list:
+    """Compare stored summaries with freshly computed ones.
+
+    Returns one entry per accountant whose stored row is missing, stale or
+    orphaned, with the ``stored`` and ``expected`` figures (None when absent).
+    """
+    table = _summary_table()
+    expected = {
+        row.accountant_id: {column: row._mapping[column] for column in SUMMARY_COLUMNS}
+        for row in connection.execute(accountant_summary_query())
+    }
+    stored = {
+        row.accountant_id: {column: row._mapping[column] for column in SUMMARY_COLUMNS}
+        for row in connection.execute(select(table.c.accountant_id, *(table.c[c] for c in SUMMARY_COLUMNS)))
+    }
+    return [
+        {"accountant_id": accountant_id, "stored": stored.get(accountant_id), "expected": expected.get(accountant_id)}
+        for accountant_id in sorted(expected.keys() | stored.keys())
+        if stored.get(accountant_id) != expected.get(accountant_id)
+    ]
+
+# Session bookkeeping between before_flush and after_flush
+_PENDING_KEY = "accountant_summaries_to_refresh"
+
+def _changed(obj, *attributes) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+def _metrics_business_ids(obj) -> set:
+    """Businesses a metrics row belongs to now and, if it moved, before."""
+    history = inspect(obj).attrs.business_id.history
+    ids = set(history.deleted or ()) | {obj.business_id}
+    if obj.business_id is None and obj.business is not None:
+        ids.add(obj.business.id)
+    return ids - {None}
+
+def _touched(session):
+    """Businesses whose summaries may change in this flush, and accountants added or removed."""
+    businesses = set()
+    added, removed = set(), set()
+    for obj in session.new:
+        if isinstance(obj, models.Business):
+            businesses.add(obj)
+        elif isinstance(obj, models.Accountant):
+            added.add(obj)
+    for obj in session.dirty:
+        if isinstance(obj, models.Business) and _changed(obj, "accountant_id", "accountants"):
+            businesses.add(obj)
+        elif isinstance(obj, models.Accountant) and _changed(obj, "businesses"):
+            added.add(obj)
+    for obj in session.deleted:
+        if isinstance(obj, models.Business):
+            businesses.add(obj)
+        elif isinstance(obj, models.Accountant):
+            removed.add(obj)
+    metrics_business_ids = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, (models.BusinessFinancialMetrics, models.BusinessMetrics)):
+            metrics_business_ids |= _metrics_business_ids(obj)
+    return businesses, metrics_business_ids, added, removed
+
+def _managing_accountants(connection, business_ids) -> set:
+    """Accountants currently managing any of ``business_ids``, as stored in the database."""
+    business_ids = sorted(set(business_ids) - {None})
+    accountant_ids = set()
+    for start in range(0, len(business_ids), _REFRESH_BATCH_SIZE):
+        batch = business_ids[start:start + _REFRESH_BATCH_SIZE]
+        accountant_ids |= set(connection.execute(
+            union(
+                select(models.Business.accountant_id).where(models.Business.id.in_(batch)),
+                select(models.business_accountant.c.accountant_id).where(
+                    models.business_accountant.c.business_id.in_(batch)
+                )
+            )
+        ).scalars())
+    return accountant_ids - {None}
+
+def _before_flush(session, flush_context, instances):
+    businesses, metrics_business_ids, added, removed = _touched(session)
+    if not (businesses or metrics_business_ids or added or removed):
+        return
+    connection = session.connection()
+    # Accountants that lose a business in this flush only show up in the pre-flush state
+    persistent_ids = {business.id for business in businesses if business.id is not None}
+    pending = _managing_accountants(connection, persistent_ids)
+    pending |= {
+        value
+        for business in businesses
+        for value in inspect(business).attrs.accountant_id.history.deleted or ()
+    }
+    if removed:
+        # Drop summaries ahead of the accountant rows they reference
+        table = _summary_table()
+        removed_ids = [accountant.id for accountant in removed]
+        connection.execute(delete(table).where(table.c.accountant_id.in_(removed_ids)))
+        pending -= set(removed_ids)
+    session.info.setdefault(_PENDING_KEY, set()).update(pending)
+
+def _after_flush(session, flush_context):
+    businesses, metrics_business_ids, added, removed = _touched(session)
+    pending = session.info.pop(_PENDING_KEY, set())
+    if not (businesses or metrics_business_ids or added or pending):
+        return
+    connection = session.connection()
+    business_ids = {business.id for business in businesses} | metrics_business_ids
+    pending |= _managing_accountants(connection, business_ids)
+    pending |= {accountant.id for accountant in added}
+    pending -= {accountant.id for accountant in removed}
+    refresh_accountant_summaries(connection, pending)
+
+def track_accountant_summaries(session_class):
+    """Refresh accountant summaries on every flush of sessions of ``session_class``.
+
+    AsyncSession flushes through a sync Session, so registering on Session
+    covers crud and crud_async alike.
+    """
+    event.listen(session_class, "before_flush", _before_flush)
+    event.listen(session_class, "after_flush", _after_flush)
@@ -0,0 +1,96 @@
+"""Financial figures over time, from the monthly business_financial_history rows.
+
+Rows are bucketed into months, quarters or years and summed in SQL, and
+each bucket's percentage change from the bucket before it is computed with
+window functions as the rows are read, so changes are never stored and keep
+their decimals.
+"""
+from datetime import date
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import Integer, and_, case, cast, extract, func, select
+from app import models
+from app.portfolio import FINANCIAL_FIELDS
+
+# Bucket sizes in months
+INTERVALS = {"month": 1, "quarter": 3, "year": 12}
+
+def month_index(value: date) -> int:
+    """Months since year 0 of the month ``value`` falls in."""
+    return value.year * 12 + value.month - 1
+
+def index_month(index: int) -> date:
+    """First day of the month ``index`` months after year 0."""
+    return date(index // 12, index % 12 + 1, 1)
+
+def _bucket(period, months: int):
+    """Month index of the first month of the bucket ``period`` falls in."""
+    index = cast(extract("year", period), Integer) * 12 + cast(extract("month", period), Integer) - 1
+    # Buckets divide a year evenly, so they line up with calendar quarters and years
+    return index - index % months
+
+def financial_history_query(
+    interval: str = "month",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    criteria: Optional[list] = None
+):
+    """Build the statement summing history rows of businesses matching ``criteria`` per bucket.
+
+    ``start`` and ``end`` are widened to whole buckets. The bucket before
+    ``start`` is read too, so the first bucket returned has a change. A
+    change is null when the bucket before has no rows or a zero figure.
+    """
+    if interval not in INTERVALS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown interval '{interval}'. Expected one of: {', '.join(INTERVALS)}"
+        )
+    months = INTERVALS[interval]
+    history = models.BusinessFinancialHistory
+
+    bucket = _bucket(history.period, months)
+    totals = select(
+        bucket.label("bucket"),
+        func.count(func.distinct(history.period)).label("months"),
+        *[func.sum(getattr(history, field)).label(field) for field in FINANCIAL_FIELDS]
+    ).join(models.Business, models.Business.id == history.business_id).where(*(criteria or []))
+    if start is not None:
+        first = month_index(start) - month_index(start) % months
+        totals = totals.where(history.period >= index_month(first - months))
+    if end is not None:
+        last = month_index(end) - month_index(end) % months
+        totals = totals.where(history.period < index_month(last + months))
+    totals = totals.group_by(bucket).subquery()
+
+    previous_bucket = func.lag(totals.c.bucket).over(order_by=totals.c.bucket)
+    columns = [totals.c.bucket, totals.c.months]
+    for field in FINANCIAL_FIELDS:
+        value = totals.c[field]
+        previous = func.lag(value).over(order_by=totals.c.bucket)
+        change = case(
+            (
+                and_(previous_bucket == totals.c.bucket - months, previous != 0),
+                func.round((value - previous) * 100.0 / func.abs(previous), 2)
+            )
+        )
+        columns += [value, change.label(f"percentage_change_{field}")]
+    series = select(*columns).subquery()
+
+    query = select(series)
+    if start is not None:
+        query = query.where(series.c.bucket >= first)
+    return query.order_by(series.c.bucket)
+
+def format_financial_history(interval: str, result_rows) -> dict:
+    """Shape history rows into the response body."""
+    points = []
+    for row in result_rows:
+        row = row._mapping
+        point = {"period": index_month(row["bucket"]), "months": row["months"]}
+        for field in FINANCIAL_FIELDS:
+            change = row[f"percentage_change_{field}"]
+            point[field] = int(row[field])
+            point[f"percentage_change_{field}"] = float(change) if change is not None else None
+        points.append(point)
+    return {"interval": interval, "points": points}
@@ -0,0 +1,170 @@
+"""Change counters for the business, accountant and user collections.
+
+resource_versions holds one row per collection whose version goes up in the
+same transaction as every write that can change what the collection's
+endpoints return, along with the time of that write. Reading a version is a
+primary key lookup, so endpoints can answer conditional requests without
+running their queries (see app.conditional).
+
+The rows are seeded with the table (and by migration 0010 for databases
+that predate that), so a write is always a single UPDATE. That UPDATE locks
+the collection's row, so it is left to the moment the transaction commits:
+ORM writes are noted from the session flush, bulk Core statements bypass
+that and call bump_session_versions themselves, and the session counts
+everything it noted just before committing. The session also remembers
+which collections its transaction wrote, so caches can drop their entries
+once it commits (see app.response_cache).
+
+Single resources are validated from their own rows instead, see the
+*_stamp_query functions below.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import event, insert, or_, select, update
+from app import models
+
+BUSINESSES = "businesses"
+ACCOUNTANTS = "accountants"
+USERS = "users"
+RESOURCES = (BUSINESSES, ACCOUNTANTS, USERS)
+
+# Session.info key of the collections written by the session's transaction
+WRITTEN_RESOURCES = "written_resources"
+
+# Session.info key of the written collections not counted yet
+_UNCOUNTED = "uncounted_resources"
+
+# Business responses embed accountants and users, and accountant responses
+# embed users, so a write to one bumps every collection that shows it
+_AFFECTED = {
+    models.Business: (BUSINESSES,),
+    models.BusinessFinancialMetrics: (BUSINESSES,),
+    models.BusinessMetrics: (BUSINESSES,),
+    models.Accountant: (ACCOUNTANTS, BUSINESSES),
+    models.User: (USERS, ACCOUNTANTS, BUSINESSES),
+}
+
+def _table():
+    return models.ResourceVersion.__table__
+
+def seed_versions(connection):
+    """Add the row of every collection that has none yet, at version 0."""
+    table = _table()
+    existing = set(connection.execute(select(table.c.name)).scalars())
+    missing = [name for name in RESOURCES if name not in existing]
+    if missing:
+        now = datetime.now(timezone.utc)
+        connection.execute(insert(table), [{"name": name, "version": 0, "updated_at": now} for name in missing])
+
+# Databases built from the models get their rows with the table
+@event.listens_for(models.ResourceVersion.__table__, "after_create")
+def _seed_created_table(target, connection, **kw):
+    seed_versions(connection)
+
+def bump_versions(connection, *names):
+    """Count a write to the ``names`` collections."""
+    table = _table()
+    now = datetime.now(timezone.utc)
+    # Sorted, so concurrent writers lock the rows in the same order
+    for name in sorted(set(names)):
+        connection.execute(
+            update(table).where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+        )
+
+def bump_session_versions(db, *names):
+    """Count a write to the ``names`` collections when ``db``'s transaction commits."""
+    db.info.setdefault(WRITTEN_RESOURCES, set()).update(names)
+    db.info.setdefault(_UNCOUNTED, set()).update(names)
+
+def version_query(name: str):
+    """Select the ``version`` and ``updated_at`` of one collection."""
+    table = _table()
+    return select(table.c.version, table.c.updated_at).where(table.c.name == name)
+
+# Columns each resource shows. Timestamps only have second resolution on
+# SQLite, so the values themselves go into a row's validator too.
+def _user_columns(user):
+    return [user.id, user.username, user.email, user.role, user.is_active, user.created_at, user.updated_at]
+
+def _accountant_columns(accountant):
+    return [
+        accountant.id, accountant.user_id, accountant.super_accountant_id, accountant.is_super_accountant,
+        accountant.first_name, accountant.last_name, accountant.created_at, accountant.updated_at,
+    ]
+
+def user_stamp_query(user_id: str):
+    """Select what GET /users/{id} shows of one user; no row means there is no such user."""
+    user = models.User.__table__
+    return select(*_user_columns(user.c)).where(user.c.id == user_id)
+
+def accountant_stamp_query(accountant_id: str):
+    """Select what GET /accountants/{id} shows of one accountant and their user."""
+    accountant = models.Accountant.__table__
+    user = models.User.__table__.alias("accountant_user")
+    return (
+        select(*_accountant_columns(accountant.c), *_user_columns(user.c))
+        .join_from(accountant, user, user.c.id == accountant.c.user_id)
+        .where(accountant.c.id == accountant_id)
+    )
+
+def business_stamp_query(business_id: str):
+    """Select the stamps behind GET /businesses/{id}, one row per accountant shown.
+
+    Every write to the business, its metrics, history and assignments is in
+    the change log (see app.changes), so the business's latest log entry
+    stands in for all of them. Its owner and accountants are read as is.
+    """
+    business = models.Business.__table__
+    log = models.ChangeLogEntry.__table__
+    assignments = models.business_accountant
+    owner = models.User.__table__.alias("owner")
+    accountant = models.Accountant.__table__
+    accountant_user = models.User.__table__.alias("accountant_user")
+
+    latest = select(log.c.id, log.c.changed_at).where(log.c.business_id == business.c.id).order_by(log.c.id.desc()).limit(1)
+    shown = or_(
+        accountant.c.id == business.c.accountant_id,
+        accountant.c.id.in_(select(assignments.c.accountant_id).where(assignments.c.business_id == business.c.id)),
+    )
+    return (
+        select(
+            latest.with_only_columns(log.c.id).scalar_subquery().label("log_id"),
+            latest.with_only_columns(log.c.changed_at).scalar_subquery().label("changed_at"),
+            business.c.created_at, business.c.updated_at,
+            *_user_columns(owner.c), *_accountant_columns(accountant.c), *_user_columns(accountant_user.c),
+        )
+        .join_from(business, owner, owner.c.id == business.c.owner_id)
+        .outerjoin(accountant, shown)
+        .outerjoin(accountant_user, accountant_user.c.id == accountant.c.user_id)
+        .where(business.c.id == business_id)
+        .order_by(accountant.c.id)
+    )
+
+def _affected(session) -> set:
+    names = set()
+    for obj in session.new | session.deleted:
+        names.update(_AFFECTED.get(type(obj), ()))
+    for obj in session.dirty:
+        if type(obj) in _AFFECTED and session.is_modified(obj):
+            names.update(_AFFECTED[type(obj)])
+    return names
+
+def _before_flush(session, flush_context, instances):
+    names = _affected(session)
+    if names:
+        bump_session_versions(session, *names)
+
+def _before_commit(session):
+    # Commit flushes after this hook, so flush first to note every write
+    session.flush()
+    names = session.info.pop(_UNCOUNTED, None)
+    if names:
+        bump_versions(session.connection(), *names)
+
+def _after_rollback(session):
+    session.info.pop(_UNCOUNTED, None)
+
+def track_resource_versions(session_class):
+    """Bump resource versions when sessions of ``session_class`` commit writes to them."""
+    event.listen(session_class, "before_flush", _before_flush)
+    event.listen(session_class, "before_commit", _before_commit)
+    event.listen(session_class, "after_rollback", _after_rollback)
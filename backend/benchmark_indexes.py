@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Index benchmark for Apex AM API.
+This script seeds a scratch SQLite database with a large number of businesses,
+then times the hot crud queries without and with the lookup indexes from
+app.migrations, and prints the median latency of each.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from app import crud
+from app.database import create_db_engine
+from app.migrations import LOOKUP_INDEXES, create_lookup_indexes
+from app.models import (
+    Base, User, Accountant, Business, BusinessFinancialMetrics, BusinessMetrics,
+    business_accountant
+)
+
+# Existed before the lookup indexes, so it stays in place for the baseline
+BASELINE_INDEXES = {"ix_businesses_created_at_id"}
+
+def chunks(rows, size=10000):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def seed(db_engine, businesses, owners, accountants):
+    """Bulk insert users, accountants, businesses and their metrics."""
+    now = datetime.now()
+    owner_ids = [str(uuid.uuid4()) for _ in range(owners)]
+    accountant_user_ids = [str(uuid.uuid4()) for _ in range(accountants)]
+    accountant_ids = [str(uuid.uuid4()) for _ in range(accountants)]
+
+    users = [
+        {"id": user_id, "username": f"user{i}", "email": f"user{i}@example.com",
+         "hashed_password": "x", "role": "accountant", "is_active": True, "token_version": 0}
+        for i, user_id in enumerate(owner_ids + accountant_user_ids)
+    ]
+    accountant_rows = [
+        {"id": accountant_id, "user_id": user_id, "is_super_accountant": i < accountants // 10,
+         "super_accountant_id": accountant_ids[i % max(1, accountants // 10)] if i >= accountants // 10 else None}
+        for i, (accountant_id, user_id) in enumerate(zip(accountant_ids, accountant_user_ids))
+    ]
+    business_rows, junction_rows, financial_rows, metric_rows = [], [], [], []
+    for i in range(businesses):
+        business_id = str(uuid.uuid4())
+        accountant_id = random.choice(accountant_ids)
+        business_rows.append({
+            "id": business_id, "name": f"Business {i}", "owner_id": random.choice(owner_ids),
+            "accountant_id": accountant_id, "is_active": True,
+            "created_at": now + timedelta(microseconds=i),
+        })
+        junction_rows.append({"business_id": business_id, "accountant_id": accountant_id})
+        financial_rows.append({"id": str(uuid.uuid4()), "business_id": business_id, "revenue": i})
+        metric_rows.append({"id": str(uuid.uuid4()), "business_id": business_id, "documents_due": i % 7})
+
+    with db_engine.begin() as connection:
+        for table, rows in (
+            (User.__table__, users),
+            (Accountant.__table__, accountant_rows),
+            (Business.__table__, business_rows),
+            (business_accountant, junction_rows),
+            (BusinessFinancialMetrics.__table__, financial_rows),
+            (BusinessMetrics.__table__, metric_rows),
+        ):
+            for chunk in chunks(rows):
+                connection.execute(table.insert(), chunk)
+
+    return owner_ids, accountant_user_ids, accountant_ids, [row["id"] for row in business_rows]
+
+def benchmark_queries(Session, ids, repeat):
+    """Time each hot query over random ids and return median milliseconds by name."""
+    owner_ids, accountant_user_ids, accountant_ids, business_ids = ids
+    super_ids = accountant_ids[:max(1, len(accountant_ids) // 10)]
+    queries = {
+        "get_business": lambda db: crud.get_business(db, random.choice(business_ids)),
+        "get_businesses_by_owner": lambda db: crud.get_businesses_by_owner(db, random.choice(owner_ids), view="card"),
+        "get_businesses_by_accountant": lambda db: crud.get_businesses_by_accountant(db, random.choice(accountant_ids), view="card"),
+        "count_businesses_by_accountant": lambda db: crud.count_businesses_by_accountant(db, random.choice(accountant_ids)),
+        "get_accountant_by_user_id": lambda db: crud.get_accountant_by_user_id(db, random.choice(accountant_user_ids)),
+        "get_accountants_by_super": lambda db: crud.get_accountants_by_super(db, random.choice(super_ids)),
+    }
+    results = {}
+    for name, query in queries.items():
+        samples = []
+        for _ in range(repeat):
+            db = Session()
+            try:
+                start = time.perf_counter()
+                query(db)
+                samples.append((time.perf_counter() - start) * 1000)
+            finally:
+                db.close()
+        results[name] = statistics.median(samples)
+    return results
+
+def run(args):
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    db_engine = create_db_engine(f"sqlite:///{path}")
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+    Base.metadata.create_all(bind=db_engine)
+
+    with db_engine.begin() as connection:
+        for name in LOOKUP_INDEXES:
+            if name not in BASELINE_INDEXES:
+                connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    print(f"Seeding {args.businesses} businesses into {path}...")
+    start = time.perf_counter()
+    ids = seed(db_engine, args.businesses, args.owners, args.accountants)
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+    before = benchmark_queries(Session, ids, args.repeat)
+
+    with db_engine.begin() as connection:
+        create_lookup_indexes(connection)
+        connection.execute(text("ANALYZE"))
+
+    after = benchmark_queries(Session, ids, args.repeat)
+
+    print(f"\n{'query':<32} {'before':>12} {'after':>12} {'speedup':>9}")
+    for name in before:
+        print(f"{name:<32} {before[name]:10.2f}ms {after[name]:10.2f}ms {before[name] / after[name]:8.1f}x")
+
+    db_engine.dispose()
+    os.remove(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark crud queries with and without the lookup indexes")
+    parser.add_argument("--businesses", type=int, default=100000, help="Businesses to seed")
+    parser.add_argument("--owners", type=int, default=2000, help="Owner users to seed")
+    parser.add_argument("--accountants", type=int, default=500, help="Accountants to seed")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query")
+
+    run(parser.parse_args())
@@ -7,15 +7,29 @@ This script creates the database tables and populates them with real test data f
 import sys
 import os
 import json
-from datetime import datetime
+import time
+from datetime import datetime, timedelta, timezone
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from sqlalchemy import insert
 from app.database import engine, SessionLocal
-from app.models import Base, User, Accountant, Business, BusinessFinancialMetrics, BusinessMetrics
+from app.models import (
+    Base, User, Accountant, Business, BusinessFinancialHistory, BusinessFinancialMetrics, BusinessMetrics,
+    business_accountant, generate_uuid
+)
 from app.auth import get_password_hash
+from app.migrations import run_migrations
+from app.summaries import rebuild_accountant_summaries
+from app.hierarchy import rebuild_accountant_hierarchy
+from app.versions import RESOURCES, bump_versions
 from sample_data.businesses import businesses_data
 from sample_data.accountants import accountants_data
 
+# Shape of the synthetic dataset generated with --scale
+BUSINESSES_PER_ACCOUNTANT = 25
+TEAM_SIZE = 10
+SEED_BATCH_SIZE = 10000
+
 def create_sample_data():
     """Create sample data for the application"""
     return businesses_data, accountants_data
@@ -27,10 +41,147 @@ def parse_date(date_str):
     except:
         return datetime.now().date()
 
-def init_db():
-    """Initialize the database with tables and real test data."""
+def _financial_row(business_id, template, created_at):
+    metrics = template.get('financialMetrics', {})
+    return {
+        "id": generate_uuid(),
+        "business_id": business_id,
+        "revenue": metrics.get('revenue', 0),
+        "gross_profit": metrics.get('grossProfit', 0),
+        "net_profit": metrics.get('netProfit', 0),
+        "total_costs": metrics.get('totalCosts', 0),
+        "percentage_change_revenue": metrics.get('percentageChangeRevenue', 0),
+        "percentage_change_gross_profit": metrics.get('percentageChangeGrossProfit', 0),
+        "percentage_change_net_profit": metrics.get('percentageChangeNetProfit', 0),
+        "percentage_change_total_costs": metrics.get('percentageChangeTotalCosts', 0),
+        "created_at": created_at,
+    }
+
+def _history_rows(business_id, template, period):
+    """Financial history for the month before ``period`` and for ``period``.
+
+    The earlier month is backed out of the sample percentage changes, so the
+    changes computed from the history match them.
+    """
+    metrics = template.get('financialMetrics', {})
+    previous = {"business_id": business_id, "period": (period - timedelta(days=1)).replace(day=1)}
+    current = {"business_id": business_id, "period": period}
+    for field, key, change_key in (
+        ("revenue", "revenue", "percentageChangeRevenue"),
+        ("gross_profit", "grossProfit", "percentageChangeGrossProfit"),
+        ("net_profit", "netProfit", "percentageChangeNetProfit"),
+        ("total_costs", "totalCosts", "percentageChangeTotalCosts"),
+    ):
+        current[field] = metrics.get(key, 0)
+        previous[field] = round(current[field] / (1 + metrics.get(change_key, 0) / 100))
+    return [previous, current]
+
+def _workload_row(business_id, template, created_at):
+    metrics = template.get('metrics', {})
+    return {
+        "id": generate_uuid(),
+        "business_id": business_id,
+        "documents_due": metrics.get('documentsDue', 0),
+        "outstanding_invoices": metrics.get('outstandingInvoices', 0),
+        "pending_approvals": metrics.get('pendingApprovals', 0),
+        "accounting_year_end": metrics.get('accountingYearEnd', '31/12/2024'),
+        "created_at": created_at,
+    }
+
+def seed_scaled(db, scale, password_hash, batch_size=SEED_BATCH_SIZE):
+    """Seed ``scale`` synthetic businesses and their accountants with bulk inserts in one transaction.
+
+    Users, accountants and businesses cycle through the sample_data
+    templates with a numeric suffix. There is one accountant per
+    BUSINESSES_PER_ACCOUNTANT businesses, in teams of TEAM_SIZE led by a
+    super accountant who reports to the demo super accountant. Businesses
+    are owned by the root admin and get increasing created_at timestamps.
+    """
+    started = time.perf_counter()
+    accountant_count = max(1, -(-scale // BUSINESSES_PER_ACCOUNTANT))
+    
+    root_admin_id, super_user_id, super_id = generate_uuid(), generate_uuid(), generate_uuid()
+    users = [
+        {"id": root_admin_id, "username": "admin", "email": "admin@example.com", "role": "root_admin"},
+        {"id": super_user_id, "username": "super", "email": "super@example.com", "role": "super_accountant"},
+    ]
+    accountants = [{
+        "id": super_id, "user_id": super_user_id, "first_name": "Super", "last_name": "Accountant",
+        "is_super_accountant": True, "super_accountant_id": None,
+    }]
+    accountant_ids = []
+    lead_id = None
+    for i in range(accountant_count):
+        template = accountants_data[i % len(accountants_data)]
+        is_lead = i % TEAM_SIZE == 0
+        user_id, accountant_id = generate_uuid(), generate_uuid()
+        local, domain = template["email"].split("@")
+        users.append({
+            "id": user_id,
+            "username": f"{template['username']}.{i + 1}",
+            "email": f"{local}.{i + 1}@{domain}",
+            "role": "super_accountant" if is_lead else template["role"],
+        })
+        accountants.append({
+            "id": accountant_id,
+            "user_id": user_id,
+            "first_name": template["first_name"],
+            "last_name": template["last_name"],
+            "is_super_accountant": is_lead,
+            "super_accountant_id": super_id if is_lead else lead_id,
+        })
+        if is_lead:
+            lead_id = accountant_id
+        accountant_ids.append(accountant_id)
+    
+    for user in users:
+        user.update(hashed_password=password_hash, is_active=True)
+    for start in range(0, len(users), batch_size):
+        db.execute(insert(User), users[start:start + batch_size])
+    for start in range(0, len(accountants), batch_size):
+        db.execute(insert(Accountant), accountants[start:start + batch_size])
+    
+    # Build each batch just before inserting it, so memory stays flat at any scale
+    first_created_at = datetime.now(timezone.utc) - timedelta(seconds=scale)
+    for start in range(0, scale, batch_size):
+        businesses, assignments, financial, workload = [], [], [], []
+        for i in range(start, min(start + batch_size, scale)):
+            template = businesses_data[i % len(businesses_data)]
+            business_id = generate_uuid()
+            accountant_id = accountant_ids[i % accountant_count]
+            created_at = first_created_at + timedelta(seconds=i)
+            businesses.append({
+                "id": business_id,
+                "name": f"{template['name']} {i + 1}",
+                "description": template.get('description', ''),
+                "owner_id": root_admin_id,
+                "accountant_id": accountant_id,
+                "is_active": True,
+                "created_at": created_at,
+            })
+            assignments.append({"business_id": business_id, "accountant_id": accountant_id})
+            financial.append(_financial_row(business_id, template, created_at))
+            workload.append(_workload_row(business_id, template, created_at))
+        db.execute(insert(Business), businesses)
+        db.execute(insert(business_accountant), assignments)
+        db.execute(insert(BusinessFinancialMetrics), financial)
+        db.execute(insert(BusinessMetrics), workload)
+        print(f"  {start + len(businesses)}/{scale} businesses")
+    
+    # Core inserts bypass the flush hooks that maintain these tables
+    connection = db.connection()
+    rebuild_accountant_hierarchy(connection)
+    rebuild_accountant_summaries(connection)
+    bump_versions(connection, *RESOURCES)
+    db.commit()
+    print(f"Seeded {len(users)} users, {len(accountants)} accountants and {scale} businesses "
+          f"in {time.perf_counter() - started:.1f}s")
+
+def init_db(scale=None):
+    """Initialize the database with tables and real test data, or ``scale`` synthetic businesses."""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
     
     print("Creating sample data...")
     businesses_data, accountants_data = create_sample_data()
@@ -42,6 +193,13 @@ def init_db():
             print("Database already contains data. Skipping initialization.")
             return
         
+        # Every sample account shares one password, so hash it once
+        password_hash = get_password_hash("password")
+        
+        if scale:
+            seed_scaled(db, scale, password_hash)
+            return
+        
         # Create users with the correct structure
         users = {}
         accountants = {}
@@ -50,7 +208,7 @@ def init_db():
         root_admin = User(
             username="admin",
             email="admin@example.com",
-            hashed_password=get_password_hash("password"),
+            hashed_password=password_hash,
             role="root_admin",
             is_active=True
         )
@@ -62,7 +220,7 @@ def init_db():
         super_accountant = User(
             username="super",
             email="super@example.com",
-            hashed_password=get_password_hash("password"),
+            hashed_password=password_hash,
             role="super_accountant",
             is_active=True
         )
@@ -78,7 +236,7 @@ def init_db():
             user = User(
                 username=acc_data["username"],
                 email=acc_data["email"],
-                hashed_password=get_password_hash("password"),
+                hashed_password=password_hash,
                 role=acc_data["role"],
                 is_active=True
             )
@@ -152,6 +310,10 @@ def init_db():
                     percentage_change_total_costs=business_data['financialMetrics'].get('percentageChangeTotalCosts', 0)
                 )
                 db.add(fin_metrics)
+                db.add_all(
+                    BusinessFinancialHistory(**row)
+                    for row in _history_rows(business.id, business_data, datetime.now().date().replace(day=1))
+                )
             
             # Create business metrics
             if 'metrics' in business_data:
@@ -201,9 +363,16 @@ if __name__ == "__main__":
         help="Reset database (drop all tables and recreate)"
     )
     
+    parser.add_argument(
+        "--scale",
+        type=int,
+        metavar="N",
+        help="Seed N synthetic businesses, with accountants and users to match, instead of the sample data"
+    )
+    
     args = parser.parse_args()
     
     if args.reset:
         reset_db()
     
-    init_db()
+    init_db(scale=args.scale)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Login load test for Apex AM API.
+This script fires concurrent logins at a running server while probing /health,
+and reports latency percentiles for both so event-loop stalls show up as a
+growing /health p99.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(name, samples):
+    """Print latency statistics in milliseconds."""
+    ms = [sample * 1000 for sample in samples]
+    print(
+        f"{name:<8} n={len(ms):<5} "
+        f"p50={percentile(ms, 50):8.1f}ms  p95={percentile(ms, 95):8.1f}ms  "
+        f"p99={percentile(ms, 99):8.1f}ms  mean={statistics.mean(ms) if ms else 0:8.1f}ms"
+    )
+
+async def login_worker(client, email, password, count, samples):
+    """Log in repeatedly, recording each request's latency."""
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.post("/auth/login-json", json={"email": email, "password": password})
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+
+async def health_probe(client, stop, interval, samples):
+    """Poll /health until told to stop, recording each request's latency."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+async def run(args):
+    login_samples, health_samples = [], []
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        stop = asyncio.Event()
+        probe = asyncio.create_task(health_probe(client, stop, args.probe_interval, health_samples))
+        await asyncio.gather(*[
+            login_worker(client, args.email, args.password, args.requests, login_samples)
+            for _ in range(args.concurrency)
+        ])
+        stop.set()
+        await probe
+
+    report("login", login_samples)
+    report("health", health_samples)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test concurrent logins against Apex AM API")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--email", default="admin@example.com", help="Login email")
+    parser.add_argument("--password", default="password", help="Login password")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent login workers")
+    parser.add_argument("--requests", type=int, default=10, help="Logins per worker")
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="Seconds between /health probes")
+
+    asyncio.run(run(parser.parse_args()))
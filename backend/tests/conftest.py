@@ -1,28 +1,43 @@
+import os
+
+# Hash inline at the minimum cost so tests don't spawn workers or wait on bcrypt
+os.environ.setdefault("HASH_WORKERS", "0")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
 import pytest
+import pytest_asyncio
 import asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from app.main import app
-from app.database import get_db, Base
+from app.database import get_async_db, get_db, Base
 from app.models import User, Accountant, Business
-from app.auth import get_password_hash, create_access_token
+from app.auth import get_password_hash, create_access_token, principal_cache, token_version_cache
+from app.response_cache import response_cache
 import os
 import tempfile
 
-# Test database configuration
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Test database configuration: one shared-cache in-memory database, so the
+# sync and async engines see the same tables
+SQLALCHEMY_DATABASE_URL = "sqlite:///file:apex_test?mode=memory&cache=shared&uri=true"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///file:apex_test?mode=memory&cache=shared&uri=true"
 
-# Create test engine
+# Create test engine; its one connection keeps the database alive
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
 
-# Create test session
+# Async connections are opened per session, on whichever loop uses them
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+
+# Create test sessions
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingAsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -38,6 +53,16 @@ def db_session():
         session.close()
         # Drop tables
         Base.metadata.drop_all(bind=engine)
+        # Cached principals and responses would outlive the rows they describe
+        principal_cache.clear()
+        token_version_cache.clear()
+        response_cache.store.clear()
+
+@pytest_asyncio.fixture
+async def async_db_session(db_session):
+    """Create an async session on the test database."""
+    async with TestingAsyncSessionLocal() as session:
+        yield session
 
 @pytest.fixture
 def client(db_session):
@@ -48,7 +73,12 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
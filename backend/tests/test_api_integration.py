@@ -126,6 +126,21 @@ class TestUserEndpoints:
         # Regular accountants cannot access user list (need super_accountant or root_admin)
         assert response.status_code == 403
     
+    def test_get_current_user_info(self, client, auth_headers, test_user):
+        """Test getting the logged in user's own information."""
+        response = client.get("/users/me", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["id"] == test_user.id
+        assert data["email"] == test_user.email
+        assert data["role"] == "accountant"
+        assert "hashed_password" not in data
+    
+    def test_get_current_user_info_without_auth(self, client):
+        """Test getting the current user without authentication."""
+        response = client.get("/users/me")
+        assert response.status_code == 401
+    
     def test_get_user_by_id_without_auth(self, client, test_user):
         """Test getting user by ID without authentication."""
         response = client.get(f"/users/{test_user.id}")
@@ -225,6 +240,31 @@ class TestUserEndpoints:
         assert response.status_code == 200
         assert isinstance(response.json(), list)
     
+    def test_get_users_filtered(self, client, admin_auth_headers, test_user, test_admin_user):
+        """Test that user search returns one page, the total and a cursor."""
+        response = client.get("/users/?role=accountant&limit=1", headers=admin_auth_headers)
+        assert response.status_code == 200
+        assert [user["id"] for user in response.json()] == [test_user.id]
+        assert response.headers["X-Total-Count"] == "1"
+        cursor = response.headers["X-Next-Cursor"]
+        
+        response = client.get(f"/users/?role=accountant&limit=1&after={cursor}", headers=admin_auth_headers)
+        assert response.json() == []
+    
+    def test_get_user_stats(self, client, admin_auth_headers, test_user):
+        """Test the role counts endpoint."""
+        response = client.get("/users/stats", headers=admin_auth_headers)
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["total"] == 2
+        assert stats["roles"]["accountant"] == 1
+        assert stats["roles"]["root_admin"] == 1
+    
+    def test_get_user_stats_as_accountant(self, client, auth_headers):
+        """Test that accountants cannot read user stats."""
+        response = client.get("/users/stats", headers=auth_headers)
+        assert response.status_code == 403
+    
     def test_get_user_by_id_as_super_accountant(self, client, super_accountant_auth_headers, test_user):
         """Test that super accountants can successfully get user details."""
         response = client.get(f"/users/{test_user.id}", headers=super_accountant_auth_headers)
@@ -343,6 +383,24 @@ class TestAccountantEndpoints:
         # Check if endpoint exists and returns a response
         assert response.status_code in [200, 404]  # 404 if endpoint doesn't exist
     
+    def test_get_accountant_summaries(self, client, auth_headers, test_business):
+        """Test that accountants get their own portfolio summary."""
+        response = client.get("/accountants/summaries", headers=auth_headers)
+        assert response.status_code == 200
+        (summary,) = response.json()
+        assert summary["accountant_id"] == test_business.accountant_id
+        assert summary["business_count"] == 1
+    
+    def test_get_accountant_subtree(self, client, auth_headers, test_accountant, test_super_accountant):
+        """Test that accountants get their own subtree but not one above them."""
+        response = client.get(f"/accountants/{test_accountant.id}/subtree", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["id"] == test_accountant.id
+        assert response.json()["descendant_count"] == 0
+
+        response = client.get(f"/accountants/{test_super_accountant.id}/subtree", headers=auth_headers)
+        assert response.status_code == 403
+    
     def test_get_accountant_by_id_without_auth(self, client, test_accountant):
         """Test getting accountant by ID without authentication."""
         response = client.get(f"/accountants/{test_accountant.id}")
@@ -400,6 +458,39 @@ class TestBusinessEndpoints:
         # Check if endpoint exists
         assert response.status_code in [200]
     
+    def test_get_businesses_cursor_pagination(self, client, admin_auth_headers, test_business):
+        """Test that a full page returns a cursor that continues the listing."""
+        response = client.get("/businesses/?limit=1", headers=admin_auth_headers)
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        cursor = response.headers["X-Next-Cursor"]
+        
+        response = client.get(f"/businesses/?limit=1&after={cursor}", headers=admin_auth_headers)
+        assert response.status_code == 200
+        assert response.json() == []
+        assert "X-Next-Cursor" not in response.headers
+    
+    def test_get_businesses_search_and_sort(self, client, admin_auth_headers, test_business):
+        """Test that search and filters return one page and the total match count."""
+        response = client.get("/businesses/?q=test&is_active=true&sort=-name&limit=10", headers=admin_auth_headers)
+        assert response.status_code == 200
+        assert [business["id"] for business in response.json()] == [test_business.id]
+        assert response.headers["X-Total-Count"] == "1"
+        
+        response = client.get("/businesses/?q=nomatch", headers=admin_auth_headers)
+        assert response.json() == []
+        assert response.headers["X-Total-Count"] == "0"
+        
+        response = client.get("/businesses/?sort=unknown", headers=admin_auth_headers)
+        assert response.status_code == 400
+    
+    def test_get_business_aggregates(self, client, auth_headers, test_business):
+        """Test that accountants get aggregates over their own businesses."""
+        response = client.get("/businesses/aggregates?group_by=status", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["groups"][0]["key"] is True
+        assert response.json()["groups"][0]["business_count"] == 1
+    
     def test_get_business_by_id_without_auth(self, client, test_business):
         """Test getting business by ID without authentication."""
         response = client.get(f"/businesses/{test_business.id}")
@@ -482,6 +573,51 @@ class TestAuthorization:
         """Test that super accountant can access super accountant endpoints."""
         response = client.get("/accountants/", headers=super_accountant_auth_headers)
         assert response.status_code in [200, 404]
+    
+    def test_login_token_revoked_after_role_change(self, client, test_user, admin_auth_headers):
+        """Test that a login token stops working once the user's role changes."""
+        response = client.post("/auth/login-json", json={
+            "email": "test@example.com",
+            "password": "testpassword"
+        })
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        assert client.get("/businesses/", headers=headers).status_code == 200
+        
+        response = client.post(
+            f"/users/{test_user.id}/assign-role",
+            json={"new_role": "super_accountant"},
+            headers=admin_auth_headers
+        )
+        assert response.status_code == 200
+        
+        response = client.get("/businesses/", headers=headers)
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Token has been revoked"
+    
+    def test_assign_accountant_requires_role(self, client, auth_headers, test_business, test_accountant):
+        """Test that regular accountants cannot assign accountants to businesses."""
+        response = client.post(
+            f"/businesses/{test_business.id}/assign-accountant",
+            json={"accountant_id": test_accountant.id},
+            headers=auth_headers
+        )
+        assert response.status_code == 403
+
+class TestDiagnosticsEndpoints:
+    """Test operational diagnostics endpoints."""
+    
+    def test_db_diagnostics_requires_root_admin(self, client, auth_headers):
+        """Test that non-admins cannot read pool statistics."""
+        response = client.get("/diagnostics/db", headers=auth_headers)
+        assert response.status_code == 403
+    
+    def test_db_diagnostics_as_root_admin(self, client, admin_auth_headers):
+        """Test pool statistics are reported for both engines."""
+        response = client.get("/diagnostics/db", headers=admin_auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert {"sync", "async"} <= set(data)
+        assert "pool_class" in data["sync"]
 
 class TestSecurityFeatures:
     """Test security-related features."""
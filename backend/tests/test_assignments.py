@@ -0,0 +1,135 @@
+import pytest
+from sqlalchemy import event
+from app import crud_async
+from app.crud import assign_accountant_to_business, bulk_update_assignments, create_business, get_accountant_summaries
+from app.models import Business, business_accountant
+from app.summaries import check_accountant_summaries
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.integration
+]
+
+def assigned_pairs(db_session) -> set:
+    return set(db_session.execute(
+        business_accountant.select().with_only_columns(business_accountant.c.business_id, business_accountant.c.accountant_id)
+    ).all())
+
+@pytest.fixture
+def businesses(db_session, test_user):
+    return [create_business(db_session, {"name": f"B{i}", "owner_id": test_user.id}) for i in range(3)]
+
+class TestBulkAssignments:
+    """Test POST /businesses/assignments."""
+
+    def test_assign_and_remove_pairs(self, client, db_session, admin_auth_headers, businesses, test_accountant, test_super_accountant):
+        """Test that already assigned and repeated pairs are skipped and counted out."""
+        assign_accountant_to_business(db_session, businesses[0].id, test_accountant.id)
+        pairs = [{"business_id": business.id, "accountant_id": test_accountant.id} for business in businesses]
+
+        response = client.post(
+            "/businesses/assignments", json={"assign": pairs + pairs[:1]}, headers=admin_auth_headers
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"assigned": 2, "removed": 0, "reassigned": 0}
+        (summary,) = get_accountant_summaries(db_session, accountant_id=test_accountant.id)
+        assert summary["business_count"] == 3
+
+        response = client.post("/businesses/assignments", json={
+            "remove": pairs[:2],
+            "assign": [{"business_id": businesses[0].id, "accountant_id": test_super_accountant.id}],
+        }, headers=admin_auth_headers)
+
+        assert response.json() == {"assigned": 1, "removed": 2, "reassigned": 0}
+        assert assigned_pairs(db_session) == {
+            (businesses[0].id, test_super_accountant.id), (businesses[2].id, test_accountant.id)
+        }
+        assert check_accountant_summaries(db_session.connection()) == []
+
+    def test_move_all(self, client, db_session, admin_auth_headers, businesses, test_accountant, test_super_accountant):
+        """Test moving a departing accountant's assigned and primary businesses to another."""
+        assign_accountant_to_business(db_session, businesses[0].id, test_accountant.id)
+        assign_accountant_to_business(db_session, businesses[1].id, test_accountant.id)
+        # Already assigned to the new accountant too
+        assign_accountant_to_business(db_session, businesses[1].id, test_super_accountant.id)
+        db_session.query(Business).filter(Business.id == businesses[2].id).update({"accountant_id": test_accountant.id})
+        db_session.commit()
+
+        response = client.post("/businesses/assignments", json={
+            "from_accountant_id": test_accountant.id, "to_accountant_id": test_super_accountant.id
+        }, headers=admin_auth_headers)
+
+        assert response.json() == {"assigned": 1, "removed": 2, "reassigned": 1}
+        assert assigned_pairs(db_session) == {
+            (businesses[0].id, test_super_accountant.id), (businesses[1].id, test_super_accountant.id)
+        }
+        assert db_session.get(Business, businesses[2].id).accountant_id == test_super_accountant.id
+        (summary,) = get_accountant_summaries(db_session, accountant_id=test_super_accountant.id)
+        assert summary["business_count"] == 3
+        assert check_accountant_summaries(db_session.connection()) == []
+
+    def test_validation_and_role(self, client, db_session, auth_headers, admin_auth_headers, businesses, test_accountant):
+        """Test unknown ids, incomplete moves and that accountants cannot bulk assign."""
+        response = client.post("/businesses/assignments", json={
+            "assign": [
+                {"business_id": businesses[0].id, "accountant_id": test_accountant.id},
+                {"business_id": "missing", "accountant_id": test_accountant.id},
+            ]
+        }, headers=admin_auth_headers)
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Business not found: missing"
+        # Nothing was applied
+        assert assigned_pairs(db_session) == set()
+
+        response = client.post(
+            "/businesses/assignments", json={"from_accountant_id": test_accountant.id}, headers=admin_auth_headers
+        )
+        assert response.status_code == 400
+
+        response = client.post("/businesses/assignments", json={}, headers=auth_headers)
+        assert response.status_code == 403
+
+    def test_pairs_assigned_concurrently_are_skipped(self, db_session, businesses, test_accountant):
+        """Test a pair another request inserts just before the batch does is skipped instead of failing."""
+        first, second = businesses[0].id, businesses[1].id
+        engine = db_session.get_bind()
+        raced = []
+
+        def assign_first_elsewhere(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO business_accountant") and not raced:
+                raced.append(True)
+                cursor.execute(
+                    "INSERT INTO business_accountant (business_id, accountant_id) VALUES (?, ?)", (first, test_accountant.id)
+                )
+
+        event.listen(engine, "before_cursor_execute", assign_first_elsewhere)
+        try:
+            bulk_update_assignments(db_session, assign=[
+                {"business_id": first, "accountant_id": test_accountant.id},
+                {"business_id": second, "accountant_id": test_accountant.id},
+            ])
+        finally:
+            event.remove(engine, "before_cursor_execute", assign_first_elsewhere)
+
+        assert assigned_pairs(db_session) == {(first, test_accountant.id), (second, test_accountant.id)}
+        # The single-pair endpoint treats an existing pair as unchanged too
+        assign_accountant_to_business(db_session, first, test_accountant.id)
+        assert len(assigned_pairs(db_session)) == 2
+
+@pytest.mark.asyncio
+async def test_async_bulk_assignments(async_db_session):
+    """Test the async crud path."""
+    owner = await crud_async.create_user(async_db_session, {
+        "username": "owner", "email": "owner@example.com", "password": "ownerpassword", "role": "accountant"
+    })
+    accountant = await crud_async.create_accountant(async_db_session, {"user_id": owner.id})
+    business = await crud_async.create_business(async_db_session, {"name": "A", "owner_id": owner.id})
+
+    counts = await crud_async.bulk_update_assignments(
+        async_db_session, assign=[{"business_id": business.id, "accountant_id": accountant.id}]
+    )
+
+    assert counts == {"assigned": 1, "removed": 0, "reassigned": 0}
+    (row,) = await crud_async.get_accountant_summaries(async_db_session, accountant_id=accountant.id)
+    assert row["business_count"] == 1
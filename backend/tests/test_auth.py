@@ -5,8 +5,11 @@ from app.auth import (
     verify_password, get_password_hash, authenticate_user, 
     create_access_token, decode_access_token, get_current_user,
     require_role, require_roles, require_root_admin,
-    require_super_accountant_or_root, require_accountant_or_higher
+    require_super_accountant_or_root, require_accountant_or_higher,
+    principal_cache, create_user_access_token, get_current_claims,
+    TokenClaims, Principal, token_still_valid
 )
+from app.crud import update_user, delete_user
 from app.models import User
 from fastapi import HTTPException, Depends
 from sqlalchemy.orm import Session
@@ -399,3 +402,123 @@ class TestSecurityFeatures:
         time.sleep(0.001)
         decoded = decode_access_token(token)
         assert decoded is None
+
+class TestPrincipalCache:
+    """Test caching of authenticated principals."""
+    
+    def test_get_current_user_caches_principal(self, db_session, test_user):
+        """Test that a cached principal skips the user lookup."""
+        token = create_access_token(data={"sub": test_user.email})
+        
+        principal = get_current_user(token=token, db=db_session)
+        assert principal.id == test_user.id
+        assert principal.role == "accountant"
+        
+        # A second call must not touch the session at all
+        cached = get_current_user(token=token, db=Mock(spec=Session))
+        assert cached == principal
+    
+    def test_update_user_invalidates_principal(self, db_session, test_user):
+        """Test that role changes are visible on the next request."""
+        token = create_access_token(data={"sub": test_user.email})
+        assert get_current_user(token=token, db=db_session).role == "accountant"
+        
+        update_user(db_session, test_user.id, {"role": "super_accountant"})
+        
+        assert principal_cache.get(test_user.email) is None
+        assert get_current_user(token=token, db=db_session).role == "super_accountant"
+    
+    def test_delete_user_invalidates_principal(self, db_session, test_user):
+        """Test that deleted users can no longer authenticate."""
+        token = create_access_token(data={"sub": test_user.email})
+        get_current_user(token=token, db=db_session)
+        
+        delete_user(db_session, test_user.id)
+        
+        with pytest.raises(HTTPException) as exc_info:
+            get_current_user(token=token, db=db_session)
+        assert exc_info.value.status_code == 401
+
+class TestTokenClaims:
+    """Test claim-based authorization and token revocation."""
+    
+    def test_create_user_access_token_claims(self, test_user):
+        """Test that tokens carry the claims needed for role checks."""
+        payload = decode_access_token(create_user_access_token(test_user))
+        
+        assert payload["sub"] == test_user.email
+        assert payload["uid"] == test_user.id
+        assert payload["role"] == "accountant"
+        assert payload["ver"] == 0
+        assert payload["active"] is True
+    
+    def test_get_current_claims_skips_user_lookup(self, db_session, test_user):
+        """Test that claims are trusted once the token version is cached."""
+        token = create_user_access_token(test_user)
+        
+        claims = get_current_claims(token=token, db=db_session)
+        assert isinstance(claims, TokenClaims)
+        assert claims.id == test_user.id
+        assert claims.role == "accountant"
+        
+        # The token version is cached, so the session is not touched again
+        assert get_current_claims(token=token, db=Mock(spec=Session)) == claims
+    
+    def test_get_current_claims_legacy_token(self, db_session, test_user):
+        """Test that subject-only tokens fall back to the principal lookup."""
+        token = create_access_token(data={"sub": test_user.email})
+        
+        principal = get_current_claims(token=token, db=db_session)
+        assert isinstance(principal, Principal)
+        assert principal.id == test_user.id
+    
+    def test_role_change_revokes_token(self, db_session, test_user):
+        """Test that tokens issued before a role change are rejected."""
+        token = create_user_access_token(test_user)
+        get_current_claims(token=token, db=db_session)
+        
+        updated = update_user(db_session, test_user.id, {"role": "super_accountant"})
+        assert updated.token_version == 1
+        
+        for dependency in (get_current_claims, get_current_user):
+            with pytest.raises(HTTPException) as exc_info:
+                dependency(token=token, db=db_session)
+            assert exc_info.value.status_code == 401
+            assert exc_info.value.detail == "Token has been revoked"
+        
+        new_token = create_user_access_token(updated)
+        assert get_current_claims(token=new_token, db=db_session).role == "super_accountant"
+    
+    def test_unrelated_update_keeps_token(self, db_session, test_user):
+        """Test that changes to fields outside the claims keep tokens valid."""
+        token = create_user_access_token(test_user)
+        
+        updated = update_user(db_session, test_user.id, {"username": "renamed"})
+        
+        assert updated.token_version == 0
+        assert get_current_claims(token=token, db=db_session).id == test_user.id
+    
+    def test_deleted_user_token_rejected(self, db_session, test_user):
+        """Test that tokens of deleted users are rejected on the fast path."""
+        token = create_user_access_token(test_user)
+        get_current_claims(token=token, db=db_session)
+        
+        delete_user(db_session, test_user.id)
+        
+        with pytest.raises(HTTPException) as exc_info:
+            get_current_claims(token=token, db=db_session)
+        assert exc_info.value.status_code == 401
+    
+    def test_token_still_valid(self, db_session, test_user):
+        """Test that long-lived connections can tell when their token stops authenticating."""
+        token = create_user_access_token(test_user)
+        legacy = create_access_token(data={"sub": test_user.email})
+        expired = create_user_access_token(test_user, expires_delta=timedelta(seconds=-1))
+        assert token_still_valid(db_session, token)
+        assert token_still_valid(db_session, legacy)
+        assert not token_still_valid(db_session, expired)
+        
+        update_user(db_session, test_user.id, {"is_active": False})
+        
+        assert not token_still_valid(db_session, token)
+        assert not token_still_valid(db_session, legacy)
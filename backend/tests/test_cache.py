@@ -0,0 +1,70 @@
+import pytest
+from unittest.mock import patch
+from app.cache import LRUCache, create_cache
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.unit
+]
+
+class TestLRUCache:
+    """Test the in-process LRU cache."""
+    
+    def test_set_get_delete(self):
+        """Test basic cache operations."""
+        cache = LRUCache(maxsize=10, ttl=60)
+        cache.set("a", {"value": 1})
+        
+        assert cache.get("a") == {"value": 1}
+        assert cache.get("missing") is None
+        
+        cache.delete("a")
+        assert cache.get("a") is None
+    
+    def test_entries_expire(self):
+        """Test that entries are dropped after their TTL."""
+        cache = LRUCache(maxsize=10, ttl=60)
+        with patch("app.cache.time.monotonic", return_value=1000.0):
+            cache.set("a", 1)
+        with patch("app.cache.time.monotonic", return_value=1059.0):
+            assert cache.get("a") == 1
+        with patch("app.cache.time.monotonic", return_value=1061.0):
+            assert cache.get("a") is None
+    
+    def test_least_recently_used_evicted(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+    
+    def test_create_cache_unknown_backend(self):
+        """Test that a misconfigured backend is rejected."""
+        with patch("app.cache.CACHE_BACKEND", "memcached"):
+            with pytest.raises(ValueError):
+                create_cache("test")
+    
+    def test_delete_prefix(self):
+        """Test that only entries under the prefix are removed."""
+        cache = LRUCache(maxsize=10, ttl=60)
+        cache.set("businesses:1", 1)
+        cache.set("businesses:2", 2)
+        cache.set("accountants:1", 3)
+        
+        assert cache.delete_prefix("businesses:") == 2
+        assert cache.get("businesses:1") is None
+        assert cache.get("accountants:1") == 3
+    
+    def test_evictions_counted(self):
+        """Test that entries dropped to make room are counted."""
+        cache = LRUCache(maxsize=1, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("b")
+        
+        assert cache.evictions == 1
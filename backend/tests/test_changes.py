@@ -0,0 +1,120 @@
+import json
+import pytest
+from app.crud import (
+    assign_accountant_to_business, bulk_update_assignments, create_business, delete_business, get_changes,
+    remove_accountant_from_business, update_business
+)
+from app.models import Business, BusinessFinancialMetrics
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.integration
+]
+
+def summary(feed) -> list:
+    return [
+        (change["table_name"], change["operation"], change["business_id"], change["accountant_id"])
+        for change in feed["changes"]
+    ]
+
+class TestChangeFeed:
+    """Test the change log and GET /changes."""
+
+    def test_orm_writes(self, db_session, test_user):
+        """Test inserts, updates and deletes made through the ORM are logged in order."""
+        cursor = get_changes(db_session)["cursor"]
+        business = create_business(db_session, {"name": "Acme", "owner_id": test_user.id})
+        db_session.add(BusinessFinancialMetrics(business_id=business.id, revenue=100))
+        db_session.commit()
+        update_business(db_session, business.id, {"name": "Acme Ltd"})
+
+        feed = get_changes(db_session, since=cursor)
+
+        assert summary(feed) == [
+            ("businesses", "insert", business.id, None),
+            ("business_financial_metrics", "insert", business.id, None),
+            ("businesses", "update", business.id, None),
+        ]
+        # Every entry carries the row as it is now
+        assert feed["changes"][0]["data"]["name"] == "Acme Ltd"
+        assert feed["changes"][1]["data"]["revenue"] == 100
+        assert feed["cursor"] == feed["changes"][-1]["id"]
+
+        metrics = db_session.query(BusinessFinancialMetrics).one()
+        db_session.delete(metrics)
+        db_session.commit()
+        feed = get_changes(db_session, since=feed["cursor"])
+        assert summary(feed) == [("business_financial_metrics", "delete", business.id, None)]
+        assert feed["changes"][0]["data"] is None
+
+    def test_unchanged_rows_not_logged(self, db_session, test_business):
+        """Test flushing a business without changes logs nothing."""
+        cursor = get_changes(db_session)["cursor"]
+        business = db_session.get(Business, test_business.id)
+        business.name = business.name
+        db_session.commit()
+
+        assert get_changes(db_session, since=cursor)["changes"] == []
+
+    def test_assignments(self, db_session, test_user, test_accountant, test_super_accountant):
+        """Test single, bulk and moved assignments written with Core statements are logged."""
+        first = create_business(db_session, {"name": "B1", "owner_id": test_user.id, "accountant_id": test_accountant.id})
+        second = create_business(db_session, {"name": "B2", "owner_id": test_user.id})
+        cursor = get_changes(db_session)["cursor"]
+
+        assign_accountant_to_business(db_session, first.id, test_accountant.id)
+        remove_accountant_from_business(db_session, first.id, test_accountant.id)
+        bulk_update_assignments(db_session, assign=[
+            {"business_id": first.id, "accountant_id": test_accountant.id},
+            {"business_id": second.id, "accountant_id": test_accountant.id},
+        ])
+        bulk_update_assignments(
+            db_session, remove=[{"business_id": second.id, "accountant_id": test_accountant.id}],
+            from_accountant_id=test_accountant.id, to_accountant_id=test_super_accountant.id
+        )
+
+        assert summary(get_changes(db_session, since=cursor)) == [
+            ("business_accountant", "insert", first.id, test_accountant.id),
+            ("business_accountant", "delete", first.id, test_accountant.id),
+            ("business_accountant", "insert", first.id, test_accountant.id),
+            ("business_accountant", "insert", second.id, test_accountant.id),
+            ("business_accountant", "delete", second.id, test_accountant.id),
+            ("business_accountant", "insert", first.id, test_super_accountant.id),
+            ("business_accountant", "delete", first.id, test_accountant.id),
+            ("businesses", "update", first.id, None),
+        ]
+
+    def test_import_and_delete(self, client, db_session, admin_auth_headers, test_business):
+        """Test bulk imports and deletes reach the feed through the API."""
+        cursor = client.get("/changes", headers=admin_auth_headers).json()["cursor"]
+        client.post(
+            "/businesses/bulk", content=json.dumps({"name": "Imported", "revenue": 5}).encode(),
+            headers={**admin_auth_headers, "Content-Type": "application/x-ndjson"}
+        )
+        delete_business(db_session, test_business.id)
+
+        response = client.get(f"/changes?since={cursor}", headers=admin_auth_headers)
+
+        assert response.status_code == 200
+        assert [(change["table_name"], change["operation"]) for change in response.json()["changes"]] == [
+            ("businesses", "insert"), ("business_financial_metrics", "insert"), ("businesses", "delete"),
+        ]
+        assert response.json()["changes"][0]["data"]["name"] == "Imported"
+
+    def test_paging(self, client, db_session, admin_auth_headers, test_user):
+        """Test a full page says more are waiting and its cursor picks up after it."""
+        for index in range(3):
+            create_business(db_session, {"name": f"B{index}", "owner_id": test_user.id})
+
+        first = client.get("/changes?since=0&limit=2", headers=admin_auth_headers).json()
+        second = client.get(f"/changes?since={first['cursor']}&limit=2", headers=admin_auth_headers).json()
+
+        assert first["has_more"] and not second["has_more"]
+        assert [change["data"]["name"] for change in first["changes"] + second["changes"]] == ["B0", "B1", "B2"]
+        assert client.get(f"/changes?since={second['cursor']}", headers=admin_auth_headers).json() == {
+            "changes": [], "cursor": second["cursor"], "has_more": False
+        }
+
+    def test_accountants_forbidden(self, client, auth_headers):
+        """Test the feed is limited to super accountants and root admins."""
+        assert client.get("/changes", headers=auth_headers).status_code == 403
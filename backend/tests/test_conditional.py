@@ -0,0 +1,127 @@
+import json
+import pytest
+from app.crud import assign_accountant_to_business
+from app.models import Business
+from app.versions import BUSINESSES, version_query
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.integration
+]
+
+def business_version(db_session) -> int:
+    db_session.expire_all()
+    return db_session.execute(version_query(BUSINESSES)).one().version
+
+class TestConditionalGet:
+    """Test ETag and Last-Modified on the list and detail endpoints."""
+
+    def test_not_modified(self, client, admin_auth_headers, test_business):
+        """Test a matching If-None-Match gets a bodiless 304 with the same validators."""
+        response = client.get("/businesses/", headers=admin_auth_headers)
+        etag = response.headers["ETag"]
+        assert response.status_code == 200
+        assert etag.startswith('W/"')
+        assert response.headers["Cache-Control"] == "private, no-cache"
+        assert response.headers["Last-Modified"].endswith(" GMT")
+
+        response = client.get("/businesses/", headers={**admin_auth_headers, "If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    def test_etag_depends_on_params_and_caller(self, client, auth_headers, admin_auth_headers, test_business):
+        """Test different pages and different callers never share a tag."""
+        etags = {
+            client.get("/businesses/", headers=admin_auth_headers).headers["ETag"],
+            client.get("/businesses/?limit=1", headers=admin_auth_headers).headers["ETag"],
+            client.get("/businesses/", headers=auth_headers).headers["ETag"],
+            client.get(f"/businesses/{test_business.id}", headers=admin_auth_headers).headers["ETag"],
+        }
+        assert len(etags) == 4
+
+    def test_writes_change_etag(self, client, db_session, admin_auth_headers, test_user, test_business, test_super_accountant):
+        """Test ORM updates, Core assignments and embedded users each invalidate the tag."""
+        def etag():
+            return client.get(f"/businesses/{test_business.id}", headers=admin_auth_headers).headers["ETag"]
+
+        seen = [etag()]
+        client.put(f"/businesses/{test_business.id}", json={"name": "Renamed", "owner_id": test_user.id}, headers=admin_auth_headers)
+        seen.append(etag())
+        assign_accountant_to_business(db_session, test_business.id, test_super_accountant.id)
+        seen.append(etag())
+        client.put(f"/users/{test_super_accountant.user_id}", json={"email": "moved@example.com"}, headers=admin_auth_headers)
+        seen.append(etag())
+
+        assert len(set(seen)) == 4
+        response = client.get(f"/businesses/{test_business.id}", headers={**admin_auth_headers, "If-None-Match": seen[0]})
+        assert response.status_code == 200
+        assert response.json()["name"] == "Renamed"
+
+    def test_other_rows_keep_detail_etag(self, client, admin_auth_headers, test_business):
+        """Test a write elsewhere in the collection changes the list's tag but not the business's."""
+        detail = client.get(f"/businesses/{test_business.id}", headers=admin_auth_headers).headers["ETag"]
+        listing = client.get("/businesses/", headers=admin_auth_headers).headers["ETag"]
+        client.post(
+            "/businesses/bulk", content=json.dumps({"name": "Imported"}).encode(),
+            headers={**admin_auth_headers, "Content-Type": "application/x-ndjson"}
+        )
+
+        response = client.get(f"/businesses/{test_business.id}", headers={**admin_auth_headers, "If-None-Match": detail})
+        assert response.status_code == 304
+        assert response.headers["Last-Modified"].endswith(" GMT")
+        assert client.get("/businesses/", headers={**admin_auth_headers, "If-None-Match": listing}).status_code == 200
+
+    def test_denied_resource_is_forbidden(self, client, db_session, auth_headers, test_admin_user, test_super_accountant):
+        """Test a caller without access gets its 403 rather than a 304 that confirms the resource."""
+        business = Business(name="Not Yours", owner_id=test_admin_user.id)
+        db_session.add(business)
+        db_session.commit()
+        for path in (f"/businesses/{business.id}", f"/accountants/{test_super_accountant.id}"):
+            response = client.get(path, headers={**auth_headers, "If-None-Match": "*"})
+
+            assert response.status_code == 403
+            assert "ETag" not in response.headers
+
+    def test_missing_resource_is_not_found(self, client, admin_auth_headers):
+        """Test a detail request for a missing row still gets its 404."""
+        response = client.get("/users/missing", headers={**admin_auth_headers, "If-None-Match": "*"})
+
+        assert response.status_code == 404
+
+    def test_unchanged_rows_do_not_bump(self, db_session, test_business):
+        """Test flushing an object without changes leaves the version alone."""
+        before = business_version(db_session)
+        business = db_session.get(Business, test_business.id)
+        business.name = business.name
+        db_session.commit()
+
+        assert business_version(db_session) == before
+
+    def test_versions_are_counted_at_commit(self, db_session, test_business):
+        """Test a flushed write is counted once its transaction commits, and not after a rollback."""
+        before = business_version(db_session)
+        business = db_session.get(Business, test_business.id)
+        business.name = "Flushed"
+        db_session.flush()
+        assert db_session.execute(version_query(BUSINESSES)).one().version == before
+
+        db_session.rollback()
+        db_session.commit()
+        assert business_version(db_session) == before
+
+        business = db_session.get(Business, test_business.id)
+        business.name = "Committed"
+        db_session.commit()
+        assert business_version(db_session) == before + 1
+
+    def test_user_changes_reach_embedding_collections(self, client, admin_auth_headers, test_user, test_accountant):
+        """Test a user update invalidates accountant responses that embed the user."""
+        before = client.get("/accountants/", headers=admin_auth_headers).headers["ETag"]
+        client.put(f"/users/{test_user.id}", json={"email": "renamed@example.com"}, headers=admin_auth_headers)
+
+        response = client.get("/accountants/", headers={**admin_auth_headers, "If-None-Match": before})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != before
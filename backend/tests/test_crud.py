@@ -1,21 +1,24 @@
 import pytest
+from sqlalchemy import inspect
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 from app.crud import (
     # User CRUD
-    create_user, get_user, get_user_by_username, get_users, update_user, delete_user,
+    create_user, get_user, get_user_by_username, get_users, count_users, user_role_counts,
+    update_user, delete_user,
     # Accountant CRUD
     create_accountant, get_accountant, get_accountant_by_user_id, get_accountants,
     get_accountants_by_super, get_independent_accountants, update_accountant, delete_accountant,
     # Business CRUD
-    create_business, get_business, get_businesses, get_businesses_by_owner,
-    get_businesses_by_accountant, update_business, delete_business,
+    create_business, get_business, get_businesses, count_businesses, get_businesses_by_owner,
+    get_businesses_by_accountant, count_businesses_by_accountant, update_business, delete_business,
     # Role management
     assign_super_accountant, remove_super_accountant, assign_accountant_to_business,
     remove_accountant_from_business, get_user_businesses
 )
 from app.models import User, Accountant, Business, BusinessFinancialMetrics, BusinessMetrics
 from app.auth import get_password_hash
+from app.pagination import encode_cursor
 
 # Add markers to all test methods
 pytestmark = [
@@ -171,6 +174,69 @@ class TestUserCRUD:
         # Verify different users
         assert users_page1[0].username != users_page2[0].username
     
+    def test_get_users_with_cursor(self, db_session):
+        """Test keyset pagination walks every user exactly once."""
+        for i in range(5):
+            db_session.add(User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x", role="accountant"))
+        db_session.commit()
+        
+        seen = []
+        after = None
+        while True:
+            page = get_users(db_session, limit=2, after=after)
+            seen.extend(user.id for user in page)
+            if len(page) < 2:
+                break
+            after = encode_cursor(page[-1].created_at, page[-1].id)
+        
+        assert seen == [user.id for user in get_users(db_session, limit=100)]
+        assert len(set(seen)) == 5
+    
+    def test_search_and_filter_users(self, db_session):
+        """Test q matches username, email and accountant name, combined with role and is_active."""
+        alice = User(username="alice", email="a@example.com", hashed_password="x", role="accountant")
+        bob = User(username="bob", email="bob@smith.example.com", hashed_password="x", role="super_accountant")
+        carol = User(username="carol", email="c@example.com", hashed_password="x", role="accountant", is_active=False)
+        db_session.add_all([alice, bob, carol])
+        db_session.commit()
+        db_session.add(Accountant(user_id=carol.id, first_name="Caroline", last_name="Smith"))
+        db_session.commit()
+        
+        assert {user.id for user in get_users(db_session, q="SMITH")} == {bob.id, carol.id}
+        assert [user.id for user in get_users(db_session, q="smith", role="accountant")] == [carol.id]
+        assert [user.id for user in get_users(db_session, is_active=True, role="accountant")] == [alice.id]
+        assert count_users(db_session, role="accountant") == 2
+    
+    def test_search_users_treats_wildcards_literally(self, db_session):
+        """Test _ and % in q match themselves rather than any character."""
+        plain = User(username="alice", email="a@example.com", hashed_password="x", role="accountant")
+        db_session.add(plain)
+        db_session.commit()
+        
+        assert get_users(db_session, q="_") == []
+        assert get_users(db_session, q="%") == []
+        
+        underscored = User(username="bob_smith", email="b@example.com", hashed_password="x", role="accountant")
+        db_session.add(underscored)
+        db_session.commit()
+        
+        assert [user.id for user in get_users(db_session, q="_")] == [underscored.id]
+    
+    def test_user_role_counts(self, db_session):
+        """Test role counts include roles nobody holds."""
+        db_session.add_all([
+            User(username="a", email="a@example.com", hashed_password="x", role="accountant"),
+            User(username="b", email="b@example.com", hashed_password="x", role="accountant", is_active=False),
+            User(username="c", email="c@example.com", hashed_password="x", role="root_admin"),
+        ])
+        db_session.commit()
+        
+        assert user_role_counts(db_session) == {
+            "total": 3,
+            "active": 2,
+            "roles": {"root_admin": 1, "super_accountant": 0, "accountant": 2},
+        }
+    
     def test_update_user_success(self, db_session):
         """Test successful user update."""
         # Create a user
@@ -456,6 +522,125 @@ class TestBusinessCRUD:
         assert len(businesses_page1) == 3
         assert len(businesses_page2) == 2  # Only 2 businesses left
     
+    def test_get_businesses_with_cursor(self, db_session, test_user, test_accountant):
+        """Test keyset pagination walks every business exactly once."""
+        for i in range(5):
+            business_data = {
+                "name": f"Business {i}",
+                "description": f"Business {i} description",
+                "owner_id": test_user.id,
+                "accountant_id": test_accountant.id,
+                "is_active": True
+            }
+            create_business(db_session, business_data)
+        
+        seen = []
+        after = None
+        while True:
+            page = get_businesses(db_session, limit=2, after=after)
+            seen.extend(business.id for business in page)
+            if len(page) < 2:
+                break
+            after = encode_cursor(page[-1].created_at, page[-1].id)
+        
+        all_ids = [business.id for business in get_businesses(db_session, limit=100)]
+        assert seen == all_ids
+        assert len(set(seen)) == 5
+    
+    def test_get_businesses_invalid_cursor(self, db_session):
+        """Test keyset pagination with a malformed cursor."""
+        with pytest.raises(HTTPException) as exc_info:
+            get_businesses(db_session, after="not-a-cursor")
+        
+        assert exc_info.value.status_code == 400
+    
+    def test_get_businesses_cursor_after_deleted_anchor(self, db_session, test_user):
+        """Test a cursor keeps its place after its anchor row is deleted, and needs its timestamp for that."""
+        for i in range(3):
+            create_business(db_session, {"name": f"Business {i}", "owner_id": test_user.id})
+        first, second, third = get_businesses(db_session, limit=3)
+        after = encode_cursor(first.created_at, first.id)
+        
+        delete_business(db_session, first.id)
+        
+        assert [business.id for business in get_businesses(db_session, after=after)] == [second.id, third.id]
+        with pytest.raises(HTTPException) as exc_info:
+            get_businesses(db_session, after=encode_cursor(None, second.id))
+        assert exc_info.value.status_code == 400
+    
+    def test_get_businesses_card_view(self, db_session, test_business):
+        """Test the card view loads only what the business card renders."""
+        db_session.expire_all()
+        businesses = get_businesses(db_session, view="card")
+        
+        assert len(businesses) == 1
+        unloaded = inspect(businesses[0]).unloaded
+        assert "accountants" not in unloaded
+        assert "financial_metrics" not in unloaded
+        assert "metrics" not in unloaded
+        assert "owner" in unloaded
+        assert "accountant" in unloaded
+    
+    def test_get_businesses_unknown_view(self, db_session):
+        """Test business retrieval with an unknown loading profile."""
+        with pytest.raises(HTTPException) as exc_info:
+            get_businesses(db_session, view="everything")
+        
+        assert exc_info.value.status_code == 400
+    
+    def test_search_businesses(self, db_session, test_user):
+        """Test name and description search through the full-text index."""
+        acme = create_business(db_session, {"name": "Acme Accounting", "owner_id": test_user.id})
+        create_business(db_session, {"name": "Zeta", "description": "Acme supplier", "owner_id": test_user.id})
+        create_business(db_session, {"name": "Unrelated", "owner_id": test_user.id})
+        
+        assert {business.name for business in get_businesses(db_session, q="acme")} == {"Acme Accounting", "Zeta"}
+        assert [business.id for business in get_businesses(db_session, q="acc")] == [acme.id]
+        assert count_businesses(db_session, q="acme") == 2
+        
+        # The index follows renames and deletes
+        update_business(db_session, acme.id, {"name": "Renamed"})
+        assert get_businesses(db_session, q="accounting") == []
+        delete_business(db_session, acme.id)
+        assert get_businesses(db_session, q="renamed") == []
+    
+    def test_filter_businesses(self, db_session, test_user, test_accountant):
+        """Test is_active, accountant and owner filters combine."""
+        managed = create_business(db_session, {"name": "Managed", "owner_id": test_user.id, "accountant_id": test_accountant.id})
+        create_business(db_session, {"name": "Inactive", "owner_id": test_user.id, "accountant_id": test_accountant.id, "is_active": False})
+        create_business(db_session, {"name": "Unmanaged", "owner_id": test_user.id})
+        
+        results = get_businesses(db_session, is_active=True, accountant_id=test_accountant.id, owner_id=test_user.id)
+        
+        assert [business.id for business in results] == [managed.id]
+        assert count_businesses(db_session, is_active=False) == 1
+    
+    def test_sort_businesses(self, db_session, test_user):
+        """Test sorting by name and by latest metrics."""
+        small = create_business(db_session, {"name": "B", "owner_id": test_user.id})
+        large = create_business(db_session, {"name": "A", "owner_id": test_user.id})
+        db_session.add_all([
+            BusinessFinancialMetrics(business_id=small.id, revenue=10, net_profit=5),
+            BusinessFinancialMetrics(business_id=large.id, revenue=90, net_profit=1),
+            BusinessMetrics(business_id=small.id, documents_due=3),
+        ])
+        db_session.commit()
+        
+        assert [b.id for b in get_businesses(db_session, sort="name")] == [large.id, small.id]
+        assert [b.id for b in get_businesses(db_session, sort="-revenue")] == [large.id, small.id]
+        assert [b.id for b in get_businesses(db_session, sort="-net_profit")] == [small.id, large.id]
+        assert [b.id for b in get_businesses(db_session, sort="documents_due")] == [large.id, small.id]
+    
+    def test_sort_businesses_invalid(self, db_session):
+        """Test unknown sorts and cursors with a non-default sort are rejected."""
+        with pytest.raises(HTTPException) as exc_info:
+            get_businesses(db_session, sort="popularity")
+        assert exc_info.value.status_code == 400
+        
+        with pytest.raises(HTTPException) as exc_info:
+            get_businesses(db_session, sort="name", after=encode_cursor(None, "x"))
+        assert exc_info.value.status_code == 400
+    
     def test_get_businesses_by_owner(self, db_session, test_user, test_accountant):
         """Test business retrieval by owner."""
         # Create businesses for the test user
@@ -476,6 +661,37 @@ class TestBusinessCRUD:
         for business in owned_businesses:
             assert business.owner_id == test_user.id
     
+    def test_get_businesses_by_accountant(self, db_session, test_user, test_accountant):
+        """Test primary and assigned businesses are deduplicated and paginated in SQL."""
+        other_user = User(
+            username="other",
+            email="other@example.com",
+            hashed_password=get_password_hash("password"),
+            role="accountant"
+        )
+        db_session.add(other_user)
+        db_session.commit()
+        other_accountant = Accountant(user_id=other_user.id, first_name="Other", last_name="Accountant")
+        db_session.add(other_accountant)
+        db_session.commit()
+        
+        # Primary only, primary and assigned, assigned only, unrelated
+        primary = create_business(db_session, {"name": "Primary", "owner_id": test_user.id, "accountant_id": test_accountant.id})
+        both = create_business(db_session, {"name": "Both", "owner_id": test_user.id, "accountant_id": test_accountant.id})
+        assigned = create_business(db_session, {"name": "Assigned", "owner_id": test_user.id, "accountant_id": other_accountant.id})
+        create_business(db_session, {"name": "Unrelated", "owner_id": test_user.id, "accountant_id": other_accountant.id})
+        both.accountants.append(test_accountant)
+        assigned.accountants.append(test_accountant)
+        db_session.commit()
+        
+        page1 = get_businesses_by_accountant(db_session, test_accountant.id, skip=0, limit=2)
+        page2 = get_businesses_by_accountant(db_session, test_accountant.id, skip=2, limit=2)
+        
+        assert len(page1) == 2
+        assert len(page2) == 1
+        assert {b.id for b in page1 + page2} == {primary.id, both.id, assigned.id}
+        assert count_businesses_by_accountant(db_session, test_accountant.id) == 3
+    
     def test_update_business_success(self, db_session, test_business):
         """Test successful business update."""
         update_data = {
@@ -0,0 +1,161 @@
+import pytest
+from datetime import date
+from fastapi import HTTPException
+from app import crud_async
+from app.pagination import encode_cursor
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.unit,
+    pytest.mark.crud,
+    pytest.mark.asyncio
+]
+
+async def create_owner_and_accountant(db):
+    """Create an owner user and an accountant profile for business tests."""
+    owner = await crud_async.create_user(db, {
+        "username": "owner",
+        "email": "owner@example.com",
+        "password": "ownerpassword",
+        "role": "accountant"
+    })
+    accountant = await crud_async.create_accountant(db, {
+        "user_id": owner.id,
+        "first_name": "Async",
+        "last_name": "Accountant"
+    })
+    return owner, accountant
+
+class TestAsyncUserCRUD:
+    """Test async user CRUD operations."""
+
+    async def test_create_and_get_user(self, async_db_session):
+        """Test creating a user and reading it back."""
+        user = await crud_async.create_user(async_db_session, {
+            "username": "asyncuser",
+            "email": "asyncuser@example.com",
+            "password": "asyncpassword",
+            "role": "accountant"
+        })
+
+        assert user.id is not None
+        assert user.created_at is not None
+        assert user.hashed_password.startswith("$2b$")
+
+        retrieved = await crud_async.get_user(async_db_session, user.id)
+        assert retrieved.username == "asyncuser"
+        assert await crud_async.get_user_by_username(async_db_session, "asyncuser") is retrieved
+
+    async def test_create_user_duplicate(self, async_db_session):
+        """Test async user creation with duplicate username."""
+        user_data = {
+            "username": "duplicate",
+            "email": "duplicate@example.com",
+            "password": "password123",
+            "role": "accountant"
+        }
+        await crud_async.create_user(async_db_session, user_data)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await crud_async.create_user(async_db_session, dict(user_data, email="other@example.com"))
+
+        assert exc_info.value.status_code == 400
+
+    async def test_update_and_delete_user(self, async_db_session):
+        """Test async user update and deletion."""
+        user = await crud_async.create_user(async_db_session, {
+            "username": "changeme",
+            "email": "changeme@example.com",
+            "password": "password123",
+            "role": "accountant"
+        })
+
+        updated = await crud_async.update_user(async_db_session, user.id, {"role": "super_accountant", "email": None})
+        assert updated.role == "super_accountant"
+        assert updated.email == "changeme@example.com"
+
+        await crud_async.delete_user(async_db_session, user.id)
+        with pytest.raises(HTTPException) as exc_info:
+            await crud_async.get_user(async_db_session, user.id)
+
+        assert exc_info.value.status_code == 404
+
+class TestAsyncBusinessCRUD:
+    """Test async business CRUD operations."""
+
+    async def test_get_businesses_cursor_and_view(self, async_db_session):
+        """Test keyset pagination and loading profiles on the async path."""
+        owner, accountant = await create_owner_and_accountant(async_db_session)
+        for i in range(3):
+            await crud_async.create_business(async_db_session, {
+                "name": f"Async Business {i}",
+                "owner_id": owner.id,
+                "accountant_id": accountant.id
+            })
+
+        page1 = await crud_async.get_businesses(async_db_session, limit=2, view="card")
+        cursor = encode_cursor(page1[-1].created_at, page1[-1].id)
+        page2 = await crud_async.get_businesses(async_db_session, limit=2, after=cursor, view="card")
+
+        assert len(page1) == 2
+        assert len(page2) == 1
+        assert page1[0].metrics == []
+        assert {b.id for b in page1 + page2} == {b.id for b in await crud_async.get_businesses(async_db_session)}
+
+    async def test_assign_and_remove_accountant(self, async_db_session):
+        """Test the many-to-many assignment on the async path."""
+        owner, accountant = await create_owner_and_accountant(async_db_session)
+        business = await crud_async.create_business(async_db_session, {
+            "name": "Assigned Business",
+            "owner_id": owner.id
+        })
+
+        await crud_async.assign_accountant_to_business(async_db_session, business.id, accountant.id)
+        business = await crud_async.get_business(async_db_session, business.id)
+        assert [acc.id for acc in business.accountants] == [accountant.id]
+        assert await crud_async.count_businesses_by_accountant(async_db_session, accountant.id) == 1
+
+        managed = await crud_async.get_businesses_by_accountant(async_db_session, accountant.id)
+        assert [b.id for b in managed] == [business.id]
+
+        await crud_async.remove_accountant_from_business(async_db_session, business.id, accountant.id)
+        assert not await crud_async.is_business_assigned_to_user(async_db_session, business.id, owner.id)
+        assert await crud_async.count_businesses_by_accountant(async_db_session, accountant.id) == 0
+
+    async def test_update_and_delete_business(self, async_db_session):
+        """Test async business update and deletion."""
+        owner, accountant = await create_owner_and_accountant(async_db_session)
+        business = await crud_async.create_business(async_db_session, {
+            "name": "Old Name",
+            "owner_id": owner.id
+        })
+
+        updated = await crud_async.update_business(async_db_session, business.id, {"name": "New Name"})
+        assert updated.name == "New Name"
+        assert updated.updated_at is not None
+
+        await crud_async.delete_business(async_db_session, business.id)
+        with pytest.raises(HTTPException) as exc_info:
+            await crud_async.get_business(async_db_session, business.id)
+
+        assert exc_info.value.status_code == 404
+
+    async def test_financial_history(self, async_db_session):
+        """Test async recording and downsampling of financial history."""
+        owner, _ = await create_owner_and_accountant(async_db_session)
+        business = await crud_async.create_business(async_db_session, {"name": "History", "owner_id": owner.id})
+        # The rejected row's rollback expires the business
+        business_id = business.id
+        for month, revenue in ((1, 100), (2, 100), (4, 250)):
+            await crud_async.record_financial_history(
+                async_db_session, business_id, {"period": date(2024, month, 10), "revenue": revenue}
+            )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await crud_async.record_financial_history(async_db_session, business_id, {"period": date(2024, 4, 1)})
+        assert exc_info.value.status_code == 409
+
+        history = await crud_async.get_financial_history(async_db_session, interval="quarter", business_id=business_id)
+        assert [(point["period"], point["revenue"], point["percentage_change_revenue"]) for point in history["points"]] == [
+            (date(2024, 1, 1), 200, None), (date(2024, 4, 1), 250, 25.0)
+        ]
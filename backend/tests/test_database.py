@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from app.database import (
+    to_async_url, engine_options, create_db_engine, pool_status
+)
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.unit
+]
+
+class TestEngineFactory:
+    """Test config-driven engine construction."""
+    
+    def test_to_async_url(self):
+        """Test sync URLs map onto their async drivers."""
+        assert to_async_url("sqlite:///./apex_am.db") == "sqlite+aiosqlite:///./apex_am.db"
+        assert to_async_url("postgresql://u:p@db/apex") == "postgresql+asyncpg://u:p@db/apex"
+        assert to_async_url("postgresql+psycopg2://u:p@db/apex") == "postgresql+asyncpg://u:p@db/apex"
+        
+        with pytest.raises(ValueError):
+            to_async_url("oracle://u:p@db/apex")
+    
+    def test_postgres_options(self):
+        """Test Postgres gets pool tuning and a statement timeout."""
+        options = engine_options("postgresql://u:p@db/apex")
+        
+        assert options["pool_pre_ping"] is True
+        assert "pool_size" in options and "max_overflow" in options and "pool_recycle" in options
+        assert "statement_timeout" in options["connect_args"]["options"]
+        
+        async_options = engine_options("postgresql+asyncpg://u:p@db/apex", is_async=True)
+        assert "statement_timeout" in async_options["connect_args"]["server_settings"]
+    
+    def test_sqlite_file_options(self):
+        """Test file-backed SQLite gets a queue pool and a busy timeout."""
+        assert engine_options("sqlite:///./apex_am.db")["poolclass"] is QueuePool
+        assert engine_options("sqlite+aiosqlite:///./apex_am.db", is_async=True)["poolclass"] is AsyncAdaptedQueuePool
+        assert "poolclass" not in engine_options("sqlite:///:memory:")
+    
+    def test_sqlite_pragmas_applied(self, tmp_path):
+        """Test WAL mode and busy_timeout are set on new SQLite connections."""
+        db_engine = create_db_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+        try:
+            with db_engine.connect() as conn:
+                assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+                assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
+            
+            stats = pool_status(db_engine)
+            assert stats["backend"] == "sqlite"
+            assert stats["pool_class"] == "QueuePool"
+            assert stats["checkedout"] == 0
+        finally:
+            db_engine.dispose()
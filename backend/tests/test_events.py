@@ -0,0 +1,146 @@
+import asyncio
+import json
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.crud import assign_accountant_to_business, create_business, delete_business, get_changes
+from app.events import ChangeStream, LocalBroker, Subscriber, change_stream, event_stream, format_event
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.asyncio
+]
+
+@pytest.fixture
+def stream(db_session, monkeypatch):
+    """The worker's change stream, reading the test database."""
+    monkeypatch.setattr(change_stream, "session_factory", sessionmaker(bind=db_session.get_bind()))
+    yield change_stream
+    for subscriber in list(change_stream.subscribers):
+        change_stream.unsubscribe(subscriber)
+
+async def drain(subscriber: Subscriber) -> list:
+    """Events queued for ``subscriber`` once the dispatcher has caught up."""
+    await asyncio.sleep(0.05)
+    events = []
+    while not subscriber.queue.empty():
+        change = subscriber.queue.get_nowait()
+        events.append((change["table_name"], change["operation"], change["business_id"]))
+    return events
+
+def parse(event: bytes) -> dict:
+    fields = dict(line.split(": ", 1) for line in event.decode().strip().split("\n"))
+    return {"id": int(fields["id"]), "event": fields["event"], "data": json.loads(fields["data"])}
+
+class TestChangeEvents:
+    """Test the change stream dispatcher and the server-sent event stream."""
+
+    async def test_commits_reach_subscribers_that_may_see_them(
+        self, stream, db_session, test_user, test_accountant, test_admin_user, test_super_accountant
+    ):
+        """Test admins see everything and accountants their own and assigned businesses."""
+        admin = Subscriber(test_admin_user.id, "root_admin")
+        owner = Subscriber(test_user.id, "accountant", test_accountant.id)
+        assigned = Subscriber(test_super_accountant.user_id, "accountant", test_super_accountant.id)
+        for subscriber in (admin, owner, assigned):
+            await stream.subscribe(subscriber)
+
+        own = create_business(db_session, {"name": "Own", "owner_id": test_user.id})
+        other = create_business(db_session, {"name": "Other", "owner_id": test_admin_user.id})
+        assign_accountant_to_business(db_session, other.id, test_super_accountant.id)
+
+        assert await drain(admin) == [
+            ("businesses", "insert", own.id), ("businesses", "insert", other.id),
+            ("business_accountant", "insert", other.id),
+        ]
+        assert await drain(owner) == [("businesses", "insert", own.id)]
+        # Visibility is checked as the batch is sent, after the assignment committed
+        assert await drain(assigned) == [("businesses", "insert", other.id), ("business_accountant", "insert", other.id)]
+
+        delete_business(db_session, own.id)
+        delete_business(db_session, other.id)
+        # Deletes reach whoever could see the business when it was deleted
+        assert await drain(owner) == [("businesses", "delete", own.id)]
+        assert await drain(assigned) == [("businesses", "delete", other.id)]
+
+    async def test_stream_replays_then_follows(self, stream, db_session, test_user, test_admin_user):
+        """Test a reconnecting client gets missed events once, then live ones, with heartbeats."""
+        cursor = get_changes(db_session)["cursor"]
+        missed = create_business(db_session, {"name": "Missed", "owner_id": test_user.id})
+        events = event_stream(stream, Subscriber(test_admin_user.id, "root_admin"), since=cursor, heartbeat_interval=0.2)
+
+        assert (await events.__anext__()).startswith(b"retry: ")
+        replayed = parse(await events.__anext__())
+        assert (replayed["event"], replayed["data"]["business_id"], replayed["data"]["data"]["name"]) == (
+            "businesses", missed.id, "Missed"
+        )
+        assert "owner_id" not in replayed["data"]
+        live = create_business(db_session, {"name": "Live", "owner_id": test_user.id})
+        followed = parse(await asyncio.wait_for(events.__anext__(), 1))
+        assert (followed["data"]["business_id"], followed["id"]) == (live.id, replayed["id"] + 1)
+        assert await asyncio.wait_for(events.__anext__(), 1) == b": keep-alive\n\n"
+        await events.aclose()
+
+        assert stream.subscribers == set()
+
+    async def test_stream_ends_when_no_longer_authorized(self, stream, test_admin_user):
+        """Test the stream re-checks authorization at each heartbeat and ends once it fails."""
+        authorized = [True]
+        events = event_stream(
+            stream, Subscriber(test_admin_user.id, "root_admin"), heartbeat_interval=0.05,
+            still_authorized=lambda db: authorized[0]
+        )
+        await events.__anext__()
+        assert await asyncio.wait_for(events.__anext__(), 1) == b": keep-alive\n\n"
+
+        authorized[0] = False
+        with pytest.raises(StopAsyncIteration):
+            await asyncio.wait_for(events.__anext__(), 1)
+        assert stream.subscribers == set()
+
+    async def test_slow_client_is_disconnected(self, db_session, test_user):
+        """Test a client whose queue fills up stops getting events and its stream ends."""
+        stream = ChangeStream(LocalBroker(), sessionmaker(bind=db_session.get_bind()), poll_interval=0.01)
+        subscriber = Subscriber(test_user.id, "root_admin", queue_size=1)
+        events = event_stream(stream, subscriber, heartbeat_interval=1)
+        await events.__anext__()
+
+        for name in ("First", "Second"):
+            create_business(db_session, {"name": name, "owner_id": test_user.id})
+        await asyncio.sleep(0.1)
+
+        assert subscriber.overflowed and subscriber.queue.qsize() == 1
+        with pytest.raises(StopAsyncIteration):
+            await asyncio.wait_for(events.__anext__(), 1)
+        assert stream.subscribers == set()
+
+    async def test_dispatcher_survives_failed_reads(self, db_session, test_user):
+        """Test a read that fails is logged and retried without losing events or stopping the dispatcher."""
+        factory = sessionmaker(bind=db_session.get_bind())
+        failures = []
+
+        def flaky_factory():
+            if failures:
+                failures.pop()
+                raise RuntimeError("database unavailable")
+            return factory()
+
+        stream = ChangeStream(LocalBroker(), flaky_factory, poll_interval=0.01)
+        subscriber = Subscriber(test_user.id, "root_admin")
+        await stream.subscribe(subscriber)
+        failures.append(True)
+        business = create_business(db_session, {"name": "Retried", "owner_id": test_user.id})
+
+        assert await drain(subscriber) == [("businesses", "insert", business.id)]
+        assert not failures and not stream._task.done()
+        stream.unsubscribe(subscriber)
+
+    async def test_format_event(self):
+        """Test events are named after their table and carry their cursor as id."""
+        event = format_event({"id": 7, "table_name": "business_metrics", "business_id": "b1"})
+
+        assert event == b'id: 7\nevent: business_metrics\ndata: {"id":7,"table_name":"business_metrics","business_id":"b1"}\n\n'
+
+def test_stream_requires_authentication(client):
+    """Test the stream endpoint rejects anonymous clients."""
+    assert client.get("/changes/stream").status_code == 401
@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.crud import create_business, export_businesses
+from app.exports import EXPORT_COLUMNS, export_query, iter_export
+from app.models import BusinessFinancialMetrics, BusinessMetrics
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.integration
+]
+
+def ndjson_rows(body: str) -> list:
+    return [json.loads(line) for line in body.splitlines()]
+
+class TestBusinessExport:
+    """Test GET /businesses/export."""
+
+    def test_ndjson_with_latest_metrics(self, client, db_session, admin_auth_headers, test_business):
+        """Test that each business is exported once, with its latest metrics."""
+        later = datetime.now(timezone.utc) + timedelta(days=1)
+        db_session.add_all([
+            BusinessFinancialMetrics(business_id=test_business.id, revenue=100),
+            BusinessFinancialMetrics(business_id=test_business.id, revenue=250, created_at=later),
+            BusinessMetrics(business_id=test_business.id, documents_due=4),
+        ])
+        db_session.commit()
+
+        response = client.get("/businesses/export", headers=admin_auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert 'filename="businesses.ndjson"' in response.headers["content-disposition"]
+        (row,) = ndjson_rows(response.text)
+        assert list(row) == list(EXPORT_COLUMNS)
+        assert (row["id"], row["revenue"], row["documents_due"]) == (test_business.id, 250, 4)
+
+    def test_csv_and_filters(self, client, db_session, admin_auth_headers, test_user):
+        """Test the CSV header, quoting, nulls for missing metrics and list filters."""
+        create_business(db_session, {"name": "Acme, Ltd", "description": "Line one\nline two", "owner_id": test_user.id})
+        create_business(db_session, {"name": "Dormant", "owner_id": test_user.id, "is_active": False})
+
+        response = client.get("/businesses/export?format=csv&is_active=true", headers=admin_auth_headers)
+
+        assert response.headers["content-type"].startswith("text/csv")
+        header, *rows = list(csv.reader(io.StringIO(response.text)))
+        assert header == list(EXPORT_COLUMNS)
+        (row,) = rows
+        row = dict(zip(header, row))
+        assert (row["name"], row["description"]) == ("Acme, Ltd", "Line one\nline two")
+        assert row["revenue"] == ""
+
+    def test_scope_and_format(self, client, db_session, auth_headers, test_user, test_admin_user):
+        """Test that accountants only export businesses they own and that the format is checked."""
+        create_business(db_session, {"name": "Mine", "owner_id": test_user.id})
+        create_business(db_session, {"name": "Theirs", "owner_id": test_admin_user.id})
+
+        response = client.get("/businesses/export", headers=auth_headers)
+        assert [row["name"] for row in ndjson_rows(response.text)] == ["Mine"]
+
+        response = client.get("/businesses/export?format=xml", headers=auth_headers)
+        assert response.status_code == 400
+
+def test_chunks_span_partitions(db_session, test_user):
+    """Test that output is chunked and rows come out in (created_at, id) order."""
+    start = datetime.now(timezone.utc)
+    for i in range(30):
+        create_business(db_session, {"name": f"B{i:02d}", "owner_id": test_user.id, "created_at": start + timedelta(seconds=i)})
+
+    chunks = list(iter_export(db_session, export_query(), "ndjson", chunk_size=256))
+
+    assert len(chunks) > 1
+    names = [row["name"] for row in ndjson_rows(b"".join(chunks).decode())]
+    assert names == [f"B{i:02d}" for i in range(30)]
+    # An empty export still writes the CSV header
+    assert b"".join(export_businesses(db_session, "csv", owner_id="nobody")).decode().splitlines() == [",".join(EXPORT_COLUMNS)]
@@ -0,0 +1,129 @@
+import threading
+import pytest
+from fastapi import HTTPException
+from app.auth import authenticate_user
+from app.hashing import HashingPool, HashMetrics, build_context, hash_password, hashing_pool, verify_and_update
+from app.models import User
+from app.versions import USERS, version_query
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.unit,
+    pytest.mark.auth
+]
+
+class TestRehash:
+    """Test that hashes at an old cost are upgraded."""
+    
+    def test_current_hash_not_replaced(self):
+        """Test that a hash at the configured cost needs no update."""
+        hashed = hash_password("testpassword")
+        
+        assert verify_and_update("testpassword", hashed) == (True, None)
+    
+    def test_old_cost_hash_replaced(self):
+        """Test that a hash at another cost verifies and comes back rehashed."""
+        hashed = build_context(5).hash("testpassword")
+        
+        verified, new_hash = verify_and_update("testpassword", hashed)
+        
+        assert verified is True
+        assert new_hash is not None and new_hash != hashed
+        assert verify_and_update("testpassword", new_hash) == (True, None)
+    
+    def test_wrong_password_not_replaced(self):
+        """Test that a failed verification never produces a new hash."""
+        hashed = build_context(5).hash("testpassword")
+        
+        assert verify_and_update("wrongpassword", hashed) == (False, None)
+    
+    def test_login_upgrades_stored_hash(self, db_session):
+        """Test that authenticate_user stores the upgraded hash."""
+        old_hash = build_context(5).hash("testpassword")
+        user = User(username="rehash", email="rehash@example.com", hashed_password=old_hash, role="accountant")
+        db_session.add(user)
+        db_session.commit()
+        
+        before = db_session.execute(version_query(USERS)).one()
+        
+        assert authenticate_user(db_session, "rehash@example.com", "testpassword", use_email=True) is not None
+        
+        db_session.refresh(user)
+        assert user.hashed_password != old_hash
+        assert verify_and_update("testpassword", user.hashed_password) == (True, None)
+        # A new hash changes nothing any response shows
+        assert db_session.execute(version_query(USERS)).one() == before
+        assert user.updated_at is None
+
+class TestHashingPool:
+    """Test pool admission and metrics."""
+    
+    def test_rejects_when_full(self):
+        """Test that callers get a 429 with Retry-After once every slot is taken."""
+        pool = HashingPool(workers=0, queue_size=0, retry_after=3)
+        started, release = threading.Event(), threading.Event()
+        
+        def block():
+            started.set()
+            release.wait(5)
+        
+        thread = threading.Thread(target=pool.run, args=("hash", block))
+        thread.start()
+        started.wait(5)
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                pool.run("hash", lambda: None)
+        finally:
+            release.set()
+            thread.join()
+        
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.headers["Retry-After"] == "3"
+        assert pool.status()["operations"]["hash"]["rejected"] == 1
+        assert pool.status()["in_flight"] == 0
+    
+    def test_records_latency(self):
+        """Test that completed operations are counted with percentiles."""
+        pool = HashingPool(workers=0, queue_size=4)
+        
+        assert pool.run("verify", lambda a, b: a + b, 1, 2) == 3
+        
+        stats = pool.status()["operations"]["verify"]
+        assert stats["count"] == 1
+        assert stats["rejected"] == 0
+        assert {"p50_ms", "p95_ms", "p99_ms", "max_ms"} <= set(stats)
+
+    def test_percentiles(self):
+        """Test percentile selection over the sample window."""
+        metrics = HashMetrics(window=100)
+        for ms in range(1, 101):
+            metrics.record("hash", ms / 1000)
+        
+        stats = metrics.snapshot()["hash"]
+        assert stats["p50_ms"] == 51.0
+        assert stats["p99_ms"] == 99.0
+        assert stats["max_ms"] == 100.0
+
+class TestHashingBackpressure:
+    """Test that user endpoints pass the pool's 429 on to clients."""
+    
+    def test_create_user_when_pool_full(self, client, admin_auth_headers):
+        """Test creating a user while every hashing slot is taken returns 429 with Retry-After."""
+        for _ in range(hashing_pool.capacity):
+            hashing_pool._slots.acquire()
+        try:
+            response = client.post("/users/", json={
+                "username": "busy", "email": "busy@example.com", "role": "accountant", "password": "busypassword"
+            }, headers=admin_auth_headers)
+        finally:
+            for _ in range(hashing_pool.capacity):
+                hashing_pool._slots.release()
+        
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == str(hashing_pool.retry_after)
+    
+    def test_update_user_keeps_http_errors(self, client, admin_auth_headers):
+        """Test errors raised as HTTP responses are not turned into 400s."""
+        response = client.put("/users/missing", json={"username": "x"}, headers=admin_auth_headers)
+        
+        assert response.status_code == 404
@@ -0,0 +1,154 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from app import crud_async
+from app.crud import (
+    assign_super_accountant, delete_accountant, get_accountant_descendants, get_accountant_subtree,
+    is_accountant_ancestor, remove_super_accountant, update_accountant
+)
+from app.hierarchy import check_accountant_hierarchy, rebuild_accountant_hierarchy
+from app.models import Accountant, Business, User
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.unit,
+    pytest.mark.crud
+]
+
+@pytest.fixture
+def tree(db_session):
+    """head -> (manager -> (senior -> junior), peer)"""
+    accountants = {}
+    parent_of = {"head": None, "manager": "head", "senior": "manager", "junior": "senior", "peer": "head"}
+    for name, parent in parent_of.items():
+        user = User(username=name, email=f"{name}@example.com", hashed_password="x", role="accountant")
+        db_session.add(user)
+        db_session.commit()
+        accountant = Accountant(
+            user_id=user.id,
+            last_name=name,
+            super_accountant_id=accountants[parent].id if parent else None
+        )
+        db_session.add(accountant)
+        db_session.commit()
+        accountants[name] = accountant
+    return accountants
+
+def descendant_names(db_session, accountant):
+    return [a.last_name for a in get_accountant_descendants(db_session, accountant.id)]
+
+def assert_in_step(db_session):
+    assert check_accountant_hierarchy(db_session.connection()) == {"missing": [], "extra": []}
+
+class TestAccountantHierarchy:
+    """Test the accountant hierarchy closure table."""
+
+    def test_descendants_and_ancestors(self, db_session, tree):
+        """Test descendants at every depth and the ancestor check."""
+        names = descendant_names(db_session, tree["head"])
+        # Nearest first
+        assert sorted(names[:2]) == ["manager", "peer"]
+        assert names[2:] == ["senior", "junior"]
+        assert descendant_names(db_session, tree["junior"]) == []
+        assert is_accountant_ancestor(db_session, tree["head"].id, tree["junior"].id)
+        assert not is_accountant_ancestor(db_session, tree["junior"].id, tree["head"].id)
+        assert not is_accountant_ancestor(db_session, tree["peer"].id, tree["junior"].id)
+        # Nobody is their own ancestor
+        assert not is_accountant_ancestor(db_session, tree["head"].id, tree["head"].id)
+        assert_in_step(db_session)
+
+    def test_move_subtree(self, db_session, tree):
+        """Test that moving an accountant carries their subordinates along."""
+        assign_super_accountant(db_session, tree["senior"].user_id, tree["peer"].id)
+
+        assert descendant_names(db_session, tree["peer"]) == ["senior", "junior"]
+        assert descendant_names(db_session, tree["manager"]) == []
+        assert is_accountant_ancestor(db_session, tree["head"].id, tree["junior"].id)
+        assert_in_step(db_session)
+
+        remove_super_accountant(db_session, tree["senior"].user_id)
+        assert not is_accountant_ancestor(db_session, tree["head"].id, tree["junior"].id)
+        assert descendant_names(db_session, tree["senior"]) == ["junior"]
+        assert_in_step(db_session)
+
+    def test_update_accountant_moves_subtree(self, db_session, tree):
+        """Test that update_accountant keeps the closure table current too."""
+        update_accountant(db_session, tree["junior"].id, {"super_accountant_id": tree["peer"].id})
+
+        assert descendant_names(db_session, tree["peer"]) == ["junior"]
+        assert_in_step(db_session)
+
+    def test_rejects_cycles(self, db_session, tree):
+        """Test that an accountant cannot report to themselves or a subordinate."""
+        for super_accountant in ("junior", "head"):
+            with pytest.raises(HTTPException) as exc_info:
+                assign_super_accountant(db_session, tree["head"].user_id, tree[super_accountant].id)
+            assert exc_info.value.status_code == 400
+
+    def test_delete_accountant(self, db_session, tree):
+        """Test that subordinates of a deleted accountant become their own subtree."""
+        delete_accountant(db_session, tree["manager"].id)
+
+        assert descendant_names(db_session, tree["head"]) == ["peer"]
+        assert descendant_names(db_session, tree["senior"]) == ["junior"]
+        assert_in_step(db_session)
+
+    def test_subtree_counts(self, db_session, tree):
+        """Test the nested subtree with business and team counts."""
+        owner = tree["head"].user_id
+        db_session.add_all([
+            Business(name="A", owner_id=owner, accountant_id=tree["junior"].id),
+            Business(name="B", owner_id=owner, accountant_id=tree["junior"].id),
+            Business(name="C", owner_id=owner, accountant_id=tree["peer"].id),
+        ])
+        db_session.commit()
+
+        subtree = get_accountant_subtree(db_session, tree["head"].id)
+
+        assert subtree["descendant_count"] == 4
+        assert subtree["subordinate_count"] == 2
+        assert subtree["team_business_count"] == 3
+        manager, peer = subtree["subordinates"]
+        assert (manager["last_name"], manager["depth"], manager["team_business_count"]) == ("manager", 1, 2)
+        assert peer["business_count"] == 1
+        assert manager["subordinates"][0]["subordinates"][0]["last_name"] == "junior"
+
+    def test_subtree_not_found(self, db_session):
+        """Test the subtree of an unknown accountant."""
+        with pytest.raises(HTTPException) as exc_info:
+            get_accountant_subtree(db_session, "missing")
+        assert exc_info.value.status_code == 404
+
+    def test_check_and_rebuild(self, db_session, tree):
+        """Test that the checker reports bulk changes and a rebuild repairs them."""
+        db_session.execute(
+            update(Accountant).where(Accountant.id == tree["junior"].id).values(super_accountant_id=tree["peer"].id)
+        )
+        db_session.commit()
+
+        differences = check_accountant_hierarchy(db_session.connection())
+        assert (tree["peer"].id, tree["junior"].id, 1) in differences["missing"]
+        assert (tree["senior"].id, tree["junior"].id, 1) in differences["extra"]
+
+        rebuild_accountant_hierarchy(db_session.connection())
+        assert_in_step(db_session)
+        assert descendant_names(db_session, tree["peer"]) == ["junior"]
+
+@pytest.mark.asyncio
+async def test_async_hierarchy(async_db_session):
+    """Test the async crud path maintains and queries the hierarchy."""
+    accountants = []
+    for name in ("lead", "member"):
+        user = await crud_async.create_user(async_db_session, {
+            "username": name, "email": f"{name}@example.com", "password": "password123", "role": "accountant"
+        })
+        accountants.append(await crud_async.create_accountant(async_db_session, {"user_id": user.id}))
+    lead, member = accountants
+
+    await crud_async.assign_super_accountant(async_db_session, member.user_id, lead.id)
+
+    assert await crud_async.is_accountant_ancestor(async_db_session, lead.id, member.id)
+    assert [a.id for a in await crud_async.get_accountant_descendants(async_db_session, lead.id)] == [member.id]
+    assert (await crud_async.get_accountant_subtree(async_db_session, lead.id))["descendant_count"] == 1
+    with pytest.raises(HTTPException):
+        await crud_async.assign_super_accountant(async_db_session, lead.user_id, member.id)
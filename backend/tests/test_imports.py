@@ -0,0 +1,105 @@
+import json
+import pytest
+from app.crud import get_accountant_summaries
+from app.imports import BusinessImporter, run_import
+from app.models import Business, BusinessFinancialMetrics, BusinessMetrics
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.integration
+]
+
+def ndjson(*rows) -> bytes:
+    return "\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode()
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+class TestBulkImport:
+    """Test POST /businesses/bulk."""
+
+    def test_ndjson_with_metrics(self, client, db_session, admin_auth_headers, test_admin_user, test_accountant):
+        """Test importing businesses with their financial and workload metrics."""
+        body = ndjson(
+            {"name": "Acme", "accountant_id": test_accountant.id, "revenue": 1000, "documents_due": 3},
+            {"name": "Globex", "is_active": False},
+        )
+        response = client.post(
+            "/businesses/bulk", content=body,
+            headers={**admin_auth_headers, "Content-Type": "application/x-ndjson"}
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"rows": 2, "inserted": 2, "failed": 0, "errors": [], "errors_truncated": False}
+        acme = db_session.query(Business).filter(Business.name == "Acme").one()
+        assert acme.owner_id == test_admin_user.id
+        assert db_session.query(BusinessFinancialMetrics).filter_by(business_id=acme.id).one().revenue == 1000
+        assert db_session.query(BusinessMetrics).filter_by(business_id=acme.id).one().accounting_year_end == "31/12/2024"
+        # Only rows with metrics columns get metrics rows
+        assert db_session.query(BusinessFinancialMetrics).count() == 1
+        # Core inserts still refresh the accountant summaries
+        (summary,) = get_accountant_summaries(db_session, accountant_id=test_accountant.id)
+        assert (summary["business_count"], summary["revenue"], summary["documents_due"]) == (1, 1000, 3)
+
+    def test_csv_with_quoted_newlines(self, client, db_session, admin_auth_headers):
+        """Test CSV records spanning lines and empty cells."""
+        body = (
+            "name,description,revenue,documents_due\r\n"
+            'Acme,"Line one\nline ""two""",500,\r\n'
+            "\r\n"
+            "Globex,,,2\r\n"
+        ).encode()
+        response = client.post("/businesses/bulk?format=csv", content=body, headers=admin_auth_headers)
+
+        assert response.json()["inserted"] == 2
+        acme = db_session.query(Business).filter(Business.name == "Acme").one()
+        assert acme.description == 'Line one\nline "two"'
+        globex = db_session.query(Business).filter(Business.name == "Globex").one()
+        assert globex.description is None
+        assert db_session.query(BusinessMetrics).filter_by(business_id=globex.id).one().documents_due == 2
+
+    def test_error_report(self, client, db_session, admin_auth_headers):
+        """Test that invalid rows are skipped and reported by row number."""
+        body = b"\n".join([
+            json.dumps({"name": "Good"}).encode(),
+            json.dumps({"description": "no name"}).encode(),
+            b"{not json",
+            json.dumps({"name": "Negative", "revenue": -1}).encode(),
+            json.dumps({"name": "Orphan", "accountant_id": "missing"}).encode(),
+            json.dumps({"name": "Typo", "revnue": 1}).encode(),
+        ])
+        response = client.post(
+            "/businesses/bulk", content=body,
+            headers={**admin_auth_headers, "Content-Type": "application/x-ndjson"}
+        )
+
+        report = response.json()
+        assert (report["rows"], report["inserted"], report["failed"]) == (6, 1, 5)
+        assert [error["row"] for error in report["errors"]] == [2, 3, 4, 5, 6]
+        assert report["errors"][0]["errors"] == [{"field": "name", "message": "field required"}]
+        assert report["errors"][3]["errors"][0]["field"] == "accountant_id"
+        assert db_session.query(Business).count() == 1
+
+    def test_requires_format_and_role(self, client, auth_headers, admin_auth_headers):
+        """Test the content type check and that accountants cannot import."""
+        response = client.post("/businesses/bulk", content=b"{}", headers=admin_auth_headers)
+        assert response.status_code == 415
+
+        response = client.post("/businesses/bulk?format=xml", content=b"{}", headers=admin_auth_headers)
+        assert response.status_code == 400
+
+        response = client.post("/businesses/bulk?format=ndjson", content=b"{}", headers=auth_headers)
+        assert response.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_batches_and_chunks(self, db_session, test_admin_user):
+        """Test records split across chunks and batches, with a multi-byte character on a boundary."""
+        data = ndjson(*({"name": f"Café {i}"} for i in range(25)))
+        importer = BusinessImporter(db_session, test_admin_user.id, "ndjson")
+
+        report = await run_import(importer, chunked(data, 7), batch_size=10)
+
+        assert report["inserted"] == 25
+        names = {name for (name,) in db_session.query(Business.name)}
+        assert names == {f"Café {i}" for i in range(25)}
@@ -0,0 +1,25 @@
+import pytest
+from init_db import BUSINESSES_PER_ACCOUNTANT, TEAM_SIZE, seed_scaled
+from app.hierarchy import check_accountant_hierarchy
+from app.models import Accountant, Business, BusinessFinancialMetrics, User
+from app.summaries import check_accountant_summaries
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.integration
+]
+
+def test_seed_scaled(db_session):
+    """Test that a scaled seed creates consistent accountants, teams and derived tables."""
+    scale = BUSINESSES_PER_ACCOUNTANT * TEAM_SIZE + 1
+
+    seed_scaled(db_session, scale, "hash", batch_size=100)
+
+    assert db_session.query(Business).count() == scale
+    assert db_session.query(BusinessFinancialMetrics).count() == scale
+    # One more accountant than a full team, plus the demo super accountant
+    assert db_session.query(Accountant).count() == TEAM_SIZE + 2
+    assert db_session.query(Accountant).filter(Accountant.is_super_accountant.is_(True)).count() == 3
+    assert {user.hashed_password for user in db_session.query(User)} == {"hash"}
+    assert check_accountant_hierarchy(db_session.connection()) == {"missing": [], "extra": []}
+    assert check_accountant_summaries(db_session.connection()) == []
@@ -0,0 +1,207 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+from app.models import Base
+from app.migrations import LOOKUP_INDEXES, MIGRATIONS, USER_LISTING_INDEXES, run_migrations
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.unit
+]
+
+@pytest.fixture
+def migration_engine():
+    """A private in-memory database, so migrations can alter its schema."""
+    db_engine = create_engine("sqlite://", poolclass=StaticPool)
+    yield db_engine
+    db_engine.dispose()
+
+def index_names(db_engine) -> set:
+    inspector = inspect(db_engine)
+    return {
+        index["name"]
+        for table in inspector.get_table_names()
+        for index in inspector.get_indexes(table)
+    }
+
+class TestMigrations:
+    """Test upgrading databases created by older releases."""
+
+    def test_fresh_database_records_all_migrations(self, migration_engine):
+        """Test migrations are no-ops on a schema created from the models."""
+        Base.metadata.create_all(bind=migration_engine)
+
+        assert run_migrations(migration_engine) == [version for version, _ in MIGRATIONS]
+        assert run_migrations(migration_engine) == []
+        assert set(LOOKUP_INDEXES) | set(USER_LISTING_INDEXES) <= index_names(migration_engine)
+
+    def test_creates_missing_lookup_indexes(self, migration_engine):
+        """Test the lookup indexes are added to a database that lacks them."""
+        Base.metadata.create_all(bind=migration_engine)
+        with migration_engine.begin() as connection:
+            for name in LOOKUP_INDEXES:
+                connection.execute(text(f"DROP INDEX {name}"))
+        assert not set(LOOKUP_INDEXES) & index_names(migration_engine)
+
+        run_migrations(migration_engine)
+
+        assert set(LOOKUP_INDEXES) <= index_names(migration_engine)
+
+    def test_creates_user_listing_indexes(self, migration_engine):
+        """Test the user listing indexes are added by their own step, not the shipped lookup one."""
+        assert not set(LOOKUP_INDEXES) & set(USER_LISTING_INDEXES)
+        Base.metadata.create_all(bind=migration_engine)
+        with migration_engine.begin() as connection:
+            for name in USER_LISTING_INDEXES:
+                connection.execute(text(f"DROP INDEX {name}"))
+
+        run_migrations(migration_engine)
+
+        assert set(USER_LISTING_INDEXES) <= index_names(migration_engine)
+
+    def test_adds_user_token_version(self, migration_engine):
+        """Test users.token_version is added with existing rows on version 0."""
+        with migration_engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE users (id VARCHAR PRIMARY KEY, username VARCHAR NOT NULL, "
+                "email VARCHAR NOT NULL, hashed_password VARCHAR NOT NULL, role VARCHAR NOT NULL)"
+            ))
+            connection.execute(text(
+                "INSERT INTO users VALUES ('u1', 'old', 'old@example.com', 'x', 'accountant')"
+            ))
+
+        run_migrations(migration_engine)
+
+        with migration_engine.connect() as connection:
+            assert connection.execute(text("SELECT token_version FROM users")).scalar() == 0
+
+    def test_indexes_existing_businesses_for_search(self, migration_engine):
+        """Test the search index is built from businesses written before it existed."""
+        Base.metadata.create_all(bind=migration_engine)
+        with migration_engine.begin() as connection:
+            connection.execute(text("DROP TABLE businesses_fts"))
+            for trigger in ("insert", "update", "delete"):
+                connection.execute(text(f"DROP TRIGGER businesses_fts_{trigger}"))
+            connection.execute(text(
+                "INSERT INTO businesses (id, name, owner_id) VALUES ('b1', 'Acme Accounting', 'u1')"
+            ))
+
+        run_migrations(migration_engine)
+
+        with migration_engine.connect() as connection:
+            matches = connection.execute(text(
+                "SELECT business_id FROM businesses_fts WHERE businesses_fts MATCH 'acme'"
+            )).scalars().all()
+        assert matches == ["b1"]
+
+    def test_fills_accountant_summaries(self, migration_engine):
+        """Test the summary table is created and filled from existing rows."""
+        Base.metadata.create_all(bind=migration_engine)
+        with migration_engine.begin() as connection:
+            connection.execute(text("DROP TABLE accountant_portfolio_summaries"))
+            connection.execute(text("INSERT INTO accountants (id, user_id) VALUES ('a1', 'u1')"))
+            connection.execute(text(
+                "INSERT INTO businesses (id, name, owner_id, accountant_id) VALUES ('b1', 'Acme', 'u1', 'a1')"
+            ))
+            connection.execute(text(
+                "INSERT INTO business_financial_metrics (id, business_id, revenue) VALUES ('m1', 'b1', 500)"
+            ))
+
+        run_migrations(migration_engine)
+
+        with migration_engine.connect() as connection:
+            row = connection.execute(text(
+                "SELECT accountant_id, business_count, revenue FROM accountant_portfolio_summaries"
+            )).one()
+        assert tuple(row) == ("a1", 1, 500)
+
+    def test_fills_accountant_hierarchy(self, migration_engine):
+        """Test the closure table is created and filled from super_accountant_id."""
+        Base.metadata.create_all(bind=migration_engine)
+        with migration_engine.begin() as connection:
+            connection.execute(text("DROP TABLE accountant_hierarchy"))
+            connection.execute(text(
+                "INSERT INTO accountants (id, user_id, super_accountant_id) "
+                "VALUES ('a1', 'u1', NULL), ('a2', 'u2', 'a1'), ('a3', 'u3', 'a2')"
+            ))
+
+        run_migrations(migration_engine)
+
+        with migration_engine.connect() as connection:
+            rows = connection.execute(text(
+                "SELECT descendant_id, depth FROM accountant_hierarchy WHERE ancestor_id = 'a1' ORDER BY depth"
+            )).all()
+        assert [tuple(row) for row in rows] == [("a1", 0), ("a2", 1), ("a3", 2)]
+
+    def test_creates_resource_versions(self, migration_engine):
+        """Test the change counter table is added to a database that lacks it."""
+        Base.metadata.create_all(bind=migration_engine)
+        with migration_engine.begin() as connection:
+            connection.execute(text("DROP TABLE resource_versions"))
+
+        run_migrations(migration_engine)
+
+        assert "resource_versions" in inspect(migration_engine).get_table_names()
+
+    def test_seeds_resource_versions(self, migration_engine):
+        """Test every collection gets its counter row, leaving existing counts alone."""
+        Base.metadata.create_all(bind=migration_engine)
+        with migration_engine.begin() as connection:
+            connection.execute(text("DELETE FROM resource_versions WHERE name != 'businesses'"))
+            connection.execute(text("UPDATE resource_versions SET version = 7"))
+
+        run_migrations(migration_engine)
+
+        with migration_engine.connect() as connection:
+            rows = connection.execute(text("SELECT name, version FROM resource_versions ORDER BY name")).all()
+        assert [tuple(row) for row in rows] == [("accountants", 0), ("businesses", 7), ("users", 0)]
+
+    def test_creates_change_log(self, migration_engine):
+        """Test the change log table is added to a database that lacks it."""
+        Base.metadata.create_all(bind=migration_engine)
+        with migration_engine.begin() as connection:
+            connection.execute(text("DROP TABLE change_log"))
+
+        run_migrations(migration_engine)
+
+        assert "change_log" in inspect(migration_engine).get_table_names()
+
+    def test_indexes_change_log_by_business(self, migration_engine):
+        """Test the change log gets its per-business index."""
+        Base.metadata.create_all(bind=migration_engine)
+        with migration_engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_change_log_business_id_id"))
+
+        run_migrations(migration_engine)
+
+        assert "ix_change_log_business_id_id" in index_names(migration_engine)
+
+    def test_adds_change_log_delete_audience(self, migration_engine):
+        """Test the delete audience columns are added to a change log that lacks them, keeping its entries."""
+        with migration_engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE change_log (id INTEGER PRIMARY KEY AUTOINCREMENT, table_name VARCHAR NOT NULL, "
+                "operation VARCHAR NOT NULL, row_id VARCHAR, business_id VARCHAR NOT NULL, accountant_id VARCHAR, "
+                "changed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            ))
+            connection.execute(text(
+                "INSERT INTO change_log (table_name, operation, row_id, business_id) VALUES ('businesses', 'delete', 'b1', 'b1')"
+            ))
+        Base.metadata.create_all(bind=migration_engine)
+
+        run_migrations(migration_engine)
+
+        with migration_engine.connect() as connection:
+            row = connection.execute(text("SELECT business_id, owner_id, accountant_ids FROM change_log")).one()
+        assert tuple(row) == ("b1", None, None)
+
+    def test_creates_financial_history(self, migration_engine):
+        """Test the financial history table and its period index are added to a database that lacks them."""
+        Base.metadata.create_all(bind=migration_engine)
+        with migration_engine.begin() as connection:
+            connection.execute(text("DROP TABLE business_financial_history"))
+
+        run_migrations(migration_engine)
+
+        indexes = inspect(migration_engine).get_indexes("business_financial_history")
+        assert [index["name"] for index in indexes] == ["ix_business_financial_history_business_id_period"]
@@ -0,0 +1,103 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from app.crud import business_aggregates
+from app.models import Accountant, Business, BusinessFinancialMetrics, BusinessMetrics, User
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.unit,
+    pytest.mark.crud
+]
+
+@pytest.fixture
+def portfolio(db_session, test_user):
+    """Four businesses under two accountants, one of them reporting to a super accountant."""
+    lead_user = User(username="lead", email="lead@example.com", hashed_password="x", role="super_accountant")
+    db_session.add(lead_user)
+    db_session.commit()
+    lead = Accountant(user_id=lead_user.id, is_super_accountant=True)
+    db_session.add(lead)
+    db_session.commit()
+    member = Accountant(user_id=test_user.id, super_accountant_id=lead.id)
+    db_session.add(member)
+    db_session.commit()
+    
+    businesses = [
+        Business(name="A", owner_id=test_user.id, accountant_id=member.id),
+        Business(name="B", owner_id=test_user.id, accountant_id=member.id),
+        Business(name="C", owner_id=test_user.id, accountant_id=lead.id),
+        Business(name="D", owner_id=test_user.id, accountant_id=lead.id, is_active=False),
+    ]
+    db_session.add_all(businesses)
+    db_session.commit()
+    for business, revenue in zip(businesses[:3], (100, 300, 200)):
+        db_session.add(BusinessFinancialMetrics(business_id=business.id, revenue=revenue, net_profit=revenue // 10))
+        db_session.add(BusinessMetrics(business_id=business.id, documents_due=1, pending_approvals=2))
+    db_session.commit()
+    return {"lead": lead, "member": member, "businesses": businesses}
+
+class TestBusinessAggregates:
+    """Test portfolio aggregates computed in SQL."""
+    
+    def test_totals(self, db_session, portfolio):
+        """Test sums, averages and percentiles over the whole portfolio."""
+        result = business_aggregates(db_session, percentiles=True)
+        
+        assert result["group_by"] == "none"
+        (total,) = result["groups"]
+        assert total["key"] is None
+        assert total["business_count"] == 4
+        # The business without metrics counts as zero
+        assert total["revenue"] == {"sum": 600, "avg": 150.0, "p50": 100, "p90": 300}
+        assert "p50" not in total["gross_profit"]
+        assert total["net_profit"]["sum"] == 60
+        assert total["documents_due"] == 3
+        assert total["pending_approvals"] == 6
+    
+    def test_latest_metrics_only(self, db_session, portfolio):
+        """Test that only each business's most recent metrics row is counted."""
+        first = portfolio["businesses"][0]
+        later = datetime.now(timezone.utc) + timedelta(days=1)
+        db_session.add(BusinessFinancialMetrics(business_id=first.id, revenue=1000, created_at=later))
+        db_session.commit()
+        
+        (total,) = business_aggregates(db_session)["groups"]
+        
+        assert total["revenue"]["sum"] == 1500
+    
+    def test_group_by_accountant(self, db_session, portfolio):
+        """Test grouping by primary accountant."""
+        groups = {group["key"]: group for group in business_aggregates(db_session, group_by="accountant")["groups"]}
+        
+        assert groups[portfolio["member"].id]["business_count"] == 2
+        assert groups[portfolio["member"].id]["revenue"]["sum"] == 400
+        assert groups[portfolio["lead"].id]["revenue"]["sum"] == 200
+    
+    def test_group_by_super_accountant_and_status(self, db_session, portfolio):
+        """Test grouping by the accountant's super accountant and by activity."""
+        by_super = {group["key"]: group["business_count"] for group in business_aggregates(db_session, group_by="super_accountant")["groups"]}
+        by_status = {group["key"]: group["business_count"] for group in business_aggregates(db_session, group_by="status")["groups"]}
+        
+        assert by_super == {None: 2, portfolio["lead"].id: 2}
+        assert by_status == {False: 1, True: 3}
+    
+    def test_filters_apply(self, db_session, portfolio):
+        """Test the business list filters narrow the aggregate."""
+        (total,) = business_aggregates(db_session, is_active=True, accountant_id=portfolio["member"].id)["groups"]
+        
+        assert total["business_count"] == 2
+    
+    def test_empty_portfolio(self, db_session):
+        """Test a single zero total when nothing matches."""
+        (total,) = business_aggregates(db_session)["groups"]
+        
+        assert total["business_count"] == 0
+        assert total["revenue"]["sum"] == 0
+    
+    def test_unknown_group(self, db_session):
+        """Test grouping by an unsupported key."""
+        with pytest.raises(HTTPException) as exc_info:
+            business_aggregates(db_session, group_by="owner")
+        
+        assert exc_info.value.status_code == 400
@@ -0,0 +1,76 @@
+import pytest
+from app.crud import assign_accountant_to_business
+from app.response_cache import response_cache
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.integration
+]
+
+def counts() -> tuple:
+    status = response_cache.status()
+    return status["hits"], status["misses"], status["invalidated"]
+
+class TestResponseCache:
+    """Test caching of the business and accountant list responses."""
+
+    def test_repeat_request_is_served_from_cache(self, client, auth_headers, admin_auth_headers, test_business):
+        """Test a repeated list request is a hit with the same body and headers."""
+        hits, misses, _ = counts()
+        first = client.get("/businesses/?view=card", headers=admin_auth_headers)
+        second = client.get("/businesses/?view=card", headers=admin_auth_headers)
+
+        assert counts()[:2] == (hits + 1, misses + 1)
+        assert second.json() == first.json()
+        assert second.headers["X-Total-Count"] == first.headers["X-Total-Count"]
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert second.headers["Content-Type"] == "application/json"
+        # Accountants see only their own businesses, so they never share the admin's entry
+        client.get("/businesses/?view=card", headers=auth_headers)
+        assert counts()[1] == misses + 2
+
+        response = client.get("/diagnostics/cache", headers=admin_auth_headers)
+        assert response.json()["hits"] == hits + 1
+
+    def test_business_write_evicts_business_entries_only(self, client, admin_auth_headers, test_user, test_business):
+        """Test a business update drops cached business pages but keeps accountant pages."""
+        client.get("/businesses/", headers=admin_auth_headers)
+        client.get("/businesses/?limit=1", headers=admin_auth_headers)
+        client.get("/accountants/", headers=admin_auth_headers)
+        _, _, invalidated = counts()
+
+        client.put(
+            f"/businesses/{test_business.id}", json={"name": "Renamed", "owner_id": test_user.id},
+            headers=admin_auth_headers
+        )
+
+        assert counts()[2] == invalidated + 2
+        hits, _, _ = counts()
+        client.get("/accountants/", headers=admin_auth_headers)
+        assert counts()[0] == hits + 1
+        response = client.get("/businesses/", headers=admin_auth_headers)
+        assert response.json()[0]["name"] == "Renamed"
+
+    def test_core_writes_evict(self, client, db_session, admin_auth_headers, test_business, test_super_accountant):
+        """Test assignments written with Core statements drop cached business pages."""
+        client.get("/businesses/", headers=admin_auth_headers)
+        _, _, invalidated = counts()
+
+        assign_accountant_to_business(db_session, test_business.id, test_super_accountant.id)
+
+        assert counts()[2] == invalidated + 1
+        response = client.get("/businesses/", headers=admin_auth_headers)
+        assert test_super_accountant.id in {accountant["id"] for accountant in response.json()[0]["accountants"]}
+
+    def test_rolled_back_writes_keep_entries(self, client, db_session, admin_auth_headers, test_business):
+        """Test a write that never commits leaves the cache alone."""
+        client.get("/businesses/", headers=admin_auth_headers)
+        _, _, invalidated = counts()
+
+        test_business.name = "Discarded"
+        db_session.flush()
+        db_session.rollback()
+
+        assert counts()[2] == invalidated
+        response = client.get("/businesses/", headers=admin_auth_headers)
+        assert response.json()[0]["name"] == "Test Business"
@@ -0,0 +1,66 @@
+import pytest
+from app import schemas
+from app.crud import assign_accountant_to_business, get_businesses
+from app.models import BusinessMetrics
+from app.serializers import to_dict
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.integration
+]
+
+class TestResponseSchemas:
+    """Test that routes serialize through their response schemas."""
+
+    def test_business_hides_password_hashes(self, client, admin_auth_headers, test_business):
+        """Test that nested owner and accountant users carry only schema fields."""
+        response = client.get(f"/businesses/{test_business.id}", headers=admin_auth_headers)
+
+        body = response.json()
+        assert set(body) == set(schemas.Business.__fields__)
+        assert "hashed_password" not in body["owner"]
+        assert "hashed_password" not in body["accountant"]["user"]
+        assert "hashed_password" not in response.text
+
+    def test_list_headers_and_users(self, client, admin_auth_headers, test_business):
+        """Test that list routes keep their pagination headers."""
+        response = client.get("/businesses/?limit=1", headers=admin_auth_headers)
+        assert response.headers["x-total-count"] == "1"
+        assert "x-next-cursor" in response.headers
+
+        response = client.get("/users/", headers=admin_auth_headers)
+        assert all(set(user) == set(schemas.UserResponse.__fields__) for user in response.json())
+
+    def test_assigned_accountant_can_update(self, client, db_session, test_admin_user, test_accountant, test_business, auth_headers):
+        """Test the junction-table permission check on update."""
+        test_business.owner_id = test_admin_user.id
+        db_session.commit()
+        body = {"name": "Renamed", "owner_id": test_admin_user.id}
+
+        response = client.put(f"/businesses/{test_business.id}", json=body, headers=auth_headers)
+        assert response.status_code == 403
+
+        assign_accountant_to_business(db_session, test_business.id, test_accountant.id)
+        response = client.put(f"/businesses/{test_business.id}", json=body, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["name"] == "Renamed"
+
+def test_unloaded_relationships_are_empty(db_session, test_business):
+    """Test that relationships a view does not load come out as null or [] without lazy loading."""
+    db_session.add(BusinessMetrics(business_id=test_business.id, documents_due=2))
+    db_session.commit()
+    db_session.expunge_all()
+
+    (business,) = get_businesses(db_session, view="card")
+    data = to_dict(schemas.Business, business)
+
+    assert data["owner"] is None and data["accountant"] is None
+    assert data["metrics"][0]["documents_due"] == 2
+    assert "owner" not in business.__dict__
+
+    db_session.expunge_all()
+    (business,) = get_businesses(db_session, view="detail")
+    data = to_dict(schemas.Business, business)
+
+    assert data["metrics"] == [] and data["financial_metrics"] == []
+    assert "metrics" not in business.__dict__
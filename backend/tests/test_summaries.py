@@ -0,0 +1,141 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from app import crud_async
+from app.crud import (
+    assign_accountant_to_business, create_business, delete_accountant, delete_business,
+    get_accountant_summaries, remove_accountant_from_business, update_business
+)
+from app.models import AccountantPortfolioSummary, Accountant, BusinessFinancialMetrics, BusinessMetrics, User
+from app.summaries import check_accountant_summaries, rebuild_accountant_summaries
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.unit,
+    pytest.mark.crud
+]
+
+@pytest.fixture
+def team(db_session, test_user):
+    """A super accountant with two subordinates."""
+    lead_user = User(username="lead", email="lead@example.com", hashed_password="x", role="super_accountant")
+    second_user = User(username="second", email="second@example.com", hashed_password="x", role="accountant")
+    db_session.add_all([lead_user, second_user])
+    db_session.commit()
+    lead = Accountant(user_id=lead_user.id, is_super_accountant=True, last_name="Lead")
+    db_session.add(lead)
+    db_session.commit()
+    first = Accountant(user_id=test_user.id, super_accountant_id=lead.id, last_name="First")
+    second = Accountant(user_id=second_user.id, super_accountant_id=lead.id, last_name="Second")
+    db_session.add_all([first, second])
+    db_session.commit()
+    return {"owner": test_user, "lead": lead, "first": first, "second": second}
+
+def summary(db_session, accountant):
+    (row,) = get_accountant_summaries(db_session, accountant_id=accountant.id)
+    return {key: row[key] for key in ("business_count", "revenue", "documents_due", "pending_approvals")}
+
+def add_metrics(db_session, business, revenue=0, documents_due=0, pending_approvals=0):
+    db_session.add(BusinessFinancialMetrics(business_id=business.id, revenue=revenue))
+    db_session.add(BusinessMetrics(business_id=business.id, documents_due=documents_due, pending_approvals=pending_approvals))
+    db_session.commit()
+
+class TestAccountantSummaries:
+    """Test the incrementally maintained per-accountant summary table."""
+
+    def test_new_accountant_starts_empty(self, db_session, team):
+        """Test that creating an accountant creates a zero summary."""
+        assert summary(db_session, team["first"]) == {
+            "business_count": 0, "revenue": 0, "documents_due": 0, "pending_approvals": 0
+        }
+
+    def test_business_and_metrics_writes(self, db_session, team):
+        """Test that creating a business and writing its metrics update the totals."""
+        business = create_business(db_session, {"name": "A", "owner_id": team["owner"].id, "accountant_id": team["first"].id})
+        assert summary(db_session, team["first"])["business_count"] == 1
+
+        add_metrics(db_session, business, revenue=100, documents_due=2, pending_approvals=3)
+        assert summary(db_session, team["first"]) == {
+            "business_count": 1, "revenue": 100, "documents_due": 2, "pending_approvals": 3
+        }
+
+        # Only the latest metrics row counts
+        later = datetime.now(timezone.utc) + timedelta(days=1)
+        metrics = BusinessFinancialMetrics(business_id=business.id, revenue=150, created_at=later)
+        db_session.add(metrics)
+        db_session.commit()
+        assert summary(db_session, team["first"])["revenue"] == 150
+
+        metrics.revenue = 175
+        db_session.commit()
+        assert summary(db_session, team["first"])["revenue"] == 175
+
+    def test_reassign_and_assign(self, db_session, team):
+        """Test that moving the primary accountant and assigning others update both sides."""
+        business = create_business(db_session, {"name": "A", "owner_id": team["owner"].id, "accountant_id": team["first"].id})
+        add_metrics(db_session, business, revenue=100)
+
+        update_business(db_session, business.id, {"accountant_id": team["second"].id})
+        assert summary(db_session, team["first"])["business_count"] == 0
+        assert summary(db_session, team["second"])["revenue"] == 100
+
+        assign_accountant_to_business(db_session, business.id, team["first"].id)
+        # Primary and assigned together still count the business once
+        assign_accountant_to_business(db_session, business.id, team["second"].id)
+        assert summary(db_session, team["first"])["revenue"] == 100
+        assert summary(db_session, team["second"])["business_count"] == 1
+
+        remove_accountant_from_business(db_session, business.id, team["first"].id)
+        assert summary(db_session, team["first"])["business_count"] == 0
+        assert check_accountant_summaries(db_session.connection()) == []
+
+    def test_delete_business_and_accountant(self, db_session, team):
+        """Test that deletions drop the business from totals and the accountant's row."""
+        business = create_business(db_session, {"name": "A", "owner_id": team["owner"].id})
+        assign_accountant_to_business(db_session, business.id, team["first"].id)
+
+        delete_business(db_session, business.id)
+        assert summary(db_session, team["first"])["business_count"] == 0
+
+        delete_accountant(db_session, team["second"].id)
+        assert db_session.get(AccountantPortfolioSummary, team["second"].id) is None
+        assert check_accountant_summaries(db_session.connection()) == []
+
+    def test_super_accountant_subordinates(self, db_session, team):
+        """Test reading a super accountant's subordinates in one query."""
+        create_business(db_session, {"name": "A", "owner_id": team["owner"].id, "accountant_id": team["second"].id})
+
+        rows = get_accountant_summaries(db_session, super_accountant_id=team["lead"].id)
+
+        assert [(row["last_name"], row["business_count"]) for row in rows] == [("First", 0), ("Second", 1)]
+
+    def test_check_and_rebuild(self, db_session, team):
+        """Test that the checker reports drift from bulk writes and a rebuild repairs it."""
+        business = create_business(db_session, {"name": "A", "owner_id": team["owner"].id, "accountant_id": team["first"].id})
+        add_metrics(db_session, business, revenue=100)
+        # Core statements bypass the flush hooks
+        db_session.execute(update(BusinessFinancialMetrics).values(revenue=250))
+        db_session.commit()
+
+        (mismatch,) = check_accountant_summaries(db_session.connection())
+        assert mismatch["accountant_id"] == team["first"].id
+        assert mismatch["stored"]["revenue"] == 100
+        assert mismatch["expected"]["revenue"] == 250
+
+        assert rebuild_accountant_summaries(db_session.connection()) == 3
+        assert check_accountant_summaries(db_session.connection()) == []
+        assert summary(db_session, team["first"])["revenue"] == 250
+
+@pytest.mark.asyncio
+async def test_async_writes_update_summaries(async_db_session):
+    """Test that the async crud path keeps summaries in step too."""
+    owner = await crud_async.create_user(async_db_session, {
+        "username": "owner", "email": "owner@example.com", "password": "ownerpassword", "role": "accountant"
+    })
+    accountant = await crud_async.create_accountant(async_db_session, {"user_id": owner.id})
+    business = await crud_async.create_business(async_db_session, {"name": "A", "owner_id": owner.id})
+    await crud_async.assign_accountant_to_business(async_db_session, business.id, accountant.id)
+
+    (row,) = await crud_async.get_accountant_summaries(async_db_session, accountant_id=accountant.id)
+
+    assert row["business_count"] == 1
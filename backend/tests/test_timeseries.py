@@ -0,0 +1,121 @@
+import pytest
+from datetime import date
+from fastapi import HTTPException
+from app.crud import create_business, get_changes, get_financial_history
+from app.models import BusinessFinancialHistory
+
+# Add markers to all test methods
+pytestmark = [
+    pytest.mark.unit,
+    pytest.mark.crud
+]
+
+def record(db_session, business, *months):
+    """Record (period, revenue, net_profit) months for ``business``."""
+    for period, revenue, net_profit in months:
+        db_session.add(BusinessFinancialHistory(
+            business_id=business.id, period=period, revenue=revenue, net_profit=net_profit, total_costs=revenue - net_profit
+        ))
+    db_session.commit()
+
+def figures(history, field: str = "revenue") -> list:
+    return [(point["period"], point[field], point[f"percentage_change_{field}"]) for point in history["points"]]
+
+class TestFinancialHistory:
+    """Test financial history range queries, downsampling and computed changes."""
+
+    def test_monthly_changes_keep_decimals(self, db_session, test_business):
+        """Test changes come from the month before, as decimals, and are null across gaps."""
+        record(
+            db_session, test_business,
+            (date(2024, 1, 1), 1000, 100), (date(2024, 2, 1), 1155, -50), (date(2024, 4, 1), 1200, 60),
+        )
+
+        history = get_financial_history(db_session, business_id=test_business.id)
+
+        assert history["interval"] == "month"
+        assert figures(history) == [
+            (date(2024, 1, 1), 1000, None), (date(2024, 2, 1), 1155, 15.5), (date(2024, 4, 1), 1200, None),
+        ]
+        # A fall into a loss is measured against the size of the earlier profit
+        assert history["points"][1]["percentage_change_net_profit"] == -150.0
+
+    def test_downsampling(self, db_session, test_business):
+        """Test months are summed into calendar quarters and years."""
+        record(db_session, test_business, *[(date(2023, month, 1), 100, 10) for month in range(1, 13)])
+        record(db_session, test_business, (date(2024, 1, 1), 150, 10), (date(2024, 2, 1), 150, 10))
+
+        quarters = get_financial_history(db_session, interval="quarter", business_id=test_business.id)
+        years = get_financial_history(db_session, interval="year", business_id=test_business.id)
+
+        assert figures(quarters)[-2:] == [(date(2023, 10, 1), 300, 0.0), (date(2024, 1, 1), 300, 0.0)]
+        assert [point["months"] for point in quarters["points"]] == [3, 3, 3, 3, 2]
+        assert figures(years) == [(date(2023, 1, 1), 1200, None), (date(2024, 1, 1), 300, -75.0)]
+
+    def test_range_widens_to_whole_buckets(self, db_session, test_business):
+        """Test the range covers whole buckets and the first one still has a change."""
+        record(db_session, test_business, *[(date(2024, month, 1), 100 * month, 0) for month in range(1, 10)])
+
+        history = get_financial_history(
+            db_session, interval="quarter", start=date(2024, 5, 20), end=date(2024, 5, 20), business_id=test_business.id
+        )
+
+        assert figures(history) == [(date(2024, 4, 1), 1500, 150.0)]
+
+    def test_portfolio_scope(self, db_session, test_business, test_admin_user):
+        """Test portfolio history sums the businesses matching the filters only."""
+        other = create_business(db_session, {"name": "Other", "owner_id": test_admin_user.id})
+        record(db_session, test_business, (date(2024, 1, 1), 100, 0))
+        record(db_session, other, (date(2024, 1, 1), 50, 0))
+
+        assert figures(get_financial_history(db_session))[0][1] == 150
+        assert figures(get_financial_history(db_session, owner_id=test_admin_user.id))[0][1] == 50
+
+    def test_unknown_interval(self, db_session):
+        """Test an unknown interval is rejected."""
+        with pytest.raises(HTTPException) as exc_info:
+            get_financial_history(db_session, interval="week")
+
+        assert exc_info.value.status_code == 400
+
+class TestFinancialHistoryAPI:
+    """Test the financial history endpoints."""
+
+    def test_record_and_query(self, client, db_session, auth_headers, test_business):
+        """Test an owner records months, once each, and reads them back with changes."""
+        url = f"/businesses/{test_business.id}/metrics/history"
+        cursor = get_changes(db_session)["cursor"]
+        for period, revenue in (("2024-01-15", 1000), ("2024-02-01", 1221)):
+            response = client.post(url, json={"period": period, "revenue": revenue}, headers=auth_headers)
+            assert response.status_code == 200
+        assert response.json()["period"] == "2024-02-01"
+
+        duplicate = client.post(url, json={"period": "2024-02-20", "revenue": 1}, headers=auth_headers)
+        assert duplicate.status_code == 409
+
+        response = client.get(f"{url}?start=2024-02-01", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["points"] == [{
+            "period": "2024-02-01", "months": 1,
+            "revenue": 1221, "gross_profit": 0, "net_profit": 0, "total_costs": 0,
+            "percentage_change_revenue": 22.1, "percentage_change_gross_profit": None,
+            "percentage_change_net_profit": None, "percentage_change_total_costs": None,
+        }]
+        assert [change["table_name"] for change in get_changes(db_session, since=cursor)["changes"]] == [
+            "business_financial_history", "business_financial_history"
+        ]
+
+    def test_access(self, client, auth_headers, admin_auth_headers, test_admin_user, db_session):
+        """Test accountants reach only their own businesses' history."""
+        other = create_business(db_session, {"name": "Other", "owner_id": test_admin_user.id})
+        record(db_session, other, (date(2024, 1, 1), 100, 0))
+
+        assert client.get(f"/businesses/{other.id}/metrics/history", headers=auth_headers).status_code == 403
+        assert client.post(
+            f"/businesses/{other.id}/metrics/history", json={"period": "2024-02-01"}, headers=auth_headers
+        ).status_code == 403
+        assert client.get("/businesses/metrics/history", headers=auth_headers).json()["points"] == []
+        assert client.get("/businesses/metrics/history?interval=year", headers=admin_auth_headers).json()["points"][0][
+            "revenue"
+        ] == 100
+        assert client.get("/businesses/missing/metrics/history", headers=admin_auth_headers).status_code == 404
@@ -3,7 +3,7 @@
 import React, { useEffect, useState, useCallback } from 'react';
 import { useAuth } from '../../context/AuthContext';
 import { useRouter } from 'next/navigation';
-import { businessesAPI, accountantsAPI } from '../../lib/api';
+import { businessesAPI, accountantsAPI, Page } from '../../lib/api';
 import { Business, Accountant } from '../../types';
 import BusinessCard from '../../components/business-card';
 import ManageSuperDashboard from '../../components/manage-super-dashboard';
@@ -14,41 +14,46 @@ export default function DashboardPage() {
   const { user, logout } = useAuth();
   const router = useRouter();
   const [businesses, setBusinesses] = useState<Business[]>([]);
-  const [loading, setLoading] = useState(true);
+  const [totalBusinesses, setTotalBusinesses] = useState(0);
+  const [loaded, setLoaded] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [searchTerm, setSearchTerm] = useState('');
+  const [debouncedSearch, setDebouncedSearch] = useState('');
   const [currentPage, setCurrentPage] = useState(1);
   const [itemsPerPage] = useState(9);
   const [activeTab, setActiveTab] = useState("businesses");
   const [accountants, setAccountants] = useState<Accountant[]>([]);
 
+  // Search and paginate on the server, one page per request
   const fetchBusinesses = useCallback(async () => {
     if (!user) return;
     
     try {
-      setLoading(true);
-      let businessesData: Business[];
+      const params = {
+        q: debouncedSearch || undefined,
+        skip: (currentPage - 1) * itemsPerPage,
+        limit: itemsPerPage,
+      };
+      let page: Page<Business>;
 
-      if (user.role === Roles.ROOT_ADMIN) {
-        // Root admin can see all businesses
-        businessesData = await businessesAPI.getAll();
-      } else if (user.role === Roles.SUPER_ACCOUNTANT) {
-        // Super accountant can see businesses they manage
-        businessesData = await businessesAPI.getAll();
+      if (user.role === Roles.ROOT_ADMIN || user.role === Roles.SUPER_ACCOUNTANT) {
+        // Root admins and super accountants can see all businesses
+        page = await businessesAPI.list(params);
       } else {
         // Regular accountant can only see their own businesses
-        businessesData = await businessesAPI.getUserBusinesses(user.id);
+        page = await businessesAPI.listUserBusinesses(user.id, params);
       }
 
-      setBusinesses(businessesData);
+      setBusinesses(page.items);
+      setTotalBusinesses(page.total);
       setError(null);
     } catch (err) {
       console.error('Failed to fetch businesses:', err);
       setError('Failed to load businesses');
     } finally {
-      setLoading(false);
+      setLoaded(true);
     }
-  }, [user]);
+  }, [user, debouncedSearch, currentPage, itemsPerPage]);
 
   const fetchAccountants = useCallback(async () => {
     if (!user) return;
@@ -68,26 +73,24 @@ export default function DashboardPage() {
       return;
     }
 
-    fetchBusinesses();
     fetchAccountants();
-  }, [user, router, fetchBusinesses, fetchAccountants]);
-
-  // Filter businesses based on search term
-  const filteredBusinesses = businesses.filter(business =>
-    business.name.toLowerCase().includes(searchTerm.toLowerCase())
-  );
+  }, [user, router, fetchAccountants]);
 
-  // Pagination logic
-  const totalPages = Math.ceil(filteredBusinesses.length / itemsPerPage);
-  const startIndex = (currentPage - 1) * itemsPerPage;
-  const endIndex = startIndex + itemsPerPage;
-  const currentBusinesses = filteredBusinesses.slice(startIndex, endIndex);
+  useEffect(() => {
+    fetchBusinesses();
+  }, [fetchBusinesses]);
 
-  // Reset to first page when search changes
+  // Wait for typing to pause before searching, and go back to the first page
   useEffect(() => {
-    setCurrentPage(1);
+    const timeoutId = setTimeout(() => {
+      setDebouncedSearch(searchTerm.trim());
+      setCurrentPage(1);
+    }, 300);
+    return () => clearTimeout(timeoutId);
   }, [searchTerm]);
 
+  const totalPages = Math.ceil(totalBusinesses / itemsPerPage);
+
   if (!user) {
     return null;
   }
@@ -96,12 +99,12 @@ export default function DashboardPage() {
   const getTabsByRole = () => {
     if (user.role === Roles.ROOT_ADMIN) {
       return [
-        { value: "businesses", label: "Businesses", content: <BusinessDashboardContent businesses={currentBusinesses} searchTerm={searchTerm} setSearchTerm={setSearchTerm} currentPage={currentPage} setCurrentPage={setCurrentPage} totalPages={totalPages} totalBusinesses={filteredBusinesses.length} onRefresh={fetchBusinesses} /> },
+        { value: "businesses", label: "Businesses", content: <BusinessDashboardContent businesses={businesses} searchTerm={searchTerm} setSearchTerm={setSearchTerm} currentPage={currentPage} setCurrentPage={setCurrentPage} totalPages={totalPages} totalBusinesses={totalBusinesses} onRefresh={fetchBusinesses} /> },
         { value: "manageSuper", label: "Accountants", content: <ManageSuperDashboard /> },
       ];
     } else if (user.role === Roles.SUPER_ACCOUNTANT || user.role === Roles.ACCOUNTANT) {
       return [
-        { value: "businesses", label: "Businesses", content: <BusinessDashboardContent businesses={currentBusinesses} searchTerm={searchTerm} setSearchTerm={setSearchTerm} currentPage={currentPage} setCurrentPage={setCurrentPage} totalPages={totalPages} totalBusinesses={filteredBusinesses.length} onRefresh={fetchBusinesses} /> }
+        { value: "businesses", label: "Businesses", content: <BusinessDashboardContent businesses={businesses} searchTerm={searchTerm} setSearchTerm={setSearchTerm} currentPage={currentPage} setCurrentPage={setCurrentPage} totalPages={totalPages} totalBusinesses={totalBusinesses} onRefresh={fetchBusinesses} /> }
       ];
     }
   };
@@ -133,7 +136,7 @@ export default function DashboardPage() {
           </div>
         )}
 
-        {loading ? (
+        {!loaded ? (
           <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
             {[...Array(6)].map((_, i) => (
               <div key={i} className="bg-white rounded-lg shadow-sm p-6 animate-pulse">
@@ -143,7 +146,7 @@ export default function DashboardPage() {
               </div>
             ))}
           </div>
-        ) : businesses.length > 0 ? (
+        ) : totalBusinesses > 0 || debouncedSearch ? (
           <Tabs value={activeTab} onValueChange={setActiveTab} className="w-full">
             <TabsList className="grid w-full grid-cols-2 lg:w-auto lg:grid-cols-2 bg-gradient-to-r from-blue-50 to-purple-50 p-1 rounded-xl border border-blue-200 shadow-sm">
               {userTabs?.map((tab) => (
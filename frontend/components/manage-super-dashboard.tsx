@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import {
     Table,
     TableBody,
@@ -7,7 +7,7 @@ import {
     TableHeader,
     TableRow,
 } from "./ui/table";
-import { accountantsAPI, usersAPI } from '../lib/api';
+import { accountantsAPI, usersAPI, UserStats } from '../lib/api';
 import { Select, MenuItem, Chip, Tooltip, Alert, Snackbar } from '@mui/material';
 import { Roles } from '../lib/roles';
 import { 
@@ -38,7 +38,9 @@ interface UserWithRole {
 
 const ManageSuperDashboard = () => {
     const [users, setUsers] = useState<UserWithRole[]>([]);
-    const [loading, setLoading] = useState(true);
+    const [totalUsers, setTotalUsers] = useState(0);
+    const [stats, setStats] = useState<UserStats | null>(null);
+    const [loaded, setLoaded] = useState(false);
     const [error, setError] = useState<string | null>(null);
     const [successMessage, setSuccessMessage] = useState<string | null>(null);
     const [updatingId, setUpdatingId] = useState<string | null>(null);
@@ -49,20 +51,22 @@ const ManageSuperDashboard = () => {
     
     // Search state
     const [searchTerm, setSearchTerm] = useState('');
+    const [debouncedSearch, setDebouncedSearch] = useState('');
 
-    useEffect(() => {
-        fetchUsers();
-    }, []);
-
-    const fetchUsers = async () => {
+    // Search and paginate on the server; role counts come from /users/stats
+    const fetchUsers = useCallback(async () => {
         try {
-            setLoading(true);
-            
-            // Fetch both users and accountants
-            const [allUsers, allAccountants] = await Promise.all([
-                usersAPI.getAll(),
+            // Fetch one page of users, the role counts and accountants
+            const [page, userStats, allAccountants] = await Promise.all([
+                usersAPI.list({
+                    q: debouncedSearch || undefined,
+                    skip: (currentPage - 1) * usersPerPage,
+                    limit: usersPerPage,
+                }),
+                usersAPI.getStats(),
                 accountantsAPI.getAll()
             ]);
+            const allUsers = page.items;
 
             // Create a map of accountant user IDs for quick lookup
             const accountantUserIds = new Set(allAccountants.map(acc => acc.user_id));
@@ -82,14 +86,29 @@ const ManageSuperDashboard = () => {
             });
 
             setUsers(combinedUsers);
+            setTotalUsers(page.total);
+            setStats(userStats);
             setError(null);
         } catch (err) {
             console.error('Failed to fetch users:', err);
             setError('Failed to load users');
         } finally {
-            setLoading(false);
+            setLoaded(true);
         }
-    };
+    }, [debouncedSearch, currentPage, usersPerPage]);
+
+    useEffect(() => {
+        fetchUsers();
+    }, [fetchUsers]);
+
+    // Wait for typing to pause before searching, and go back to the first page
+    useEffect(() => {
+        const timeoutId = setTimeout(() => {
+            setDebouncedSearch(searchTerm.trim());
+            setCurrentPage(1);
+        }, 300);
+        return () => clearTimeout(timeoutId);
+    }, [searchTerm]);
 
     const handleChange = async (value: string, user: UserWithRole) => {
         try {
@@ -164,19 +183,10 @@ const ManageSuperDashboard = () => {
         }
     };
 
-    // Search and filtering logic
-    const filteredUsers = users.filter(user => 
-        user.first_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        user.last_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        user.email.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        user.role.toLowerCase().includes(searchTerm.toLowerCase())
-    );
-
     // Pagination logic
     const indexOfLastUser = currentPage * usersPerPage;
     const indexOfFirstUser = indexOfLastUser - usersPerPage;
-    const currentUsers = filteredUsers.slice(indexOfFirstUser, indexOfLastUser);
-    const totalPages = Math.ceil(filteredUsers.length / usersPerPage);
+    const totalPages = Math.ceil(totalUsers / usersPerPage);
 
     const handlePageChange = (page: number) => {
         setCurrentPage(page);
@@ -187,7 +197,7 @@ const ManageSuperDashboard = () => {
     const goToPreviousPage = () => setCurrentPage(prev => Math.max(prev - 1, 1));
     const goToNextPage = () => setCurrentPage(prev => Math.min(prev + 1, totalPages));
 
-    if (loading) {
+    if (!loaded) {
         return (
             <div className='flex justify-center w-full p-6'>
                 <div className='space-y-6 w-full max-w-6xl'>
@@ -233,7 +243,7 @@ const ManageSuperDashboard = () => {
                         </div>
                         <div className="text-right">
                             <div className="text-3xl font-bold text-blue-600">
-                                {users.length}
+                                {stats?.total ?? 0}
                             </div>
                             <div className="text-sm text-gray-500">Total Users</div>
                         </div>
@@ -250,7 +260,7 @@ const ManageSuperDashboard = () => {
                             <div className="ml-4">
                                 <p className="text-sm font-medium text-gray-600">Regular Accountants</p>
                                 <p className="text-2xl font-bold text-gray-900">
-                                    {users.filter(user => user.role === Roles.ACCOUNTANT).length}
+                                    {stats?.roles[Roles.ACCOUNTANT] ?? 0}
                                 </p>
                             </div>
                         </div>
@@ -264,7 +274,7 @@ const ManageSuperDashboard = () => {
                             <div className="ml-4">
                                 <p className="text-sm font-medium text-gray-600">Super Accountants</p>
                                 <p className="text-2xl font-bold text-gray-900">
-                                    {users.filter(user => user.role === Roles.SUPER_ACCOUNTANT).length}
+                                    {stats?.roles[Roles.SUPER_ACCOUNTANT] ?? 0}
                                 </p>
                             </div>
                         </div>
@@ -278,7 +288,7 @@ const ManageSuperDashboard = () => {
                             <div className="ml-4">
                                 <p className="text-sm font-medium text-gray-600">Root Admins</p>
                                 <p className="text-2xl font-bold text-gray-900">
-                                    {users.filter(user => user.role === Roles.ROOT_ADMIN).length}
+                                    {stats?.roles[Roles.ROOT_ADMIN] ?? 0}
                                 </p>
                             </div>
                         </div>
@@ -321,7 +331,7 @@ const ManageSuperDashboard = () => {
                                     )}
                                 </div>
                                 <div className="text-sm text-gray-600">
-                                    {filteredUsers.length} of {users.length} users
+                                    {totalUsers} of {stats?.total ?? 0} users
                                 </div>
                             </div>
                         </div>
@@ -337,7 +347,7 @@ const ManageSuperDashboard = () => {
                             </TableRow>
                         </TableHeader>
                         <TableBody>
-                            {currentUsers.map((user) => (
+                            {users.map((user) => (
                                 <TableRow key={user.id} className="hover:bg-gray-50 transition-colors">
                                     <TableCell>
                                         <div className="flex items-center space-x-3">
@@ -425,7 +435,7 @@ const ManageSuperDashboard = () => {
                         <div className="px-6 py-4 border-t border-gray-200 bg-gray-50">
                             <div className="flex items-center justify-between">
                                 <div className="text-sm text-gray-700">
-                                    Showing {indexOfFirstUser + 1} to {Math.min(indexOfLastUser, filteredUsers.length)} of {filteredUsers.length} users
+                                    Showing {indexOfFirstUser + 1} to {Math.min(indexOfLastUser, totalUsers)} of {totalUsers} users
                                 </div>
                                 <div className="flex items-center space-x-2">
                                     {/* First Page Button */}
@@ -52,6 +52,97 @@ const apiRequest = async <T>(
   }
 };
 
+// One page of a list endpoint, with the match count from X-Total-Count
+export interface Page<T> {
+  items: T[];
+  total: number;
+}
+
+export interface BusinessListParams {
+  q?: string;
+  isActive?: boolean;
+  sort?: string;
+  skip?: number;
+  limit?: number;
+}
+
+const apiPageRequest = async <T>(endpoint: string): Promise<Page<T>> => {
+  const controller = new AbortController();
+  const timeoutId = setTimeout(() => controller.abort(), API_TIMEOUT);
+
+  try {
+    const response = await fetch(`${API_BASE_URL}${endpoint}`, {
+      signal: controller.signal,
+      headers: getAuthHeaders(),
+    });
+
+    clearTimeout(timeoutId);
+    const items: T[] = await handleResponse(response);
+    const total = parseInt(response.headers.get('X-Total-Count') || String(items.length));
+    return { items, total };
+  } catch (error) {
+    clearTimeout(timeoutId);
+    if (error instanceof Error) {
+      throw error;
+    }
+    throw new Error('Network error');
+  }
+};
+
+export interface UserListParams {
+  q?: string;
+  role?: string;
+  isActive?: boolean;
+  skip?: number;
+  limit?: number;
+}
+
+export interface UserStats {
+  total: number;
+  active: number;
+  roles: Record<string, number>;
+}
+
+export interface FigureSummary {
+  sum: number;
+  avg: number;
+  p50?: number;
+  p90?: number;
+}
+
+export interface PortfolioGroup {
+  key: string | boolean | null;
+  business_count: number;
+  revenue: FigureSummary;
+  gross_profit: FigureSummary;
+  net_profit: FigureSummary;
+  total_costs: FigureSummary;
+  documents_due: number;
+  outstanding_invoices: number;
+  pending_approvals: number;
+}
+
+export interface PortfolioAggregates {
+  group_by: string;
+  groups: PortfolioGroup[];
+}
+
+const userListQuery = ({ q, role, isActive, skip = 0, limit = 100 }: UserListParams = {}): string => {
+  const params = new URLSearchParams({ skip: String(skip), limit: String(limit) });
+  if (q) params.set('q', q);
+  if (role) params.set('role', role);
+  if (isActive !== undefined) params.set('is_active', String(isActive));
+  return params.toString();
+};
+
+const businessListQuery = ({ q, isActive, sort, skip = 0, limit = 100 }: BusinessListParams = {}): string => {
+  const params = new URLSearchParams({ view: 'card', skip: String(skip), limit: String(limit) });
+  if (q) params.set('q', q);
+  if (isActive !== undefined) params.set('is_active', String(isActive));
+  if (sort) params.set('sort', sort);
+  return params.toString();
+};
+
 // Authentication API
 export const authAPI = {
   login: async (credentials: LoginCredentials): Promise<AuthResponse> => {
@@ -72,6 +163,14 @@ export const usersAPI = {
     return apiRequest<User[]>('/users/');
   },
 
+  list: async (params?: UserListParams): Promise<Page<User>> => {
+    return apiPageRequest<User>(`/users/?${userListQuery(params)}`);
+  },
+
+  getStats: async (): Promise<UserStats> => {
+    return apiRequest<UserStats>('/users/stats');
+  },
+
   getById: async (id: string): Promise<User> => {
     return apiRequest<User>(`/users/${id}`);
   },
@@ -91,16 +190,49 @@ export const usersAPI = {
   },
 };
 
+export interface AccountantSummary {
+  accountant_id: string;
+  first_name?: string;
+  last_name?: string;
+  super_accountant_id?: string;
+  business_count: number;
+  revenue: number;
+  documents_due: number;
+  pending_approvals: number;
+}
+
+export interface AccountantTreeNode {
+  id: string;
+  first_name?: string;
+  last_name?: string;
+  is_super_accountant: boolean;
+  depth: number;
+  business_count: number;
+  subordinate_count: number;
+  descendant_count: number;
+  team_business_count: number;
+  subordinates: AccountantTreeNode[];
+}
+
 // Accountants API
 export const accountantsAPI = {
   getAll: async (): Promise<Accountant[]> => {
     return apiRequest<Accountant[]>('/accountants/');
   },
 
+  getSummaries: async (superAccountantId?: string): Promise<AccountantSummary[]> => {
+    const query = superAccountantId ? `?super_accountant_id=${encodeURIComponent(superAccountantId)}` : '';
+    return apiRequest<AccountantSummary[]>(`/accountants/summaries${query}`);
+  },
+
   getById: async (id: string): Promise<Accountant> => {
     return apiRequest<Accountant>(`/accountants/${id}`);
   },
 
+  getSubtree: async (id: string): Promise<AccountantTreeNode> => {
+    return apiRequest<AccountantTreeNode>(`/accountants/${id}/subtree`);
+  },
+
   create: async (accountantData: Partial<Accountant>): Promise<Accountant> => {
     return apiRequest<Accountant>('/accountants/', {
       method: 'POST',
@@ -138,7 +270,16 @@ export const accountantsAPI = {
 // Businesses API
 export const businessesAPI = {
   getAll: async (): Promise<Business[]> => {
-    return apiRequest<Business[]>('/businesses/');
+    return apiRequest<Business[]>('/businesses/?view=card');
+  },
+
+  list: async (params?: BusinessListParams): Promise<Page<Business>> => {
+    return apiPageRequest<Business>(`/businesses/?${businessListQuery(params)}`);
+  },
+
+  getAggregates: async (groupBy = 'none', percentiles = false): Promise<PortfolioAggregates> => {
+    const params = new URLSearchParams({ group_by: groupBy, percentiles: String(percentiles) });
+    return apiRequest<PortfolioAggregates>(`/businesses/aggregates?${params}`);
   },
 
   getById: async (id: string): Promise<Business> => {
@@ -166,7 +307,11 @@ export const businessesAPI = {
   },
 
   getUserBusinesses: async (userId: string): Promise<Business[]> => {
-    return apiRequest<Business[]>(`/users/${userId}/businesses`);
+    return apiRequest<Business[]>(`/users/${userId}/businesses?view=card`);
+  },
+
+  listUserBusinesses: async (userId: string, params?: BusinessListParams): Promise<Page<Business>> => {
+    return apiPageRequest<Business>(`/users/${userId}/businesses?${businessListQuery(params)}`);
   },
 };
 